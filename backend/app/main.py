@@ -1,8 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import players, clubs, events, fixtures, scheduling, match_codes, results
-from app.utils.database import init_supabase, is_supabase_configured
+from app.routers import players, clubs, events, fixtures, scheduling, match_codes, results, stats, venue, jobs, debug
+from app.services.jobs import job_runner
+from app.utils.admission import AdmissionControlMiddleware, admission_controllers
+from app.utils.compression import CompressionMiddleware
+from app.utils.database import init_supabase, is_supabase_configured, get_pool_metrics, get_breaker_state, close_supabase
+from app.utils.invalidation import invalidation_bus
+from app.utils.profiling import ProfilingMiddleware, profiling_enabled
+from app.utils.resilience import StaleReadMiddleware
 import logging
+import os
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -13,12 +20,30 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# GET requests may be answered from cached reads while the database circuit
+# is open; such responses carry X-Served-From-Cache
+app.add_middleware(StaleReadMiddleware)
+
+# Opt-in request profiling; not installed at all unless configured
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
+
+# Per-lane limits for polled reads, reserved capacity for scoring.
+# Added before CORS so shed responses still carry CORS headers.
+if os.getenv("ADMISSION_ENABLED", "true").lower() not in ("0", "false", "no"):
+    app.add_middleware(AdmissionControlMiddleware)
+
+# gzip / brotli for responses above COMPRESSION_MIN_SIZE bytes
+if os.getenv("COMPRESSION_ENABLED", "true").lower() not in ("0", "false", "no"):
+    app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Served-From-Cache"],
 )
 
 # Include all routers
@@ -29,10 +54,17 @@ app.include_router(scheduling.router, prefix="/api", tags=["scheduling"])
 app.include_router(match_codes.router, prefix="/api", tags=["match_codes"])
 app.include_router(results.router, prefix="/api", tags=["results"])
 app.include_router(events.router, prefix="/api", tags=["events"])
+app.include_router(stats.router, prefix="/api", tags=["stats"])
+app.include_router(venue.router, prefix="/api", tags=["venue"])
+app.include_router(jobs.router, prefix="/api", tags=["jobs"])
+if profiling_enabled():
+    app.include_router(debug.router, prefix="/api", tags=["debug"])
 
 @app.on_event("startup")
 async def startup_event():
     init_supabase()
+    # Cross-worker cache invalidation when running with --workers N
+    invalidation_bus.start()
     if not is_supabase_configured():
         logger.warning("=" * 80)
         logger.warning("SUPABASE NOT CONFIGURED!")
@@ -40,6 +72,12 @@ async def startup_event():
         logger.warning("Please configure SUPABASE_URL and SUPABASE_SERVICE_KEY")
         logger.warning("=" * 80)
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    job_runner.shutdown()
+    invalidation_bus.stop()
+    close_supabase()
+
 @app.get("/")
 async def root():
     return {
@@ -51,7 +89,17 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    breaker = get_breaker_state()
     return {
-        "status": "healthy",
-        "database": "configured" if is_supabase_configured() else "not_configured"
+        "status": "degraded" if breaker and breaker["state"] != "closed" else "healthy",
+        "database": "configured" if is_supabase_configured() else "not_configured",
+        "database_circuit": breaker
     }
+
+@app.get("/metrics/admission")
+async def admission_metrics():
+    return [controller.metrics() for controller in admission_controllers]
+
+@app.get("/metrics/db-pool")
+async def db_pool_metrics():
+    return get_pool_metrics()
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, Field, conint
+from typing import Optional, List, Literal
 from datetime import datetime
 from uuid import UUID
 
@@ -27,18 +27,26 @@ class Player(BaseModel):
 
 class EventCreate(BaseModel):
     name: str
-    type: str = "knockout"
+    type: Literal["knockout", "round_robin", "groups"] = "knockout"
     min_rest: int = 10
+    # "groups" only: group stage followed by a knockout of the top finishers
+    num_groups: Optional[int] = Field(None, ge=1)
+    advance_per_group: int = Field(2, ge=1)
 
 class Event(BaseModel):
     id: UUID
     name: str
     type: str
     min_rest: int
+    num_groups: Optional[int] = None
+    advance_per_group: Optional[int] = None
+    archived_at: Optional[datetime] = None
 
 class MatchCreate(BaseModel):
     event_id: UUID
     round: int
+    group_number: Optional[int] = None
+    bracket_position: Optional[int] = None
     player1_id: UUID
     player2_id: Optional[UUID] = None
     status: str = "pending"
@@ -47,6 +55,8 @@ class Match(BaseModel):
     id: UUID
     event_id: UUID
     round: int
+    group_number: Optional[int] = None
+    bracket_position: Optional[int] = None
     player1_id: UUID
     player2_id: Optional[UUID]
     court_id: Optional[str] = None
@@ -87,6 +97,16 @@ class ScheduleRequest(BaseModel):
     match_duration_minutes: int = 30
     start_time: datetime
 
+class ScheduleSimulationRequest(BaseModel):
+    event_id: UUID
+    # Every court count is simulated with every duration, so both lists and
+    # their values are capped
+    court_options: List[conint(ge=1, le=64)] = Field([2, 4, 6, 8], min_length=1, max_length=10)
+    duration_options: List[conint(ge=1, le=480)] = Field([20, 30, 40], min_length=1, max_length=10)
+    scenarios: int = Field(200, ge=1, le=10000)
+    duration_variance: float = Field(0.2, ge=0, le=2)
+    seed: Optional[int] = None
+
 class LeaderboardEntry(BaseModel):
     player_id: UUID
     player_name: str
@@ -102,3 +122,14 @@ class CSVUploadResponse(BaseModel):
     invalid_rows: int
     inserted_count: int
     errors: List[dict]
+    # Rows that look like players already registered (similar name or same phone)
+    possible_duplicates: List[dict] = []
+
+class ResultsImportResponse(BaseModel):
+    total_rows: int
+    valid_rows: int
+    invalid_rows: int
+    updated_count: int
+    # Next-round and knockout matches created by the imported results
+    created_matches: int
+    errors: List[dict]
@@ -3,6 +3,7 @@ from typing import List
 import uuid
 from app.models import ClubCreate, Club
 from app.utils.database import get_supabase
+from app.utils.resilience import http_error
 
 router = APIRouter()
 
@@ -28,7 +29,7 @@ async def create_club(club: ClubCreate):
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
 
 @router.get("/clubs", response_model=List[dict])
 async def get_clubs():
@@ -39,4 +40,4 @@ async def get_clubs():
         return response.data
     
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
@@ -0,0 +1,27 @@
+import os
+import re
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import FileResponse
+from app.utils.profiling import token_matches, list_profiles, profile_path
+
+router = APIRouter()
+
+
+def _authorize(token: str):
+    if not token_matches(token):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Profile-Token")
+
+
+@router.get("/debug/profiles")
+def get_profiles(x_profile_token: str = Header(None)):
+    _authorize(x_profile_token)
+    return list_profiles()
+
+
+@router.get("/debug/profiles/{profile_id}")
+def download_profile(profile_id: str, x_profile_token: str = Header(None)):
+    """Folded stacks, ready for flamegraph.pl or speedscope."""
+    _authorize(x_profile_token)
+    if not re.fullmatch(r"[A-Za-z0-9-]+", profile_id) or not os.path.exists(profile_path(profile_id)):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(profile_path(profile_id), media_type="text/plain", filename=f"{profile_id}.folded")
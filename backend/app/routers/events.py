@@ -1,8 +1,16 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from postgrest.exceptions import APIError
 from typing import List
 import uuid
 from app.models import EventCreate, Event
-from app.utils.database import get_supabase
+from app.routers.fixtures import FIXTURE_COLUMNS
+from app.services.archive import archive_event as move_to_archive, has_pending_matches, table_for
+from app.services.changes import fetch_in_chunks, read_changes
+from app.services.export import join_scores, stream_csv, stream_ndjson
+from app.utils.database import get_supabase, iter_pages
+from app.utils.invalidation import publish_invalidation
+from app.utils.resilience import http_error
 
 router = APIRouter()
 
@@ -18,12 +26,14 @@ async def create_event(event: EventCreate):
             "id": event_id,
             "name": event.name,
             "type": event.type,
-            "min_rest": event.min_rest
+            "min_rest": event.min_rest,
+            "num_groups": event.num_groups,
+            "advance_per_group": event.advance_per_group
         }
         supabase.table("events").insert(data).execute()
         return {**data}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
 
 
 @router.get("/events", response_model=List[Event])
@@ -36,7 +46,7 @@ async def get_events():
         result = supabase.table("events").select("*").execute()
         return result.data
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
 
 
 @router.get("/events/{event_id}", response_model=Event)
@@ -51,4 +61,134 @@ async def get_event(event_id: str):
             raise HTTPException(status_code=404, detail="Event not found")
         return result.data[0]
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
+
+
+# Errors raised by archive_event() in the database
+NO_DATA_FOUND = "P0002"
+CHECK_VIOLATION = "23514"
+
+
+@router.post("/events/{event_id}/archive")
+def archive_event(event_id: str):
+    """
+    Moves a finished event's matches, scores, match codes and registrations
+    to the archive tables. Refused while any match is still pending.
+    """
+    supabase = get_supabase()
+    try:
+        result = supabase.table("events").select("id, archived_at").eq("id", event_id).execute()
+        if not result.data:
+            raise HTTPException(status_code=404, detail="Event not found")
+        if result.data[0].get('archived_at'):
+            raise HTTPException(status_code=409, detail="Event is already archived")
+        if has_pending_matches(supabase, event_id):
+            raise HTTPException(status_code=409, detail="Event still has pending matches")
+
+        try:
+            moved = move_to_archive(supabase, event_id)
+        except APIError as e:
+            # Lost a race with another archive call or a new pending match
+            if e.code in (NO_DATA_FOUND, CHECK_VIOLATION):
+                raise HTTPException(status_code=409, detail=e.message)
+            raise
+        # Scores left the hot table
+        publish_invalidation("scores")
+        return {"event_id": event_id, "moved": moved}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise http_error(e)
+
+
+EXPORT_PAGE_SIZE = 500
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", stream_csv),
+    "ndjson": ("application/x-ndjson", stream_ndjson),
+}
+
+
+@router.get("/events/{event_id}/export")
+def export_event(event_id: str, format: str = Query("csv", pattern="^(csv|ndjson)$")):
+    """
+    Streams every match of an event with player names, court, times, code
+    and score, in match id order.
+    """
+    supabase = get_supabase()
+    try:
+        result = supabase.table("events").select("id, name, archived_at").eq("id", event_id).execute()
+        if not result.data:
+            raise HTTPException(status_code=404, detail="Event not found")
+
+        archived = bool(result.data[0].get('archived_at'))
+        details_table = table_for("match_details", archived)
+        scores_table = table_for("scores", archived)
+        matches_table = table_for("matches", archived)
+
+        match_pages = iter_pages(
+            lambda: supabase.table(details_table).select("*").eq("event_id", event_id),
+            page_size=EXPORT_PAGE_SIZE
+        )
+        score_pages = iter_pages(
+            lambda: supabase.table(scores_table)
+                .select(f"match_id, player1_score, player2_score, {matches_table}!inner(event_id)")
+                .eq(f"{matches_table}.event_id", event_id),
+            key="match_id",
+            page_size=EXPORT_PAGE_SIZE
+        )
+
+        media_type, encode = EXPORT_FORMATS[format]
+        return StreamingResponse(
+            encode(join_scores(match_pages, score_pages)),
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="event-{event_id}.{format}"'}
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise http_error(e)
+
+
+@router.get("/events/{event_id}/changes")
+def get_event_changes(event_id: str, since: int = Query(0, ge=0)):
+    """
+    Matches, scores, group standings and players changed after version
+    `since`, plus the version to send next time. since=0 returns every
+    entity the event has logged. Ids in `deleted` no longer exist.
+    """
+    supabase = get_supabase()
+    try:
+        changed, version = read_changes(supabase, event_id, since)
+
+        match_ids = list(changed["match"])
+        matches = fetch_in_chunks(lambda: supabase.table("match_details").select(FIXTURE_COLUMNS), "id", match_ids)
+        scores = fetch_in_chunks(lambda: supabase.table("scores").select("match_id, player1_score, player2_score, updated_at"), "match_id", list(changed["score"]))
+        standings = fetch_in_chunks(lambda: supabase.table("group_standings").select("*").eq("event_id", event_id), "player_id", list(changed["standing"]))
+        players = fetch_in_chunks(lambda: supabase.table("players").select("id, name, club_id"), "id", list(changed["player"]))
+
+        found = {
+            "match": {m['id'] for m in matches},
+            "score": {s['match_id'] for s in scores},
+            "standing": {s['player_id'] for s in standings},
+            "player": {p['id'] for p in players},
+        }
+        deleted = {entity: [i for i in ids if i not in found[entity]] for entity, ids in changed.items() if entity in found}
+
+        return {
+            "event_id": event_id,
+            "since": since,
+            "version": version,
+            "matches": matches,
+            "scores": scores,
+            "standings": standings,
+            "players": players,
+            "deleted": {entity: ids for entity, ids in deleted.items() if ids}
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise http_error(e)
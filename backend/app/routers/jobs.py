@@ -0,0 +1,23 @@
+from fastapi import APIRouter, HTTPException
+from app.services.jobs import job_runner
+from app.utils.resilience import http_error
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """
+    Status, progress, timings and (once finished) result or error of a
+    background job started with ?async=true.
+    """
+    try:
+        job = job_runner.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise http_error(e)
@@ -5,6 +5,8 @@ import secrets
 import string
 from app.models import MatchCodeCreate, MatchCodeVerify
 from app.utils.database import get_supabase
+from app.utils.invalidation import publish_invalidation
+from app.utils.resilience import http_error
 
 router = APIRouter()
 
@@ -13,7 +15,7 @@ def generate_match_code(length=6):
     return ''.join(secrets.choice(characters) for _ in range(length))
 
 @router.post("/match-code/generate")
-async def create_match_code(request: MatchCodeCreate):
+def create_match_code(request: MatchCodeCreate):
     supabase = get_supabase()
     
     try:
@@ -40,6 +42,7 @@ async def create_match_code(request: MatchCodeCreate):
         }
         
         result = supabase.table("match_codes").insert(code_data).execute()
+        publish_invalidation("venue_board")
         
         return {
             "message": "Match code generated successfully",
@@ -51,10 +54,10 @@ async def create_match_code(request: MatchCodeCreate):
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
 
 @router.post("/match-code/verify")
-async def verify_match_code(request: MatchCodeVerify):
+def verify_match_code(request: MatchCodeVerify):
     supabase = get_supabase()
     
     try:
@@ -78,4 +81,4 @@ async def verify_match_code(request: MatchCodeVerify):
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
@@ -1,33 +1,57 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from fastapi.responses import JSONResponse
 from typing import List
 import csv
 import uuid
 from io import StringIO
 from app.models import PlayerCreate, CSVUploadResponse
-from app.utils.database import get_supabase
+from app.services.archive import is_archived, table_for
+from app.services.changes import record_changes
+from app.services.jobs import job_runner
+from app.services.player_search import normalize_name, player_index
+from app.utils.database import fetch_all, get_supabase
+from app.utils.invalidation import publish_invalidation
+from app.utils.resilience import http_error
 
 router = APIRouter()
 
+PLAYER_INDEX_COLUMNS = "id, name, phone, club_id, created_at"
+
+
+def _ensure_player_index(supabase):
+    """Loads the search index on first use and pulls players other workers added."""
+    if player_index.needs_reload():
+        player_index.rebuild(fetch_all(lambda: supabase.table("players").select(PLAYER_INDEX_COLUMNS)))
+    elif player_index.needs_refresh():
+        since = player_index.begin_refresh()
+        query = lambda: supabase.table("players").select(PLAYER_INDEX_COLUMNS)
+        if since is not None:
+            query = lambda: supabase.table("players").select(PLAYER_INDEX_COLUMNS).gte("created_at", since.isoformat())
+        player_index.add(fetch_all(query))
+
+
+def _registered_names(supabase, event_id: str) -> set:
+    """Normalized names of the players registered in an event, read from the database."""
+    links = fetch_all(lambda: supabase.table("player_events").select("player_id, players!inner(name)").eq("event_id", event_id), key="player_id")
+    return {normalize_name(link["players"]["name"]) for link in links}
+
 
 @router.post("/players", response_model=dict)
-async def create_player(player: PlayerCreate):
+def create_player(player: PlayerCreate):
     supabase = get_supabase()
 
     try:
-        # 1. Check duplicate player for each event
+        # 1. Check duplicate player for each event against the database;
+        # the search index may lag behind other workers and outside edits
+        name_key = normalize_name(player.name)
         for event_id in player.event_ids:
-            exists = supabase.table("player_events") \
-                .select("*") \
-                .eq("event_id", str(event_id)) \
-                .execute()
-
-            for entry in exists.data:
-                p = supabase.table("players").select("*").eq("id", entry["player_id"]).execute()
-                if p.data and p.data[0]["name"].strip().lower() == player.name.strip().lower():
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Player '{player.name}' is already registered in event {event_id}"
-                    )
+            if name_key in _registered_names(supabase, str(event_id)):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Player '{player.name}' is already registered in event {event_id}"
+                )
+        _ensure_player_index(supabase)
+        possible_duplicates = player_index.find_duplicates(player.name, player.phone)
 
         # 2. Check if club exists
         club_check = supabase.table("clubs").select("*").eq("id", str(player.club_id)).execute()
@@ -44,7 +68,8 @@ async def create_player(player: PlayerCreate):
             "club_id": str(player.club_id)
         }
 
-        supabase.table("players").insert(player_data).execute()
+        created = supabase.table("players").insert(player_data).execute()
+        player_index.add(created.data or [player_data])
 
         # 4. Insert into player_events
         for event_id in player.event_ids:
@@ -52,14 +77,35 @@ async def create_player(player: PlayerCreate):
                 "player_id": player_id,
                 "event_id": str(event_id)
             }).execute()
+            record_changes(supabase, event_id, "player", [player_id])
+
+        # This worker's index already has the player
+        publish_invalidation("players", local=False)
 
         return {
             "message": "Player created successfully",
-            "player_id": player_id
+            "player_id": player_id,
+            "possible_duplicates": possible_duplicates
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
+
+
+@router.get("/players/search", response_model=List[dict])
+def search_players(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50)):
+    """
+    Ranked fuzzy search over player names, or phone numbers when the
+    query is mostly digits.
+    """
+    supabase = get_supabase()
+    try:
+        _ensure_player_index(supabase)
+        return player_index.search(q, limit)
+    except Exception as e:
+        raise http_error(e)
 
 
 @router.get("/players", response_model=List[dict])
@@ -67,7 +113,9 @@ async def get_players(event_id: str = None):
     supabase = get_supabase()
     try:
         if event_id:
-            links = supabase.table("player_events").select("*").eq("event_id", event_id).execute()
+            # Registrations of finished events move to the archive
+            registrations = table_for("player_events", is_archived(supabase, event_id))
+            links = supabase.table(registrations).select("*").eq("event_id", event_id).execute()
             players = []
             for entry in links.data:
                 p = supabase.table("players").select("*").eq("id", entry["player_id"]).execute()
@@ -78,126 +126,164 @@ async def get_players(event_id: str = None):
             result = supabase.table("players").select("*").execute()
             return result.data
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
 
 
-@router.post("/players/upload-csv", response_model=CSVUploadResponse)
-async def upload_csv(file: UploadFile = File(...)):
+def import_players_csv(content: bytes, progress=None) -> CSVUploadResponse:
+    """
+    Validates and inserts players from a CSV upload. Runs inline or as a
+    background job; `progress(done, total)` follows the rows read.
+    """
     supabase = get_supabase()
+    report = progress or (lambda done, total: None)
+
+    # Try multiple encodings
+    for enc in ["utf-8-sig", "utf-8", "latin1"]:
+        try:
+            text_io = StringIO(content.decode(enc))
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise HTTPException(status_code=400, detail="Cannot decode CSV file. Please save as UTF-8.")
+
+    reader = csv.DictReader(text_io)
+    estimated_rows = max(content.count(b"\n"), 1)
+    required_columns = ["name", "age", "phone", "club_id", "event_name"]
+    for col in required_columns:
+        if col not in reader.fieldnames:
+            raise HTTPException(status_code=400, detail=f"Missing required column: {col}")
+
+    # Fetch events from DB
+    events_res = supabase.table("events").select("*").execute()
+    event_lookup = {ev["name"].strip().lower(): ev["id"] for ev in events_res.data}
+
+    _ensure_player_index(supabase)
+    # event_id -> normalized names registered in it, fetched once per event
+    event_names = {}
+    # (event_id, normalized name) already taken by an earlier row of this file
+    seen_in_file = set()
+
+    total_rows = 0
+    valid_rows = 0
+    invalid_rows = 0
+    inserted_count = 0
+    errors = []
+    possible_duplicates = []
+    batch_players = []
+
+    # Prepare all players
+    for idx, row in enumerate(reader):
+        total_rows += 1
+        report(idx, estimated_rows)
+        try:
+            # Strip whitespace
+            row = {k: (v.strip() if isinstance(v, str) else v) for k, v in row.items()}
+
+            # Check required fields
+            if any(not row.get(c) for c in required_columns):
+                errors.append({"row": idx + 2, "error": "Missing required fields"})
+                invalid_rows += 1
+                continue
 
-    if not file.filename.endswith(".csv"):
-        raise HTTPException(status_code=400, detail="File must be CSV format")
+            event_name = row["event_name"].lower()
+            if event_name not in event_lookup:
+                errors.append({"row": idx + 2, "error": f"Event '{row['event_name']}' not found"})
+                invalid_rows += 1
+                continue
 
-    try:
-        content = await file.read()
-        # Try multiple encodings
-        for enc in ["utf-8-sig", "utf-8", "latin1"]:
-            try:
-                text_io = StringIO(content.decode(enc))
-                break
-            except UnicodeDecodeError:
+            # Check club exists
+            club_check = supabase.table("clubs").select("*").eq("id", row["club_id"]).execute()
+            if not club_check.data:
+                errors.append({"row": idx + 2, "error": f"Club {row['club_id']} not found"})
+                invalid_rows += 1
                 continue
-        else:
-            raise HTTPException(status_code=400, detail="Cannot decode CSV file. Please save as UTF-8.")
-
-        reader = csv.DictReader(text_io)
-        required_columns = ["name", "age", "phone", "club_id", "event_name"]
-        for col in required_columns:
-            if col not in reader.fieldnames:
-                raise HTTPException(status_code=400, detail=f"Missing required column: {col}")
-
-        # Fetch events from DB
-        events_res = supabase.table("events").select("*").execute()
-        event_lookup = {ev["name"].strip().lower(): ev["id"] for ev in events_res.data}
-
-        total_rows = 0
-        valid_rows = 0
-        invalid_rows = 0
-        inserted_count = 0
-        errors = []
-        batch_players = []
-
-        # Prepare all players
-        for idx, row in enumerate(reader):
-            total_rows += 1
-            try:
-                # Strip whitespace
-                row = {k: (v.strip() if isinstance(v, str) else v) for k, v in row.items()}
-
-                # Check required fields
-                if any(not row.get(c) for c in required_columns):
-                    errors.append({"row": idx + 2, "error": "Missing required fields"})
-                    invalid_rows += 1
-                    continue
-
-                event_name = row["event_name"].lower()
-                if event_name not in event_lookup:
-                    errors.append({"row": idx + 2, "error": f"Event '{row['event_name']}' not found"})
-                    invalid_rows += 1
-                    continue
-
-                # Check club exists
-                club_check = supabase.table("clubs").select("*").eq("id", row["club_id"]).execute()
-                if not club_check.data:
-                    errors.append({"row": idx + 2, "error": f"Club {row['club_id']} not found"})
-                    invalid_rows += 1
-                    continue
-
-                # Check duplicate in event
-                existing_links = supabase.table("player_events").select("*").eq("event_id", event_lookup[event_name]).execute()
-                duplicate = False
-                for link in existing_links.data:
-                    p = supabase.table("players").select("*").eq("id", link["player_id"]).execute()
-                    if p.data and p.data[0]["name"].strip().lower() == row["name"].lower():
-                        duplicate = True
-                        break
-                if duplicate:
-                    errors.append({"row": idx + 2, "error": f"Player '{row['name']}' already registered in event '{row['event_name']}'"})
-                    invalid_rows += 1
-                    continue
-
-                # Add to batch
-                batch_players.append({
-                    "id": str(uuid.uuid4()),
-                    "name": row["name"],
-                    "age": int(row["age"]),
-                    "phone": row["phone"],
-                    "club_id": row["club_id"],
-                    "event_name": event_name  # store for mapping
-                })
-
-                valid_rows += 1
 
+            # Check duplicate in event
+            event_id = event_lookup[event_name]
+            if event_id not in event_names:
+                event_names[event_id] = _registered_names(supabase, event_id)
+            name_key = (event_id, normalize_name(row["name"]))
+            if name_key in seen_in_file or name_key[1] in event_names[event_id]:
+                errors.append({"row": idx + 2, "error": f"Player '{row['name']}' already registered in event '{row['event_name']}'"})
+                invalid_rows += 1
+                continue
+            seen_in_file.add(name_key)
+
+            likely = player_index.find_duplicates(row["name"], row["phone"])
+            if likely:
+                possible_duplicates.append({"row": idx + 2, "name": row["name"], "matches": likely})
+
+            # Add to batch
+            batch_players.append({
+                "id": str(uuid.uuid4()),
+                "name": row["name"],
+                "age": int(row["age"]),
+                "phone": row["phone"],
+                "club_id": row["club_id"],
+                "event_name": event_name  # store for mapping
+            })
+
+            valid_rows += 1
+
+        except Exception as e:
+            errors.append({"row": idx + 2, "error": str(e)})
+            invalid_rows += 1
+
+    # Insert all players first
+    if batch_players:
+        player_insert_data = [
+            {k: v for k, v in p.items() if k != "event_name"} for p in batch_players
+        ]
+        result = supabase.table("players").insert(player_insert_data).execute()
+        inserted_count = len(result.data)
+        player_index.add(result.data)
+
+        # Now insert player-event links
+        linked = {}
+        for p in batch_players:
+            try:
+                supabase.table("player_events").insert({
+                    "player_id": p["id"],
+                    "event_id": event_lookup[p["event_name"]]
+                }).execute()
+                linked.setdefault(event_lookup[p["event_name"]], []).append(p["id"])
             except Exception as e:
-                errors.append({"row": idx + 2, "error": str(e)})
+                errors.append({"player": p["name"], "error": str(e)})
                 invalid_rows += 1
 
-        # Insert all players first
-        if batch_players:
-            player_insert_data = [
-                {k: v for k, v in p.items() if k != "event_name"} for p in batch_players
-            ]
-            result = supabase.table("players").insert(player_insert_data).execute()
-            inserted_count = len(result.data)
-
-            # Now insert player-event links
-            for p in batch_players:
-                try:
-                    supabase.table("player_events").insert({
-                        "player_id": p["id"],
-                        "event_id": event_lookup[p["event_name"]]
-                    }).execute()
-                except Exception as e:
-                    errors.append({"player": p["name"], "error": str(e)})
-                    invalid_rows += 1
-
-        return CSVUploadResponse(
-            total_rows=total_rows,
-            valid_rows=valid_rows,
-            invalid_rows=invalid_rows,
-            inserted_count=inserted_count,
-            errors=errors
-        )
+        for event_id, player_ids in linked.items():
+            record_changes(supabase, event_id, "player", player_ids)
 
+    if batch_players:
+        publish_invalidation("players", local=False)
+
+    return CSVUploadResponse(
+        total_rows=total_rows,
+        valid_rows=valid_rows,
+        invalid_rows=invalid_rows,
+        inserted_count=inserted_count,
+        errors=errors,
+        possible_duplicates=possible_duplicates
+    )
+
+
+@router.post("/players/upload-csv", response_model=CSVUploadResponse)
+def upload_csv(file: UploadFile = File(...), run_async: bool = Query(False, alias="async")):
+    get_supabase()
+
+    if not file.filename.endswith(".csv"):
+        raise HTTPException(status_code=400, detail="File must be CSV format")
+
+    try:
+        # Sync route: the import runs in the threadpool, off the event loop
+        content = file.file.read()
+        if run_async:
+            job = job_runner.submit("import_players_csv", import_players_csv, content)
+            return JSONResponse(status_code=202, content=job)
+        return import_players_csv(content)
+
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
@@ -1,13 +1,84 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from fastapi.responses import JSONResponse
+from postgrest.exceptions import APIError
+from typing import List, Optional
+import csv
+import json
 import uuid
-from app.models import ScoreCreate
-from app.utils.database import get_supabase
+from datetime import datetime
+from io import StringIO
+from app.models import ScoreCreate, ResultsImportResponse
+from app.services.archive import table_for
+from app.services.bracket import generate_knockout_fixtures
+from app.services.changes import fetch_in_chunks, record_changes
+from app.services.jobs import job_runner
+from app.services.progression import advance_bracket
+from app.services.round_robin import apply_result, empty_standing, qualifiers, rank_group
+from app.utils.database import fetch_all, get_supabase, insert_in_batches, upsert_in_batches
+from app.utils.invalidation import publish_invalidation
+from app.utils.resilience import http_error
 
 router = APIRouter()
 
+UNIQUE_VIOLATION = "23505"
+
+def record_group_results(supabase, event_id: str, results: List[tuple]):
+    """
+    Adds (match, old_score, player1_score, player2_score) results of one
+    event to the group standings (replacing the previous result on a
+    corrected score) as deltas applied in the database, so concurrent
+    results never overwrite each other. Then starts the knockout stage of
+    a "groups" event once every group match is done.
+    """
+    deltas = {}
+    for match, old_score, player1_score, player2_score in results:
+        row1, row2 = (
+            deltas.setdefault(pid, empty_standing(event_id, match['group_number'], pid))
+            for pid in (match['player1_id'], match['player2_id'])
+        )
+        if old_score:
+            apply_result(row1, row2, old_score['player1_score'], old_score['player2_score'], sign=-1)
+        apply_result(row1, row2, player1_score, player2_score)
+    supabase.rpc("apply_group_results", {
+        "p_event_id": event_id,
+        "p_rows": [{k: v for k, v in row.items() if k not in ("event_id", "points")} for row in deltas.values()]
+    }).execute()
+    record_changes(supabase, event_id, "standing", list(deltas))
+
+    event_res = supabase.table("events").select("type, advance_per_group").eq("id", event_id).execute()
+    if not event_res.data or event_res.data[0]['type'] != "groups":
+        return
+
+    open_group_matches = supabase.table("matches").select("id").eq("event_id", event_id).not_.is_("group_number", "null").neq("status", "completed").limit(1).execute()
+    knockout_started = supabase.table("matches").select("id").eq("event_id", event_id).is_("group_number", "null").limit(1).execute()
+    if open_group_matches.data or knockout_started.data:
+        return
+
+    standings = fetch_all(lambda: supabase.table("group_standings").select("*").eq("event_id", event_id), key="player_id")
+    advancing = qualifiers(standings, event_res.data[0].get('advance_per_group') or 2)
+    if len(advancing) < 2:
+        return
+
+    last_round = supabase.table("matches").select("round").eq("event_id", event_id).order("round", desc=True).limit(1).execute()
+    first_round = last_round.data[0]['round'] + 1
+
+    # Groups stand in for clubs, so group mates start in opposite halves
+    knockout = generate_knockout_fixtures(advancing, event_id, first_round)
+    try:
+        supabase.table("matches").insert(knockout).execute()
+    except APIError as e:
+        # Another result finished the group stage at the same time and won
+        if e.code == UNIQUE_VIOLATION:
+            return
+        raise
+    record_changes(supabase, event_id, "match", (m['id'] for m in knockout))
+
+
+def record_group_result(supabase, match: dict, old_score, player1_score: int, player2_score: int):
+    record_group_results(supabase, match['event_id'], [(match, old_score, player1_score, player2_score)])
+
 @router.post("/update-score")
-async def update_score(score: ScoreCreate):
+def update_score(score: ScoreCreate):
     supabase = get_supabase()
     
     try:
@@ -20,7 +91,8 @@ async def update_score(score: ScoreCreate):
         score_data = {
             "match_id": str(score.match_id),
             "player1_score": score.player1_score,
-            "player2_score": score.player2_score
+            "player2_score": score.player2_score,
+            "updated_at": datetime.utcnow().isoformat()
         }
         
         existing_score = supabase.table("scores").select("*").eq("match_id", str(score.match_id)).execute()
@@ -33,47 +105,35 @@ async def update_score(score: ScoreCreate):
         winner_id = match['player1_id'] if score.player1_score > score.player2_score else match['player2_id']
         
         supabase.table("matches").update({"status": "completed"}).eq("id", str(score.match_id)).execute()
+        record_changes(supabase, match['event_id'], ("score", "match"), [match['id']])
         
-        # Handle next round matches
-        next_round = match['round'] + 1
-        next_round_matches = supabase.table("matches").select("*").eq("event_id", match['event_id']).eq("round", next_round).execute()
-        
-        if not next_round_matches.data:
-            total_completed = supabase.table("matches").select("*").eq("event_id", match['event_id']).eq("round", match['round']).eq("status", "completed").execute()
-            
-            if total_completed.data:
-                winners = []
-                for completed_match in total_completed.data:
-                    match_score = supabase.table("scores").select("*").eq("match_id", completed_match['id']).execute()
-                    if match_score.data:
-                        sc = match_score.data[0]
-                        w_id = completed_match['player1_id'] if sc['player1_score'] > sc['player2_score'] else completed_match['player2_id']
-                        winners.append(w_id)
-                
-                bye_winners = supabase.table("matches").select("*").eq("event_id", match['event_id']).eq("round", match['round']).eq("status", "bye").execute()
-                for bye_match in bye_winners.data:
-                    winners.append(bye_match['player1_id'])
-                
-                if len(winners) > 1:
-                    next_matches = []
-                    for i in range(0, len(winners), 2):
-                        if i + 1 < len(winners):
-                            next_match = {
-                                "id": str(uuid.uuid4()),
-                                "event_id": match['event_id'],
-                                "round": next_round,
-                                "player1_id": winners[i],
-                                "player2_id": winners[i + 1],
-                                "status": "pending",
-                                "court_id": None,
-                                "start_time": None,
-                                "end_time": None
-                            }
-                            next_matches.append(next_match)
-                    
-                    if next_matches:
-                        supabase.table("matches").insert(next_matches).execute()
-        
+        if match.get('group_number') is not None:
+            record_group_result(supabase, match, existing_score.data[0] if existing_score.data else None, score.player1_score, score.player2_score)
+        else:
+            # Handle next round matches: the winner meets the winner of the
+            # sibling slot once both are decided, as in a results import
+            position = match.get('bracket_position')
+            columns = "id, round, bracket_position, player1_id, player2_id, status"
+            round_matches = supabase.table("matches").select(columns).eq("event_id", match['event_id']).eq("round", match['round']).is_("group_number", "null")
+            next_round_matches = supabase.table("matches").select(columns).eq("event_id", match['event_id']).eq("round", match['round'] + 1).is_("group_number", "null")
+            if position is not None:
+                round_matches = round_matches.in_("bracket_position", [position - position % 2, position - position % 2 + 1])
+                next_round_matches = next_round_matches.eq("bracket_position", position // 2)
+            bracket = round_matches.execute().data + next_round_matches.execute().data
+            scores = supabase.table("scores").select("match_id, player1_score, player2_score").in_("match_id", [m['id'] for m in bracket]).execute()
+
+            next_matches = advance_bracket(match['event_id'], bracket, {sc['match_id']: sc for sc in scores.data}, match['round'])
+            if next_matches:
+                try:
+                    supabase.table("matches").insert(next_matches).execute()
+                    record_changes(supabase, match['event_id'], "match", (m['id'] for m in next_matches))
+                except APIError as e:
+                    # A concurrent result already created the slot
+                    if e.code != UNIQUE_VIOLATION:
+                        raise
+
+        publish_invalidation("scores", "venue_board")
+
         return {
             "message": "Score updated successfully",
             "winner_id": winner_id,
@@ -83,30 +143,293 @@ async def update_score(score: ScoreCreate):
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
+
+RESULT_CHUNK_SIZE = 200
+
+
+def _read_results_sheet(content: bytes, fmt: str) -> List[tuple]:
+    """(row number, row) pairs; CSV rows are numbered by file line, JSON items from 1."""
+    for enc in ["utf-8-sig", "utf-8", "latin1"]:
+        try:
+            text = content.decode(enc)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise HTTPException(status_code=400, detail="Cannot decode results file. Please save as UTF-8.")
+
+    if fmt == "json":
+        try:
+            data = json.loads(text)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Results file is not valid JSON")
+        if isinstance(data, dict):
+            data = data.get("results")
+        if not isinstance(data, list):
+            raise HTTPException(status_code=400, detail="JSON results must be a list or {\"results\": [...]}")
+        return [(idx + 1, row if isinstance(row, dict) else {}) for idx, row in enumerate(data)]
+
+    reader = csv.DictReader(StringIO(text))
+    fieldnames = reader.fieldnames or []
+    for col in ["player1_score", "player2_score"]:
+        if col not in fieldnames:
+            raise HTTPException(status_code=400, detail=f"Missing required column: {col}")
+    if "match_id" not in fieldnames and "match_code" not in fieldnames:
+        raise HTTPException(status_code=400, detail="Missing required column: match_id or match_code")
+    return [(idx + 2, row) for idx, row in enumerate(reader)]
+
+
+def import_results(content: bytes, fmt: str, event_id: Optional[str] = None, progress=None) -> ResultsImportResponse:
+    """
+    Validates a results sheet against matches and match codes in one batch,
+    writes every valid score in bulk, then advances each affected event's
+    bracket once in round order with a single insert of the new matches.
+    Runs inline or as a background job; `progress(done, total)` follows
+    the stages.
+    """
+    supabase = get_supabase()
+    report = progress or (lambda done, total: None)
+    rows = _read_results_sheet(content, fmt)
+
+    errors = []
+    # (row number, match id or None, code or None, player1 score, player2 score)
+    parsed = []
+    for row_no, row in rows:
+        row = {k: (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+        match_id = str(row.get("match_id") or "") or None
+        code = str(row.get("match_code") or "").upper() or None
+        if not match_id and not code:
+            errors.append({"row": row_no, "error": "match_id or match_code is required"})
+            continue
+        try:
+            player1_score = int(row.get("player1_score"))
+            player2_score = int(row.get("player2_score"))
+        except (TypeError, ValueError):
+            errors.append({"row": row_no, "error": "Scores must be whole numbers"})
+            continue
+        if player1_score < 0 or player2_score < 0:
+            errors.append({"row": row_no, "error": "Scores cannot be negative"})
+            continue
+        if player1_score == player2_score:
+            errors.append({"row": row_no, "error": "Scores cannot be tied"})
+            continue
+        if match_id:
+            try:
+                match_id = str(uuid.UUID(match_id))
+            except ValueError:
+                errors.append({"row": row_no, "error": f"Invalid match_id '{match_id}'"})
+                continue
+        parsed.append((row_no, match_id, code, player1_score, player2_score))
+    report(1, 4)
+
+    # Validate every row against matches and match codes in one batch
+    codes = list({code for _, _, code, _, _ in parsed if code})
+    code_rows = fetch_in_chunks(lambda: supabase.table("match_codes").select("match_id, code"), "code", codes, RESULT_CHUNK_SIZE)
+    code_matches = {}
+    for code_row in code_rows:
+        code_matches.setdefault(code_row['code'], []).append(code_row['match_id'])
+
+    candidate_ids = {match_id for _, match_id, _, _, _ in parsed if match_id}
+    candidate_ids.update(match_id for ids in code_matches.values() for match_id in ids)
+    matches = {m['id']: m for m in fetch_in_chunks(
+        lambda: supabase.table("matches").select("*"), "id", list(candidate_ids), RESULT_CHUNK_SIZE
+    )}
+    if event_id:
+        matches = {mid: m for mid, m in matches.items() if m['event_id'] == event_id}
+
+    accepted = []
+    seen = set()
+    for row_no, match_id, code, player1_score, player2_score in parsed:
+        if code:
+            by_code = [mid for mid in code_matches.get(code, []) if mid in matches]
+            if match_id and match_id not in by_code:
+                errors.append({"row": row_no, "error": "Invalid match code"})
+                continue
+            if not match_id:
+                if not by_code:
+                    errors.append({"row": row_no, "error": f"Match code {code} not found"})
+                    continue
+                if len(by_code) > 1:
+                    errors.append({"row": row_no, "error": f"Match code {code} is used by several matches; pass event_id"})
+                    continue
+                match_id = by_code[0]
+
+        match = matches.get(match_id)
+        if not match:
+            errors.append({"row": row_no, "error": "Match not found"})
+            continue
+        if match['status'] == "bye" or not match.get('player2_id'):
+            errors.append({"row": row_no, "error": "Byes take no score"})
+            continue
+        if match_id in seen:
+            errors.append({"row": row_no, "error": "Match appears more than once in the file"})
+            continue
+        seen.add(match_id)
+        accepted.append((row_no, match, player1_score, player2_score))
+
+    # A knockout result already carried into its next-round slot cannot
+    # change: the bracket walk skips slots that exist
+    rescored = [match for _, match, _, _ in accepted if match['status'] == "completed" and match.get('group_number') is None]
+    if rescored:
+        later = supabase.table("matches") \
+            .select("event_id, round, bracket_position") \
+            .in_("event_id", list({m['event_id'] for m in rescored})) \
+            .in_("round", list({m['round'] + 1 for m in rescored})) \
+            .is_("group_number", "null") \
+            .execute()
+        later_rounds = {(m['event_id'], m['round'] - 1) for m in later.data}
+        later_slots = {(m['event_id'], m['round'] - 1, m['bracket_position']) for m in later.data}
+        advanced = {
+            m['id'] for m in rescored
+            if ((m['event_id'], m['round'], m['bracket_position'] // 2) in later_slots
+                if m.get('bracket_position') is not None
+                else (m['event_id'], m['round']) in later_rounds)
+        }
+        for row_no, match, _, _ in accepted:
+            if match['id'] in advanced:
+                errors.append({"row": row_no, "error": "Match already completed and advanced"})
+        accepted = [entry for entry in accepted if entry[1]['id'] not in advanced]
+    accepted = [(match, p1, p2) for _, match, p1, p2 in accepted]
+    report(2, 4)
+
+    created = []
+    if accepted:
+        match_ids = [match['id'] for match, _, _ in accepted]
+        old_scores = {sc['match_id']: sc for sc in fetch_in_chunks(
+            lambda: supabase.table("scores").select("*"), "match_id", match_ids, RESULT_CHUNK_SIZE
+        )}
+
+        now = datetime.utcnow().isoformat()
+        upsert_in_batches(supabase, "scores", [
+            {"match_id": match['id'], "player1_score": p1, "player2_score": p2, "updated_at": now}
+            for match, p1, p2 in accepted
+        ])
+        for start in range(0, len(match_ids), RESULT_CHUNK_SIZE):
+            supabase.table("matches").update({"status": "completed"}).in_("id", match_ids[start:start + RESULT_CHUNK_SIZE]).execute()
+        report(3, 4)
+
+        by_event = {}
+        for match, p1, p2 in accepted:
+            by_event.setdefault(match['event_id'], []).append((match, old_scores.get(match['id']), p1, p2))
+
+        for ev_id, results in by_event.items():
+            ev_match_ids = [match['id'] for match, *_ in results]
+            record_changes(supabase, ev_id, ("score", "match"), ev_match_ids)
+
+            group_results = [r for r in results if r[0].get('group_number') is not None]
+            if group_results:
+                record_group_results(supabase, ev_id, group_results)
+
+            knockout_rounds = [r[0]['round'] for r in results if r[0].get('group_number') is None]
+            if knockout_rounds:
+                from_round = min(knockout_rounds)
+                bracket = fetch_all(lambda: supabase.table("matches")
+                    .select("id, round, bracket_position, player1_id, player2_id, status")
+                    .eq("event_id", ev_id)
+                    .is_("group_number", "null")
+                    .gte("round", from_round))
+                scores = fetch_all(lambda: supabase.table("scores")
+                    .select("match_id, player1_score, player2_score, matches!inner(event_id, round)")
+                    .eq("matches.event_id", ev_id)
+                    .gte("matches.round", from_round), key="match_id")
+                created.extend(advance_bracket(ev_id, bracket, {sc['match_id']: sc for sc in scores}, from_round))
+
+        # Every next round of the sheet in one insert
+        if created:
+            try:
+                insert_in_batches(supabase, "matches", created)
+            except APIError as e:
+                if e.code != UNIQUE_VIOLATION:
+                    raise
+                # A concurrent result created one of these rounds; keep the others
+                kept = []
+                for ev_id in {m['event_id'] for m in created}:
+                    rounds = [m for m in created if m['event_id'] == ev_id]
+                    try:
+                        insert_in_batches(supabase, "matches", rounds)
+                        kept.extend(rounds)
+                    except APIError as e:
+                        if e.code != UNIQUE_VIOLATION:
+                            raise
+                created = kept
+            new_by_event = {}
+            for m in created:
+                new_by_event.setdefault(m['event_id'], []).append(m['id'])
+            for ev_id, ids in new_by_event.items():
+                record_changes(supabase, ev_id, "match", ids)
+
+        publish_invalidation("scores", "venue_board")
+    report(4, 4)
+
+    errors.sort(key=lambda e: e["row"])
+    return ResultsImportResponse(
+        total_rows=len(rows),
+        valid_rows=len(accepted),
+        invalid_rows=len(rows) - len(accepted),
+        updated_count=len(accepted),
+        created_matches=len(created),
+        errors=errors
+    )
+
+
+@router.post("/results/import", response_model=ResultsImportResponse)
+def import_results_sheet(
+    file: UploadFile = File(...),
+    event_id: Optional[str] = Query(None),
+    run_async: bool = Query(False, alias="async")
+):
+    """
+    Scores from a results sheet (CSV or JSON) keyed by match_id or
+    match_code, with player1_score and player2_score. Invalid rows are
+    reported per row and skipped; event_id restricts (and disambiguates)
+    match codes to one event.
+    """
+    get_supabase()
+
+    fmt = file.filename.rsplit(".", 1)[-1].lower() if file.filename and "." in file.filename else ""
+    if fmt not in ("csv", "json"):
+        raise HTTPException(status_code=400, detail="File must be CSV or JSON format")
+
+    try:
+        # Sync route: the import runs in the threadpool, off the event loop
+        content = file.file.read()
+        if run_async:
+            job = job_runner.submit("import_results", import_results, content, fmt, event_id)
+            return JSONResponse(status_code=202, content=job)
+        return import_results(content, fmt, event_id)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise http_error(e)
 
 @router.get("/leaderboard")
-async def get_latest_leaderboard():
+def get_latest_leaderboard():
     """
-    Returns the leaderboard for the latest event automatically.
+    Returns the leaderboard for the latest event automatically: the newest
+    event still being played, or the newest archived one once all are.
     """
     supabase = get_supabase()
     
     try:
         # Fetch latest event
-        events_res = supabase.table("events").select("*").order("created_at", desc=True).limit(1).execute()
+        events_res = supabase.table("events").select("*").is_("archived_at", "null").order("created_at", desc=True).limit(1).execute()
+        if not events_res.data:
+            events_res = supabase.table("events").select("*").order("created_at", desc=True).limit(1).execute()
         if not events_res.data:
             raise HTTPException(status_code=404, detail="No events found")
         latest_event = events_res.data[0]
 
         event_id = latest_event["id"]
+        archived = bool(latest_event.get("archived_at"))
 
-        matches = supabase.table("matches").select("*").eq("event_id", event_id).eq("status", "completed").execute()
+        matches = supabase.table(table_for("matches", archived)).select("*").eq("event_id", event_id).eq("status", "completed").execute()
         
         player_stats = {}
         
         for match in matches.data:
-            score_data = supabase.table("scores").select("*").eq("match_id", match['id']).execute()
+            score_data = supabase.table(table_for("scores", archived)).select("*").eq("match_id", match['id']).execute()
             
             if score_data.data:
                 score = score_data.data[0]
@@ -157,4 +480,37 @@ async def get_latest_leaderboard():
         }
     
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
+
+@router.get("/standings/{event_id}")
+def get_group_standings(event_id: str):
+    """
+    Group tables of a round-robin or group-stage event, ranked by wins,
+    then set difference, then sets won.
+    """
+    supabase = get_supabase()
+
+    try:
+        rows = fetch_all(lambda: supabase.table("group_standings").select("*").eq("event_id", event_id), key="player_id")
+        if not rows:
+            raise HTTPException(status_code=404, detail="No group standings for this event")
+
+        names = {}
+        player_ids = [row['player_id'] for row in rows]
+        for start in range(0, len(player_ids), 200):
+            players_res = supabase.table("players").select("id, name").in_("id", player_ids[start:start + 200]).execute()
+            names.update({p['id']: p['name'] for p in players_res.data})
+
+        groups = {}
+        for row in rows:
+            groups.setdefault(row['group_number'], []).append({**row, "player_name": names.get(row['player_id'], "Unknown")})
+
+        return {
+            "event_id": event_id,
+            "groups": {g: rank_group(groups[g]) for g in sorted(groups)}
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise http_error(e)
@@ -1,13 +1,25 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import JSONResponse
 from datetime import datetime, timedelta
 from typing import List
-from app.models import ScheduleRequest
-from app.utils.database import get_supabase
+from app.models import ScheduleRequest, ScheduleSimulationRequest
+from app.services.changes import record_changes
+from app.services.jobs import job_runner
+from app.services.simulation import build_draw, sweep
+from app.utils.database import fetch_all, get_supabase, insert_in_batches
+from app.utils.invalidation import publish_invalidation
+from app.utils.negotiation import negotiated_response
+from app.utils.resilience import http_error
+import heapq
 import secrets
 import string
+import time
 
 router = APIRouter()
 
+# Matches x scenarios simulated per option; each cell costs a few floats
+SIMULATION_MAX_CELLS = 5_000_000
+
 
 def generate_match_code(length=6):
     characters = string.ascii_uppercase + string.digits
@@ -22,8 +34,13 @@ def schedule_matches_smart(matches, num_courts, match_duration_minutes, min_rest
       - Optimal court utilization
     Skips BYE matches.
     """
-    # Court availability
-    courts = {f"Court-{i+1}": start_time for i in range(num_courts)}
+    # Court availability as a heap of (free_at, court_index). A match waits
+    # for max(court free, players rested) and the rest wait is the same on
+    # every court, so the earliest-free court (lowest index on ties) is
+    # always the best one: O(log C) per match instead of sorting the courts.
+    courts = [(start_time, i) for i in range(num_courts)]
+    rest = timedelta(minutes=min_rest_minutes)
+    duration = timedelta(minutes=match_duration_minutes)
     player_schedule = {}  # player_id -> last match end time
     scheduled_matches = []
 
@@ -37,26 +54,17 @@ def schedule_matches_smart(matches, num_courts, match_duration_minutes, min_rest
         player1_id = match['player1_id']
         player2_id = match.get('player2_id')
 
-        earliest_time = None
-        assigned_court = None
-
-        # Find earliest available court for both players
-        for court_id, court_available_time in sorted(courts.items(), key=lambda x: x[1]):
-            potential_start = court_available_time
-            if player1_id in player_schedule:
-                potential_start = max(potential_start, player_schedule[player1_id] + timedelta(minutes=min_rest_minutes))
-            if player2_id and player2_id in player_schedule:
-                potential_start = max(potential_start, player_schedule[player2_id] + timedelta(minutes=min_rest_minutes))
-
-            if earliest_time is None or potential_start < earliest_time:
-                earliest_time = potential_start
-                assigned_court = court_id
-
-        match_start = earliest_time
-        match_end = match_start + timedelta(minutes=match_duration_minutes)
+        court_available_time, court_index = heapq.heappop(courts)
+        match_start = court_available_time
+        if player1_id in player_schedule:
+            match_start = max(match_start, player_schedule[player1_id] + rest)
+        if player2_id and player2_id in player_schedule:
+            match_start = max(match_start, player_schedule[player2_id] + rest)
+        match_end = match_start + duration
 
         # Update court and player schedules
-        courts[assigned_court] = match_end
+        heapq.heappush(courts, (match_end, court_index))
+        assigned_court = f"Court-{court_index + 1}"
         player_schedule[player1_id] = match_end
         if player2_id:
             player_schedule[player2_id] = match_end
@@ -71,121 +79,163 @@ def schedule_matches_smart(matches, num_courts, match_duration_minutes, min_rest
     return scheduled_matches
 
 
+def run_schedule(request: ScheduleRequest, progress=None) -> dict:
+    """
+    Schedules an event's unscheduled pending matches and assigns codes.
+    Runs inline or as a background job; `progress(done, total)` follows
+    the per-match updates.
+    """
+    supabase = get_supabase()
+    report = progress or (lambda done, total: None)
+
+    # Fetch event
+    event_res = supabase.table("events").select("*").eq("id", str(request.event_id)).execute()
+    if not event_res.data:
+        raise HTTPException(status_code=404, detail="Event not found")
+    event = event_res.data[0]
+    min_rest = event.get('min_rest', 10)  # default 10 minutes
+
+    # Fetch pending matches with player names and existing codes
+    # Paged: a group stage can have more pending matches than one page
+    matches = fetch_all(lambda: supabase.table("match_details")
+                        .select("*")
+                        .eq("event_id", str(request.event_id))
+                        .eq("status", "pending"))
+    if not matches:
+        raise HTTPException(status_code=404, detail="No pending matches found")
+
+    # Only unscheduled matches
+    unscheduled_matches = [m for m in matches if not m.get('court_id') or not m.get('start_time')]
+    scheduled_matches = schedule_matches_smart(
+        unscheduled_matches,
+        request.num_courts,
+        request.match_duration_minutes,
+        min_rest,
+        request.start_time or datetime.utcnow()
+    )
+
+    # Update DB & assign match codes
+    new_codes = []
+    for done, match in enumerate(scheduled_matches):
+        supabase.table("matches").update({
+            "court_id": match['court_id'],
+            "start_time": match['start_time'],
+            "end_time": match['end_time']
+        }).eq("id", match['id']).execute()
+
+        if not match.get('match_code'):
+            code = generate_match_code()
+            new_codes.append({
+                "match_id": match['id'],
+                "code": code,
+                "assigned_umpire": "Not Assigned",
+                "expires_at": (datetime.utcnow() + timedelta(hours=24)).isoformat()
+            })
+            match['match_code'] = code
+
+        report(done + 1, len(scheduled_matches))
+
+    if new_codes:
+        insert_in_batches(supabase, "match_codes", new_codes)
+
+    record_changes(supabase, request.event_id, "match", (m['id'] for m in scheduled_matches))
+    publish_invalidation("venue_board")
+
+    # schedule_matches_smart fills in court and times on the fetched rows,
+    # and names come embedded, so the response is built from them directly
+    return {
+        "event_id": str(event['id']),
+        "event_name": event['name'],
+        "total_matches": len(matches),
+        "scheduled_matches": [m for m in matches if m['status'] == 'pending']
+    }
+
+
 @router.post("/schedule-matches")
-async def create_schedule(request: ScheduleRequest):
+def create_schedule(request: ScheduleRequest, run_async: bool = Query(False, alias="async"), accept: str = Header("")):
+    get_supabase()
+    try:
+        if run_async:
+            job = job_runner.submit("schedule_matches", run_schedule, request)
+            return JSONResponse(status_code=202, content=job)
+        return negotiated_response(run_schedule(request), accept)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise http_error(e)
+
+
+@router.post("/simulate-schedule")
+def simulate_schedule(request: ScheduleSimulationRequest):
+    """
+    Dry run of the event's whole draw for every court count / match duration
+    combination. Reads the bracket only; nothing is written.
+    """
     supabase = get_supabase()
     try:
-        # Fetch event
         event_res = supabase.table("events").select("*").eq("id", str(request.event_id)).execute()
         if not event_res.data:
             raise HTTPException(status_code=404, detail="Event not found")
         event = event_res.data[0]
-        min_rest = event.get('min_rest', 10)  # default 10 minutes
-
-        # Fetch pending matches
-        matches_res = supabase.table("matches") \
-            .select("*") \
-            .eq("event_id", str(request.event_id)) \
-            .eq("status", "pending") \
-            .execute()
-        matches = matches_res.data
-        if not matches:
-            raise HTTPException(status_code=404, detail="No pending matches found")
-
-        # Fetch player names
-        player_ids = set()
-        for m in matches:
-            player_ids.add(m['player1_id'])
-            if m.get('player2_id'):
-                player_ids.add(m['player2_id'])
-        players_res = supabase.table("players").select("*").in_("id", list(player_ids)).execute()
-        players_lookup = {p['id']: p['name'] for p in players_res.data}
-
-        # Only unscheduled matches
-        unscheduled_matches = [m for m in matches if not m.get('court_id') or not m.get('start_time')]
-        scheduled_matches = schedule_matches_smart(
-            unscheduled_matches,
-            request.num_courts,
-            request.match_duration_minutes,
+        if (event.get('type') or "knockout") != "knockout":
+            raise HTTPException(status_code=400, detail="Simulation is only available for knockout events")
+        min_rest = event.get('min_rest', 10)
+
+        matches = fetch_all(lambda: supabase.table("matches")
+            .select("id, round, bracket_position, status")
+            .eq("event_id", str(request.event_id)))
+        draw = build_draw(matches)
+        if not draw:
+            raise HTTPException(status_code=404, detail="No fixtures found for event")
+        if len(draw) * request.scenarios > SIMULATION_MAX_CELLS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many scenarios for a {len(draw)}-match draw; use at most {SIMULATION_MAX_CELLS // len(draw)}"
+            )
+
+        started = time.perf_counter()
+        results = sweep(
+            draw,
+            request.court_options,
+            request.duration_options,
             min_rest,
-            request.start_time or datetime.utcnow()
+            request.scenarios,
+            request.duration_variance,
+            request.seed
         )
 
-        # Update DB & assign match codes
-        for match in scheduled_matches:
-            supabase.table("matches").update({
-                "court_id": match['court_id'],
-                "start_time": match['start_time'],
-                "end_time": match['end_time']
-            }).eq("id", match['id']).execute()
-
-            code_res = supabase.table("match_codes").select("*").eq("match_id", match['id']).execute()
-            if code_res.data:
-                match['match_code'] = code_res.data[0]['code']
-            else:
-                code = generate_match_code()
-                supabase.table("match_codes").insert({
-                    "match_id": match['id'],
-                    "code": code,
-                    "assigned_umpire": "Not Assigned",
-                    "expires_at": (datetime.utcnow() + timedelta(hours=24)).isoformat()
-                }).execute()
-                match['match_code'] = code
-
-        # Attach player names and match codes to all pending matches
-        for m in matches:
-            if m['status'] != 'pending':
-                continue
-            m['player1_name'] = players_lookup.get(m['player1_id'])
-            m['player2_name'] = players_lookup.get(m.get('player2_id'))
-            scheduled = next((s for s in scheduled_matches if s['id'] == m['id']), None)
-            if scheduled:
-                m['court_id'] = scheduled['court_id']
-                m['start_time'] = scheduled['start_time']
-                m['end_time'] = scheduled['end_time']
-                m['match_code'] = scheduled['match_code']
-
         return {
             "event_id": str(event['id']),
             "event_name": event['name'],
-            "total_matches": len(matches),
-            "scheduled_matches": [m for m in matches if m['status'] == 'pending']
+            "scenarios_per_option": request.scenarios,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            "results": results
         }
 
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
 
 
 @router.get("/schedule/{court_id}")
-async def get_court_schedule(court_id: str, event_id: str = None):
+def get_court_schedule(court_id: str, event_id: str = None, include_archived: bool = Query(False)):
+    """
+    Matches on a court in start time order. Archived events are left out
+    unless include_archived is set.
+    """
     supabase = get_supabase()
     try:
-        query = supabase.table("matches").select("*").eq("court_id", court_id)
-        if event_id:
-            query = query.eq("event_id", event_id)
-        response = query.order("start_time").execute()
-        matches = [m for m in response.data if m['status'] != 'bye']
-
-        # Fetch player names
-        player_ids = set()
-        for m in matches:
-            player_ids.add(m['player1_id'])
-            if m.get('player2_id'):
-                player_ids.add(m['player2_id'])
-        players_res = supabase.table("players").select("*").in_("id", list(player_ids)).execute()
-        players_lookup = {p['id']: p['name'] for p in players_res.data}
-
-        # Fetch match codes
-        match_ids = [m['id'] for m in matches]
-        codes_res = supabase.table("match_codes").select("*").in_("match_id", match_ids).execute()
-        codes_lookup = {c['match_id']: c['code'] for c in codes_res.data}
-
-        for m in matches:
-            m['player1_name'] = players_lookup.get(m['player1_id'])
-            m['player2_name'] = players_lookup.get(m.get('player2_id'))
-            m['match_code'] = codes_lookup.get(m['id'])
+        tables = ["match_details", "match_details_archive"] if include_archived else ["match_details"]
+        matches = []
+        for table in tables:
+            query = supabase.table(table).select("*").eq("court_id", court_id).neq("status", "bye")
+            if event_id:
+                query = query.eq("event_id", event_id)
+            matches.extend(query.order("start_time").execute().data)
+        if include_archived:
+            matches.sort(key=lambda m: (m['start_time'] is None, m['start_time'] or ""))
 
         return {
             "court_id": court_id,
@@ -193,4 +243,4 @@ async def get_court_schedule(court_id: str, event_id: str = None):
         }
 
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
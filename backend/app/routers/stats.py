@@ -0,0 +1,130 @@
+from fastapi import APIRouter, Query
+from typing import List, Optional
+from datetime import date, timedelta
+from app.services.archive import table_for
+from app.services.stats import build_season_stats, player_records, club_records, head_to_head
+from app.utils.cache import VersionedCache
+from app.utils.database import get_supabase, fetch_all
+from app.utils.invalidation import invalidation_bus
+from app.utils.resilience import http_error, reads_were_stale
+
+router = APIRouter()
+
+# Season stats keyed by event filter, valid until the next score change.
+# Writes and deletes made by the app ("scores" on the bus) clear it; the
+# version catches score edits made directly in the database.
+_stats_cache = VersionedCache(maxsize=32)
+invalidation_bus.subscribe("scores", lambda key: _stats_cache.clear())
+
+
+def _score_version(supabase):
+    """Latest score change; one row off the updated_at index."""
+    res = supabase.table("scores").select("updated_at").order("updated_at", desc=True).limit(1).execute()
+    return res.data[0]['updated_at'] if res.data else None
+
+
+def _resolve_event_ids(supabase, event_ids: Optional[List[str]], start_date: Optional[date], end_date: Optional[date]):
+    """None means every event; an empty list means the filter matched nothing."""
+    if not start_date and not end_date:
+        return sorted(event_ids) if event_ids else None
+
+    query = supabase.table("events").select("id")
+    if start_date:
+        query = query.gte("created_at", start_date.isoformat())
+    if end_date:
+        query = query.lt("created_at", (end_date + timedelta(days=1)).isoformat())
+    if event_ids:
+        query = query.in_("id", event_ids)
+    return sorted(e['id'] for e in query.execute().data)
+
+
+def _load_season_stats(supabase, event_ids: Optional[List[str]]):
+    version = _score_version(supabase)
+    key = tuple(event_ids) if event_ids is not None else None
+    stats = _stats_cache.get(key, version)
+    if stats is not None:
+        return stats
+
+    def scored_matches(scores_table, matches_table):
+        def query_factory():
+            query = supabase.table(scores_table).select(
+                f"match_id, player1_score, player2_score, {matches_table}!inner(event_id, player1_id, player2_id, status)"
+            )
+            if event_ids is not None:
+                query = query.in_(f"{matches_table}.event_id", event_ids)
+            return query
+        return query_factory
+
+    # Finished events live in the archive tables; a season spans both
+    matches = []
+    for archived in (False, True):
+        if event_ids == []:
+            break
+        matches_table = table_for("matches", archived)
+        rows = fetch_all(scored_matches(table_for("scores", archived), matches_table), key="match_id")
+        matches.extend(
+            {
+                "match_id": r['match_id'],
+                "event_id": r[matches_table]['event_id'],
+                "player1_id": r[matches_table]['player1_id'],
+                "player2_id": r[matches_table]['player2_id'],
+                "player1_score": r['player1_score'],
+                "player2_score": r['player2_score']
+            }
+            for r in rows
+            if r[matches_table]['status'] == 'completed'
+        )
+    players = fetch_all(lambda: supabase.table("players").select("id, name, club_id"))
+    clubs = fetch_all(lambda: supabase.table("clubs").select("id, name"))
+
+    stats = build_season_stats(matches, players, clubs)
+    if not reads_were_stale():
+        _stats_cache.put(key, version, stats)
+    return stats
+
+
+@router.get("/stats")
+def get_season_stats(
+    event_id: Optional[List[str]] = Query(None),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1)
+):
+    """
+    Player and club records across every event matching the filters.
+    Dates filter on event creation and are inclusive.
+    """
+    supabase = get_supabase()
+    try:
+        event_ids = _resolve_event_ids(supabase, event_id, start_date, end_date)
+        stats = _load_season_stats(supabase, event_ids)
+        return {
+            "event_ids": event_ids,
+            "total_matches": stats.total_matches,
+            "players": player_records(stats, limit),
+            "clubs": club_records(stats)
+        }
+
+    except Exception as e:
+        raise http_error(e)
+
+
+@router.get("/stats/head-to-head/{player_id}")
+def get_head_to_head(
+    player_id: str,
+    opponent_id: Optional[str] = None,
+    event_id: Optional[List[str]] = Query(None),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+):
+    supabase = get_supabase()
+    try:
+        event_ids = _resolve_event_ids(supabase, event_id, start_date, end_date)
+        stats = _load_season_stats(supabase, event_ids)
+        return {
+            "player_id": player_id,
+            "head_to_head": head_to_head(stats, player_id, opponent_id)
+        }
+
+    except Exception as e:
+        raise http_error(e)
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Query
+from datetime import datetime, timezone
+from app.services.venue_board import venue_board
+from app.utils.database import get_supabase, fetch_all
+from app.utils.resilience import http_error, reads_were_stale
+
+router = APIRouter()
+
+# Public signage: the umpire match_code of match_details stays out
+BOARD_COLUMNS = "id, event_id, round, group_number, bracket_position, player1_id, player2_id, player1_name, player2_name, court_id, start_time, end_time, status"
+
+
+def _refresh_venue_board(supabase, at: datetime):
+    window_start, window_end = venue_board.window_for(at)
+    generation = venue_board.generation()
+    matches = fetch_all(lambda: supabase.table("match_details")
+        .select(BOARD_COLUMNS)
+        .eq("status", "pending")
+        .not_.is_("court_id", "null")
+        .gte("start_time", window_start.isoformat())
+        .lt("start_time", window_end.isoformat()))
+
+    venue_board.rebuild(matches, window_start, window_end, generation)
+    if reads_were_stale():
+        # Serve it, but reload on the next request
+        venue_board.invalidate()
+
+
+@router.get("/venue-board")
+def get_venue_board(event_id: str = None, upcoming: int = Query(1, ge=0, le=10)):
+    """
+    Now playing / up next for every court in one lookup, served from the
+    in-memory court index.
+    """
+    supabase = get_supabase()
+    try:
+        now = datetime.now(timezone.utc)
+        if not venue_board.covers(now):
+            _refresh_venue_board(supabase, now)
+
+        return {
+            "generated_at": now.isoformat(),
+            "courts": venue_board.lookup(now, upcoming, event_id)
+        }
+
+    except Exception as e:
+        raise http_error(e)
@@ -0,0 +1,65 @@
+"""
+Hot/cold split of event data.
+
+Events still being played keep their matches, scores, match codes and
+registrations in the hot tables. Once an event has no pending matches it
+can be archived: the archive_event() database function moves those rows
+into the *_archive tables in one transaction and stamps events.archived_at.
+Hot-table queries then only ever scan active events, however many seasons
+have been played.
+
+Read routes that serve history pick the archive tables for archived
+events (TABLES[...][archived]) or add them on request.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+# Finished events are archived this many days after they were created
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "14"))
+
+# hot table -> (hot, archive)
+TABLES = {
+    "matches": ("matches", "matches_archive"),
+    "match_details": ("match_details", "match_details_archive"),
+    "scores": ("scores", "scores_archive"),
+    "match_codes": ("match_codes", "match_codes_archive"),
+    "player_events": ("player_events", "player_events_archive"),
+}
+
+
+def table_for(name: str, archived: bool) -> str:
+    return TABLES[name][archived]
+
+
+def is_archived(supabase, event_id: str) -> bool:
+    res = supabase.table("events").select("archived_at").eq("id", event_id).execute()
+    return bool(res.data and res.data[0].get('archived_at'))
+
+
+def has_pending_matches(supabase, event_id: str) -> bool:
+    res = supabase.table("matches").select("id").eq("event_id", event_id).eq("status", "pending").limit(1).execute()
+    return bool(res.data)
+
+
+def archive_event(supabase, event_id: str) -> dict:
+    """Moves one finished event to the archive; returns the rows moved per table."""
+    return supabase.rpc("archive_event", {"p_event_id": event_id}).execute().data
+
+
+def archivable_event_ids(supabase, min_age_days: int = ARCHIVE_AFTER_DAYS) -> List[str]:
+    """Active events older than `min_age_days` that were played and have nothing pending."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=min_age_days)
+    events = supabase.table("events") \
+        .select("id") \
+        .is_("archived_at", "null") \
+        .lt("created_at", cutoff.isoformat()) \
+        .order("created_at") \
+        .execute()
+
+    event_ids = []
+    for event in events.data:
+        played = supabase.table("matches").select("id").eq("event_id", event['id']).limit(1).execute()
+        if played.data and not has_pending_matches(supabase, event['id']):
+            event_ids.append(event['id'])
+    return event_ids
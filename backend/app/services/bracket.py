@@ -0,0 +1,129 @@
+"""
+Knockout bracket placement.
+
+Players are laid out over a power-of-two bracket so that:
+  - Byes sit opposite the top seed positions, spread evenly over every
+    half, quarter, eighth, ... of the draw
+  - Each club's players are split as evenly as possible between the two
+    halves of every sub-bracket, so club mates meet as late as possible
+
+Placement is O(n log n): every level of the bracket deals its players
+once between its two halves.
+"""
+import random
+import uuid
+from collections import Counter
+from typing import List, Optional
+
+
+def next_power_of_two(n: int) -> int:
+    return 1 if n <= 1 else 1 << (n - 1).bit_length()
+
+
+def seed_order(size: int) -> List[int]:
+    """
+    Standard seeding for a bracket of `size` slots: seed_order(8) is
+    [1, 8, 4, 5, 2, 7, 3, 6], i.e. slot i holds seed order[i].
+    """
+    order = [1]
+    while len(order) < size:
+        total = len(order) * 2 + 1
+        order = [s for seed in order for s in (seed, total - seed)]
+    return order
+
+
+def place_players(players: List[dict]) -> List[Optional[dict]]:
+    """
+    Returns the bracket slots in draw order. Empty slots (None) are byes,
+    and slots 2k / 2k+1 meet in round 1.
+    """
+    n = len(players)
+    size = next_power_of_two(n)
+
+    # Seeds beyond n don't exist, so those slots are byes
+    prefix = [0]
+    for seed in seed_order(size):
+        prefix.append(prefix[-1] + (seed <= n))
+
+    # Keep each club contiguous; dealing alternately from a contiguous run
+    # splits it evenly between halves and keeps both halves contiguous
+    club_groups = {}
+    for player in players:
+        club_groups.setdefault(player.get('club_id'), []).append(player)
+    ordered = [p for group in sorted(club_groups.values(), key=len, reverse=True) for p in group]
+
+    slots: List[Optional[dict]] = [None] * size
+    stack = [(0, size, ordered)]
+    while stack:
+        lo, hi, group = stack.pop()
+        if not group:
+            continue
+        if hi - lo == 1:
+            slots[lo] = group[0]
+            continue
+
+        mid = (lo + hi) // 2
+        left_capacity = prefix[mid] - prefix[lo]
+        right_capacity = prefix[hi] - prefix[mid]
+
+        # Standard bye placement keeps capacities within one of each other,
+        # so the larger side takes the extra player
+        if left_capacity >= right_capacity:
+            left, right = group[0::2], group[1::2]
+        else:
+            left, right = group[1::2], group[0::2]
+
+        stack.append((lo, mid, left))
+        stack.append((mid, hi, right))
+
+    return slots
+
+
+def club_conflicts(slots: List[Optional[dict]]) -> List[int]:
+    """
+    Number of same-club pairs whose earliest possible meeting is each round,
+    i.e. result[0] is the count of round 1 club clashes. Players without a
+    club are ignored.
+    """
+    rounds = len(slots).bit_length() - 1
+    conflicts = []
+    previous = 0
+    for r in range(1, rounds + 1):
+        counts = Counter(
+            (i >> r, p['club_id'])
+            for i, p in enumerate(slots)
+            if p is not None and p.get('club_id') is not None
+        )
+        pairs = sum(c * (c - 1) // 2 for c in counts.values())
+        conflicts.append(pairs - previous)
+        previous = pairs
+    return conflicts
+
+
+def generate_knockout_fixtures(players: List[dict], event_id: str, first_round: int = 1) -> List[dict]:
+    """Opening knockout round, starting at `first_round`, in bracket order."""
+    random.shuffle(players)
+
+    # Spread clubs across the draw and put byes at the seeded positions
+    slots = place_players(players)
+
+    matches = []
+    for position in range(0, len(slots), 2):
+        player1, player2 = slots[position], slots[position + 1]
+        if player1 is None:
+            player1, player2 = player2, None
+
+        matches.append({
+            "id": str(uuid.uuid4()),
+            "event_id": event_id,
+            "round": first_round,
+            "bracket_position": position // 2,
+            "player1_id": player1['id'],
+            "player2_id": player2['id'] if player2 else None,
+            "status": "pending" if player2 else "bye",
+            "court_id": None,
+            "start_time": None,
+            "end_time": None
+        })
+
+    return matches
@@ -0,0 +1,109 @@
+"""
+Per-event change log for delta sync.
+
+Writers append one `event_changes` row per changed entity (a match, its
+score, a group standings row or a registered player). The row's version
+comes from a sequence, so a client that last synced at version N asks for
+entries above N and re-reads only those entities.
+
+Compaction keeps only the newest entry per entity. A client at any version
+still sees every entity changed after it, so compaction never forces a
+full resync; it just bounds the log by the number of entities.
+"""
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Union
+
+from app.utils.database import insert_in_batches, iter_pages
+
+logger = logging.getLogger(__name__)
+
+ENTITIES = ("match", "score", "standing", "player")
+
+# Entries appended per event (in this process) between compactions
+COMPACT_EVERY = int(os.getenv("CHANGES_COMPACT_EVERY", "1000"))
+# Sequence values are taken at insert but can commit out of order across
+# workers; the reported version stays behind entries younger than this so
+# a late commit below it is picked up on the next poll.
+SETTLE_SECONDS = float(os.getenv("CHANGES_SETTLE_SECONDS", "2"))
+
+_appended: Dict[str, int] = {}
+_appended_lock = threading.Lock()
+
+
+def record_changes(supabase, event_id: str, entity: Union[str, Iterable[str]], entity_ids: Iterable[str], op: str = "upsert"):
+    """
+    Appends one entry per id, or per id and entity when `entity` is several
+    kinds sharing ids (a match and its score), in one insert. A failed
+    append is logged, not raised.
+    """
+    entities = (entity,) if isinstance(entity, str) else tuple(entity)
+    rows = [
+        {"event_id": str(event_id), "entity": kind, "entity_id": str(entity_id), "op": op}
+        for entity_id in dict.fromkeys(entity_ids) if entity_id
+        for kind in entities
+    ]
+    if not rows:
+        return
+    try:
+        insert_in_batches(supabase, "event_changes", rows)
+    except Exception:
+        logger.exception("Failed to record %s changes for event %s", entity, event_id)
+        return
+
+    with _appended_lock:
+        count = _appended.get(str(event_id), 0) + len(rows)
+        due = count >= COMPACT_EVERY
+        _appended[str(event_id)] = 0 if due else count
+    if due:
+        compact_changes(supabase, event_id)
+
+
+def compact_changes(supabase, event_id: str) -> int:
+    """Drops superseded entries of an event; returns how many were removed."""
+    try:
+        return supabase.rpc("compact_event_changes", {"p_event_id": str(event_id)}).execute().data or 0
+    except Exception:
+        logger.exception("Failed to compact change log of event %s", event_id)
+        return 0
+
+
+def _parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def read_changes(supabase, event_id: str, since: int):
+    """
+    Returns ({entity: {entity_id: op}}, version) for entries above `since`.
+    Later entries for the same entity overwrite earlier ones.
+    """
+    changed: Dict[str, Dict[str, str]] = {entity: {} for entity in ENTITIES}
+    version = since
+    settle_before = datetime.now(timezone.utc) - timedelta(seconds=SETTLE_SECONDS)
+    unsettled = None
+
+    pages = iter_pages(lambda: supabase.table("event_changes")
+                       .select("version, entity, entity_id, op, created_at")
+                       .eq("event_id", event_id)
+                       .gt("version", since), key="version")
+    for page in pages:
+        for entry in page:
+            changed.setdefault(entry['entity'], {})[entry['entity_id']] = entry['op']
+            version = entry['version']
+            if unsettled is None and entry.get('created_at') and _parse_time(entry['created_at']) > settle_before:
+                unsettled = entry['version']
+
+    if unsettled is not None:
+        version = max(since, unsettled - 1)
+    return changed, version
+
+
+def fetch_in_chunks(query_factory, column: str, values: List[str], chunk_size: int = 200) -> list:
+    """Rows whose `column` is in `values`, a URL-sized `in` filter at a time."""
+    rows = []
+    for start in range(0, len(values), chunk_size):
+        rows.extend(query_factory().in_(column, values[start:start + chunk_size]).execute().data)
+    return rows
@@ -0,0 +1,69 @@
+"""
+Streaming event exports.
+
+Matches (from match_details) and scores are each read in keyset pages
+ordered by match id and merge-joined, so an export holds one page of each
+in memory however large the event is, and bytes go out after the first
+page.
+"""
+import csv
+import json
+from io import StringIO
+from typing import Iterable, Iterator
+
+EXPORT_COLUMNS = [
+    "match_id", "round", "bracket_position", "status", "court_id", "start_time", "end_time",
+    "player1_id", "player1_name", "player2_id", "player2_name", "match_code",
+    "player1_score", "player2_score"
+]
+
+
+def join_scores(match_pages: Iterable[list], score_pages: Iterable[list]) -> Iterator[list]:
+    """
+    Merge-joins two streams of pages sorted by match id and yields export
+    rows one match page at a time.
+    """
+    scores = iter(row for page in score_pages for row in page)
+    score = next(scores, None)
+
+    for page in match_pages:
+        rows = []
+        for m in page:
+            while score is not None and score['match_id'] < m['id']:
+                score = next(scores, None)
+            matched = score if score is not None and score['match_id'] == m['id'] else None
+            rows.append({
+                "match_id": m['id'],
+                "round": m['round'],
+                "bracket_position": m.get('bracket_position'),
+                "status": m['status'],
+                "court_id": m.get('court_id'),
+                "start_time": m.get('start_time'),
+                "end_time": m.get('end_time'),
+                "player1_id": m['player1_id'],
+                "player1_name": m.get('player1_name'),
+                "player2_id": m.get('player2_id'),
+                "player2_name": m.get('player2_name'),
+                "match_code": m.get('match_code'),
+                "player1_score": matched['player1_score'] if matched else None,
+                "player2_score": matched['player2_score'] if matched else None
+            })
+        yield rows
+
+
+def stream_csv(row_pages: Iterable[list]) -> Iterator[str]:
+    buffer = StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for rows in row_pages:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_ndjson(row_pages: Iterable[list]) -> Iterator[str]:
+    for rows in row_pages:
+        yield "".join(json.dumps(row) + "\n" for row in rows)
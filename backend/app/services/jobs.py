@@ -0,0 +1,146 @@
+"""
+In-process background jobs for long-running operations.
+
+Jobs run on a bounded thread pool. Their state lives in memory for fast
+polling from the worker that owns them and is mirrored to the `jobs`
+table, so any worker can answer /api/jobs/{id}.
+"""
+import logging
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from app.utils.database import get_supabase
+
+logger = logging.getLogger(__name__)
+
+# Minimum gap between progress writes to the jobs table
+PROGRESS_WRITE_INTERVAL = 0.5
+# Finished jobs kept in memory; older ones are served from the table
+MAX_RETAINED_JOBS = 500
+
+
+class JobRunner:
+    def __init__(self, max_workers: int = 2, max_pending: int = 50):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: Dict[str, dict] = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, job_type: str, fn: Callable, *args) -> dict:
+        """
+        Queues fn(*args, progress=callback) and returns the job record.
+        Raises a 503 once `max_pending` jobs are queued or running.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Too many background jobs queued, try again shortly",
+                    headers={"Retry-After": "30"}
+                )
+            self._pending += 1
+
+        job = {
+            "id": str(uuid.uuid4()),
+            "type": job_type,
+            "status": "queued",
+            "progress": 0.0,
+            "result": None,
+            "error": None,
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None
+        }
+        # _prune iterates _jobs from worker threads
+        with self._lock:
+            self._jobs[job["id"]] = job
+        self._persist(job, insert=True)
+        self._executor.submit(self._run, job, fn, args)
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return _with_timings(dict(job))
+        # Submitted by another worker process
+        res = get_supabase().table("jobs").select("*").eq("id", job_id).execute()
+        return _with_timings(res.data[0]) if res.data else None
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _run(self, job: dict, fn: Callable, args: tuple):
+        job["status"] = "running"
+        job["started_at"] = datetime.utcnow().isoformat()
+        self._persist(job)
+
+        last_write = [time.monotonic()]
+
+        def progress(done: int, total: int):
+            job["progress"] = min(round(done / total, 4), 1.0) if total else 1.0
+            now = time.monotonic()
+            if now - last_write[0] >= PROGRESS_WRITE_INTERVAL:
+                last_write[0] = now
+                self._persist(job)
+
+        try:
+            result = fn(*args, progress=progress)
+            job["result"] = result.model_dump(mode="json") if hasattr(result, "model_dump") else result
+            job["status"] = "succeeded"
+            job["progress"] = 1.0
+        except HTTPException as e:
+            job["status"] = "failed"
+            job["error"] = {"status_code": e.status_code, "detail": e.detail}
+        except Exception as e:
+            logger.error(f"Job {job['id']} ({job['type']}) failed: {traceback.format_exc()}")
+            job["status"] = "failed"
+            job["error"] = {"status_code": 500, "detail": str(e)}
+        finally:
+            job["finished_at"] = datetime.utcnow().isoformat()
+            self._persist(job)
+            with self._lock:
+                self._pending -= 1
+                self._prune()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job["finished_at"]]
+        for job_id in finished[:max(0, len(finished) - MAX_RETAINED_JOBS)]:
+            del self._jobs[job_id]
+
+    def _persist(self, job: dict, insert: bool = False):
+        try:
+            table = get_supabase().table("jobs")
+            if insert:
+                table.insert(job).execute()
+            else:
+                data = {k: v for k, v in job.items() if k not in ("id", "type", "created_at")}
+                table.update(data).eq("id", job["id"]).execute()
+        except Exception as e:
+            # Polling from this worker still works from memory
+            logger.warning(f"Could not persist job {job['id']}: {e}")
+
+
+def _with_timings(job: dict) -> dict:
+    def parse(value):
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None) if value else None
+
+    created, started, finished = parse(job["created_at"]), parse(job["started_at"]), parse(job["finished_at"])
+    job["queued_ms"] = round(((started or datetime.utcnow()) - created).total_seconds() * 1000, 1)
+    job["run_ms"] = round(((finished or datetime.utcnow()) - started).total_seconds() * 1000, 1) if started else None
+    return job
+
+
+job_runner = JobRunner(
+    max_workers=int(os.getenv("JOB_WORKERS", "2")),
+    max_pending=int(os.getenv("JOB_MAX_PENDING", "50"))
+)
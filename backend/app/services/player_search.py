@@ -0,0 +1,246 @@
+"""
+In-memory trigram index of player names and phone numbers.
+
+Names are normalized (accents, case and punctuation dropped) and split
+into word trigrams padded the way pg_trgm pads them; phone numbers are
+reduced to digits and indexed as digit trigrams. A search counts shared
+trigrams through the posting lists of the query's trigrams only (one
+numpy bincount), so its cost follows how common those trigrams are rather
+than the number of players.
+
+Players are added as they are created or imported. Other workers announce
+new players on the "players" bus key; the index then pulls players
+created since its last load on the next search.
+"""
+import math
+import threading
+import time
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.utils.invalidation import invalidation_bus
+
+# Rows committed late by another worker can carry an older created_at
+REFRESH_OVERLAP = timedelta(seconds=30)
+
+
+def normalize_name(name: str) -> str:
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join("".join(c if c.isalnum() else " " for c in text).split())
+
+
+def normalize_phone(phone: str) -> str:
+    digits = "".join(c for c in (phone or "") if c.isdigit())
+    # Compare national numbers; country codes are written inconsistently
+    return digits[-10:]
+
+
+def name_trigrams(name: str, prefix: bool = False) -> set:
+    """
+    Word trigrams of a normalized name. With prefix=True the last word is
+    left open-ended, so "joh" matches "john" while it is being typed.
+    """
+    words = normalize_name(name).split()
+    grams = set()
+    for i, word in enumerate(words):
+        padded = f"  {word}" if prefix and i == len(words) - 1 else f"  {word} "
+        grams.update(padded[j:j + 3] for j in range(len(padded) - 2))
+    return grams
+
+
+def phone_trigrams(phone: str) -> set:
+    digits = normalize_phone(phone)
+    # '#' keeps digit trigrams apart from trigrams of names containing digits
+    return {"#" + digits[j:j + 3] for j in range(len(digits) - 2)}
+
+
+class PlayerSearchIndex:
+    def __init__(self, max_age_seconds: float = 3600):
+        # Safety net for edits that bypass add(), e.g. in the dashboard
+        self.max_age_seconds = max_age_seconds
+        self._players: List[dict] = []
+        # Trigram counts per player: row 0 name, row 1 phone
+        self._sizes = np.zeros((2, 1024), dtype=np.int32)
+        self._doc_of: Dict[str, int] = {}
+        self._postings: Dict[str, List[int]] = {}
+        # numpy copies of posting lists, dropped when the list grows
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._by_name: Dict[str, List[int]] = {}
+        self._by_phone: Dict[str, List[int]] = {}
+        self._loaded_at = 0.0
+        self._watermark: Optional[datetime] = None
+        self._loaded = False
+        self._stale = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_of)
+
+    def mark_stale(self):
+        self._stale = True
+
+    def needs_reload(self) -> bool:
+        return not self._loaded or time.monotonic() - self._loaded_at > self.max_age_seconds
+
+    def needs_refresh(self) -> bool:
+        return self._stale
+
+    def begin_refresh(self) -> Optional[datetime]:
+        """
+        Clears the stale flag and returns the created_at to refresh from;
+        a publish that lands during the refresh marks the index stale again.
+        """
+        self._stale = False
+        return self._watermark - REFRESH_OVERLAP if self._watermark else None
+
+    def rebuild(self, players: Iterable[dict]):
+        with self._lock:
+            self._players, self._doc_of = [], {}
+            self._sizes = np.zeros((2, 1024), dtype=np.int32)
+            self._postings, self._arrays, self._by_name, self._by_phone = {}, {}, {}, {}
+            self._watermark = None
+            self._add(players)
+            self._arrays = {gram: np.array(docs, dtype=np.int32) for gram, docs in self._postings.items()}
+            self._loaded = True
+            self._stale = False
+            self._loaded_at = time.monotonic()
+
+    def add(self, players: Iterable[dict]):
+        """Adds players not yet indexed; rows need id, name and phone."""
+        with self._lock:
+            self._add(players)
+
+    def _add(self, players: Iterable[dict]):
+        for player in players:
+            player_id = str(player['id'])
+            if player_id in self._doc_of:
+                continue
+            doc = len(self._players)
+            entry = {
+                "id": player_id,
+                "name": player.get('name'),
+                "phone": player.get('phone'),
+                "club_id": player.get('club_id')
+            }
+            name_grams = name_trigrams(entry['name'])
+            phone_grams = phone_trigrams(entry['phone'])
+            self._players.append(entry)
+            if doc == self._sizes.shape[1]:
+                self._sizes = np.concatenate([self._sizes, np.zeros_like(self._sizes)], axis=1)
+            self._sizes[:, doc] = (len(name_grams), len(phone_grams))
+            self._doc_of[player_id] = doc
+            for gram in name_grams | phone_grams:
+                self._postings.setdefault(gram, []).append(doc)
+                self._arrays.pop(gram, None)
+            self._by_name.setdefault(normalize_name(entry['name']), []).append(doc)
+            phone = normalize_phone(entry['phone'])
+            if phone:
+                self._by_phone.setdefault(phone, []).append(doc)
+
+            created_at = player.get('created_at')
+            if created_at:
+                created = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+                if created.tzinfo is None:
+                    created = created.replace(tzinfo=timezone.utc)
+                if self._watermark is None or created > self._watermark:
+                    self._watermark = created
+
+    def _shared_counts(self, grams: set, min_shared: int, by_phone: bool = False):
+        """(docs, shared trigrams, trigram similarity) of docs sharing at least `min_shared`."""
+        arrays = []
+        with self._lock:
+            for gram in grams:
+                array = self._arrays.get(gram)
+                if array is None and gram in self._postings:
+                    array = self._arrays[gram] = np.array(self._postings[gram], dtype=np.int32)
+                if array is not None:
+                    arrays.append(array)
+            sizes = self._sizes[int(by_phone)]
+        if not arrays:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0)
+
+        counts = np.bincount(np.concatenate(arrays))
+        docs = np.flatnonzero(counts >= min_shared)
+        shared = counts[docs]
+        similarity = shared / (len(grams) + sizes[docs] - shared)
+        return docs, shared, similarity
+
+    def search(self, query: str, limit: int = 10, min_similarity: float = 0.5) -> List[dict]:
+        """
+        Players ranked by `score`, the share of the query's trigrams they
+        contain, then by `similarity`, shared over combined trigrams. A query of mostly digits is
+        matched against phone numbers.
+        """
+        digits = sum(c.isdigit() for c in query)
+        by_phone = digits >= 3 and digits * 2 >= len(query.replace(" ", ""))
+        grams = phone_trigrams(query) if by_phone else name_trigrams(query, prefix=True)
+        if not grams:
+            return []
+
+        min_shared = max(1, math.ceil(min_similarity * len(grams)))
+        docs, shared, similarity = self._shared_counts(grams, min_shared, by_phone)
+
+        # Similarity is at most 1, so this orders by shared, then similarity
+        rank = shared + similarity * 0.5
+        if len(docs) > limit:
+            top = np.argpartition(-rank, limit - 1)[:limit]
+        else:
+            top = np.arange(len(docs))
+        top = top[np.lexsort((docs[top], -rank[top]))]
+
+        return [
+            {
+                **self._players[docs[i]],
+                "score": round(float(shared[i]) / len(grams), 3),
+                "similarity": round(float(similarity[i]), 3)
+            }
+            for i in top
+        ]
+
+    def find_duplicates(
+        self,
+        name: str,
+        phone: str = None,
+        limit: int = 5,
+        min_similarity: float = 0.6,
+        among: Optional[set] = None
+    ) -> List[dict]:
+        """
+        Likely duplicates of a new registration: the same normalized name,
+        the same phone number, or a name with trigram similarity of at
+        least `min_similarity`. `among` restricts matches to those player ids.
+        """
+        found: Dict[int, dict] = {}
+
+        def keep(doc: int, reason: str, similarity: float):
+            player = self._players[doc]
+            if among is not None and player['id'] not in among:
+                return
+            if doc not in found or found[doc]["similarity"] < similarity:
+                found[doc] = {**player, "reason": reason, "similarity": round(similarity, 3)}
+
+        for doc in self._by_name.get(normalize_name(name), ()):
+            keep(doc, "same_name", 1.0)
+        normalized_phone = normalize_phone(phone)
+        if normalized_phone:
+            for doc in self._by_phone.get(normalized_phone, ()):
+                keep(doc, "same_phone", 1.0)
+
+        grams = name_trigrams(name)
+        if grams:
+            # Similarity >= t needs at least t * len(grams) shared trigrams
+            min_shared = max(1, math.ceil(min_similarity * len(grams)))
+            docs, _, similarity = self._shared_counts(grams, min_shared)
+            for i in np.flatnonzero(similarity >= min_similarity):
+                keep(int(docs[i]), "similar_name", float(similarity[i]))
+
+        return sorted(found.values(), key=lambda d: d["similarity"], reverse=True)[:limit]
+
+
+player_index = PlayerSearchIndex()
+invalidation_bus.subscribe("players", lambda key: player_index.mark_stale())
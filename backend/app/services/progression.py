@@ -0,0 +1,90 @@
+"""
+Knockout progression: turning results into next-round matches.
+
+Slot k of a round is fed by slots 2k and 2k+1 of the round before and is
+created once both are decided. update_score passes advance_bracket() the
+sibling matches of one result; a results sheet passes every knockout
+match of an event, and the rounds are walked in order once, so an import
+needs one insert however many rounds it completes.
+"""
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+
+def winner_of(match: dict, score: Optional[dict]) -> Optional[str]:
+    """Winner of a completed or bye match; player 2 takes ties, as in update_score."""
+    if match['status'] == "bye":
+        return match['player1_id']
+    if match['status'] != "completed" or not score:
+        return None
+    return match['player1_id'] if score['player1_score'] > score['player2_score'] else match['player2_id']
+
+
+def pair_winners(winners: List[Tuple[Optional[int], str]], event_id: str, next_round: int, taken=()) -> List[dict]:
+    """
+    Next-round matches from (bracket_position, winner) pairs: slot k of the
+    next round is created once slots 2k and 2k+1 are both decided, so
+    winners follow the draw. Slots in `taken` already exist.
+    """
+    if any(position is None for position, _ in winners):
+        # Matches created before bracket positions: pair in query order
+        return [
+            _next_match(event_id, next_round, None, winners[i][1], winners[i + 1][1])
+            for i in range(0, len(winners) - 1, 2)
+        ]
+
+    by_position = dict(winners)
+    return [
+        _next_match(event_id, next_round, slot, by_position[2 * slot], by_position[2 * slot + 1])
+        for slot in sorted({position // 2 for position in by_position})
+        if slot not in taken and 2 * slot in by_position and 2 * slot + 1 in by_position
+    ]
+
+
+def _next_match(event_id: str, round_num: int, position: Optional[int], player1_id: str, player2_id: str) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "event_id": event_id,
+        "round": round_num,
+        "bracket_position": position,
+        "player1_id": player1_id,
+        "player2_id": player2_id,
+        "status": "pending",
+        "court_id": None,
+        "start_time": None,
+        "end_time": None
+    }
+
+
+def advance_bracket(event_id: str, matches: List[dict], scores: Dict[str, dict], from_round: int) -> List[dict]:
+    """
+    Next-round matches for every pair of decided (completed or bye) sibling
+    slots from `from_round` on whose next-round slot does not exist yet.
+    Rounds are visited in order, so a match created here is seen by the
+    next step; it is pending, so it feeds nothing further. O(matches).
+    """
+    by_round: Dict[int, List[dict]] = {}
+    for match in matches:
+        by_round.setdefault(match['round'], []).append(match)
+
+    created = []
+    round_num = from_round
+    while round_num in by_round:
+        next_round = round_num + 1
+        following = by_round.get(next_round, [])
+        winners = [
+            (match.get('bracket_position'), winner_of(match, scores.get(match['id'])))
+            for match in by_round[round_num]
+        ]
+        decided = [w for w in winners if w[1] is not None]
+        if any(position is None for position, _ in winners):
+            # Matches created before bracket positions wait for the whole round
+            next_matches = [] if following or len(decided) < len(winners) else pair_winners(decided, event_id, next_round)
+        else:
+            taken = {m.get('bracket_position') for m in following}
+            next_matches = pair_winners(decided, event_id, next_round, taken)
+        if next_matches:
+            by_round.setdefault(next_round, []).extend(next_matches)
+            created.extend(next_matches)
+        round_num = next_round
+    return created
@@ -0,0 +1,126 @@
+"""
+Round-robin and group-stage fixtures.
+
+Pairings use the circle method: one player stays fixed while the rest
+rotate, so every pair meets exactly once over n - 1 rounds (n rounded up
+to even, the odd one out sitting a round out) and nobody plays twice in
+a round. Standings are kept per player and updated by the result of each
+match rather than recomputed from every match in the group.
+"""
+import math
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+STANDINGS_FIELDS = ("played", "wins", "losses", "sets_won", "sets_lost", "points")
+
+
+def circle_pairings(player_ids: List[str]) -> List[List[Tuple[str, str]]]:
+    """Rounds of (player1, player2) pairs; O(n^2), the size of the output."""
+    ring: List[Optional[str]] = list(player_ids)
+    if len(ring) % 2:
+        ring.append(None)
+    n = len(ring)
+
+    rounds = []
+    for _ in range(n - 1):
+        pairs = [(ring[i], ring[n - 1 - i]) for i in range(n // 2)]
+        rounds.append([(a, b) for a, b in pairs if a is not None and b is not None])
+        ring = [ring[0], ring[-1]] + ring[1:-1]
+    return rounds
+
+
+def assign_groups(players: List[dict], num_groups: int) -> List[List[dict]]:
+    """
+    Deals players into groups in club order, so each club is spread as
+    evenly as possible across the groups.
+    """
+    club_groups: Dict[str, List[dict]] = {}
+    for player in players:
+        club_groups.setdefault(player.get('club_id'), []).append(player)
+    ordered = [p for group in sorted(club_groups.values(), key=len, reverse=True) for p in group]
+
+    groups: List[List[dict]] = [[] for _ in range(num_groups)]
+    for i, player in enumerate(ordered):
+        groups[i % num_groups].append(player)
+    return groups
+
+
+def default_num_groups(num_players: int) -> int:
+    return max(1, math.ceil(num_players / 4))
+
+
+def generate_round_robin_fixtures(players: List[dict], event_id: str, num_groups: int = 1) -> Tuple[List[dict], List[dict]]:
+    """
+    Returns (matches, standings rows) for every group. Group rounds share
+    round numbers, so round r of every group can run side by side.
+    """
+    matches = []
+    standings = []
+    for group_number, group in enumerate(assign_groups(players, num_groups), start=1):
+        for player in group:
+            standings.append(empty_standing(event_id, group_number, player['id']))
+
+        for round_num, pairs in enumerate(circle_pairings([p['id'] for p in group]), start=1):
+            for position, (player1_id, player2_id) in enumerate(pairs):
+                matches.append({
+                    "id": str(uuid.uuid4()),
+                    "event_id": event_id,
+                    "round": round_num,
+                    "group_number": group_number,
+                    "bracket_position": position,
+                    "player1_id": player1_id,
+                    "player2_id": player2_id,
+                    "status": "pending",
+                    "court_id": None,
+                    "start_time": None,
+                    "end_time": None
+                })
+    return matches, standings
+
+
+def empty_standing(event_id: str, group_number: int, player_id: str) -> dict:
+    row = {"event_id": event_id, "group_number": group_number, "player_id": player_id}
+    row.update({field: 0 for field in STANDINGS_FIELDS})
+    return row
+
+
+def apply_result(row1: dict, row2: dict, player1_score: int, player2_score: int, sign: int = 1):
+    """
+    Adds (sign=1) or removes (sign=-1) one result from the two players'
+    standings rows in place. Player 2 takes ties, as in update_score.
+    """
+    p1_won = player1_score > player2_score
+    for row, won, sets_won, sets_lost in (
+        (row1, p1_won, player1_score, player2_score),
+        (row2, not p1_won, player2_score, player1_score)
+    ):
+        row["played"] += sign
+        row["wins"] += sign * won
+        row["losses"] += sign * (not won)
+        row["sets_won"] += sign * sets_won
+        row["sets_lost"] += sign * sets_lost
+        # Same formula as the leaderboard
+        row["points"] = row["wins"] * 3 + row["sets_won"]
+
+
+def rank_group(rows: List[dict]) -> List[dict]:
+    return sorted(rows, key=lambda r: (r["wins"], r["sets_won"] - r["sets_lost"], r["sets_won"]), reverse=True)
+
+
+def qualifiers(standings: List[dict], advance_per_group: int) -> List[dict]:
+    """
+    Top `advance_per_group` of every group, as players whose "club" is
+    their group, so bracket placement keeps group mates apart.
+    """
+    by_group: Dict[int, List[dict]] = {}
+    for row in standings:
+        by_group.setdefault(row["group_number"], []).append(row)
+    ranked_groups = {g: rank_group(rows) for g, rows in by_group.items()}
+
+    advancing = []
+    for rank in range(advance_per_group):
+        for group_number in sorted(ranked_groups):
+            ranked = ranked_groups[group_number]
+            if rank < len(ranked):
+                advancing.append({"id": ranked[rank]["player_id"], "club_id": group_number})
+    return advancing
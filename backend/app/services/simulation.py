@@ -0,0 +1,176 @@
+"""
+Dry-run simulation of a tournament day.
+
+The event's draw is expanded through to the final, planned with the same
+greedy rules as schedule_matches_smart (earliest free court, minimum rest
+between a player's matches), then played out under randomized match
+lengths. Every scenario of a grid point runs at once along a NumPy axis,
+so a sweep costs one Python loop over the draw per (courts, duration).
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+PERCENTILES = (50, 90, 99)
+
+
+def build_draw(matches: List[dict]) -> List[dict]:
+    """
+    Returns one node per (round, bracket_position) from the earliest stored
+    round through to the final, in scheduling order. Nodes carry:
+      - state: "play" (still to be played), "bye" or "done" (completed)
+      - feeders: indices of the two nodes whose winners meet here
+    """
+    if not matches:
+        return []
+
+    base_round = min(m['round'] for m in matches)
+    by_round: Dict[int, List[dict]] = {}
+    for m in matches:
+        by_round.setdefault(m['round'], []).append(m)
+
+    # Legacy matches have no bracket_position; fall back to their stored order
+    stored = {}
+    for round_num, round_matches in by_round.items():
+        for i, m in enumerate(round_matches):
+            position = m.get('bracket_position')
+            stored[(round_num, i if position is None else position)] = m
+
+    base_positions = [pos for (r, pos) in stored if r == base_round]
+    width = 1 << max(base_positions).bit_length()
+
+    draw = []
+    index = {}
+    round_num = base_round
+    while width >= 1:
+        for position in range(width):
+            m = stored.get((round_num, position))
+            if m is None:
+                state = "play"
+            elif m['status'] == 'bye':
+                state = "bye"
+            elif m['status'] == 'completed':
+                state = "done"
+            else:
+                state = "play"
+
+            feeders = []
+            if round_num > base_round:
+                feeders = [index[(round_num - 1, 2 * position)], index[(round_num - 1, 2 * position + 1)]]
+
+            index[(round_num, position)] = len(draw)
+            draw.append({
+                "round": round_num,
+                "position": position,
+                "state": state,
+                "feeders": feeders
+            })
+        width //= 2
+        round_num += 1
+
+    return draw
+
+
+def plan_schedule(draw: List[dict], num_courts: int, match_duration: float, min_rest: float):
+    """
+    Deterministic plan with nominal durations, matching schedule_matches_smart.
+    Returns (court, start) arrays indexed by draw node; unplayed nodes get -1.
+    """
+    courts = np.zeros(num_courts)
+    court_of = np.full(len(draw), -1)
+    start = np.full(len(draw), -1.0)
+    end = np.zeros(len(draw))
+
+    for i, node in enumerate(draw):
+        if node['state'] != "play":
+            continue
+        ready = 0.0
+        for f in node['feeders']:
+            if draw[f]['state'] == "play":
+                ready = max(ready, end[f] + min_rest)
+
+        court = int(np.argmin(courts))
+        start[i] = max(courts[court], ready)
+        end[i] = start[i] + match_duration
+        courts[court] = end[i]
+        court_of[i] = court
+
+    return court_of, start
+
+
+def simulate_day(
+    draw: List[dict],
+    num_courts: int,
+    match_duration: float,
+    min_rest: float,
+    scenarios: int,
+    duration_variance: float,
+    rng: np.random.Generator
+) -> dict:
+    """
+    Plays the planned schedule `scenarios` times with lognormal match lengths
+    (mean `match_duration`, coefficient of variation `duration_variance`).
+    A match starts at its planned time or once its court and both players
+    are free, whichever is later; starting within `min_rest` of a player's
+    previous match counts as a rest violation.
+    """
+    court_of, planned_start = plan_schedule(draw, num_courts, match_duration, min_rest)
+    playable = np.flatnonzero(court_of >= 0)
+
+    sigma = np.sqrt(np.log1p(duration_variance ** 2))
+    durations = np.zeros((len(draw), scenarios))
+    durations[playable] = match_duration * rng.lognormal(-sigma ** 2 / 2, sigma, (len(playable), scenarios))
+
+    court_free = np.zeros((num_courts, scenarios))
+    end = np.zeros((len(draw), scenarios))
+    rest_violations = np.zeros(scenarios, dtype=np.int64)
+
+    for i in playable:
+        start = np.maximum(court_free[court_of[i]], planned_start[i])
+        previous = [end[f] for f in draw[i]['feeders'] if court_of[f] >= 0]
+        for prev_end in previous:
+            start = np.maximum(start, prev_end)
+        for prev_end in previous:
+            rest_violations += start - prev_end < min_rest
+        end[i] = start + durations[i]
+        court_free[court_of[i]] = end[i]
+
+    makespan = end.max(axis=0) if len(playable) else np.zeros(scenarios)
+    busy = durations.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        utilization = np.where(makespan > 0, busy / (num_courts * makespan), 0.0)
+
+    planned_makespan = float((planned_start[playable] + match_duration).max()) if len(playable) else 0.0
+    return {
+        "num_courts": num_courts,
+        "match_duration_minutes": match_duration,
+        "matches": int(len(playable)),
+        "planned_makespan_minutes": planned_makespan,
+        "makespan_minutes": _distribution(makespan),
+        "court_utilization": _distribution(utilization),
+        "rest_violations": _distribution(rest_violations)
+    }
+
+
+def sweep(
+    draw: List[dict],
+    court_options: List[int],
+    duration_options: List[float],
+    min_rest: float,
+    scenarios: int,
+    duration_variance: float,
+    seed: Optional[int] = None
+) -> List[dict]:
+    rng = np.random.default_rng(seed)
+    return [
+        simulate_day(draw, num_courts, duration, min_rest, scenarios, duration_variance, rng)
+        for num_courts in court_options
+        for duration in duration_options
+    ]
+
+
+def _distribution(values: np.ndarray) -> dict:
+    summary = {"mean": round(float(values.mean()), 3)}
+    for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f"p{p}"] = round(float(v), 3)
+    return summary
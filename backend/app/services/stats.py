@@ -0,0 +1,118 @@
+"""
+Season-wide player and club statistics.
+
+Completed matches are flattened into one row per player per match and
+aggregated with pandas group-bys, so the cost is a handful of vectorized
+passes however many events and matches are included.
+"""
+from typing import List, Optional
+
+import pandas as pd
+
+MATCH_COLUMNS = ["match_id", "event_id", "player1_id", "player2_id", "player1_score", "player2_score"]
+
+
+class SeasonStats:
+    """Per-player result rows plus the lookups needed to label them."""
+
+    def __init__(self, results: pd.DataFrame, players: pd.DataFrame, clubs: pd.DataFrame):
+        self.results = results
+        self.players = players
+        self.clubs = clubs
+
+    @property
+    def total_matches(self) -> int:
+        return int(self.results["match_id"].nunique()) if not self.results.empty else 0
+
+
+def build_season_stats(matches: List[dict], players: List[dict], clubs: List[dict]) -> SeasonStats:
+    """
+    `matches` are completed matches with their score columns; byes and
+    matches without a second player are dropped.
+    """
+    frame = pd.DataFrame(matches, columns=MATCH_COLUMNS).dropna(subset=["player2_id"])
+    # Same rule as update_score: player 2 takes ties
+    p1_won = frame["player1_score"] > frame["player2_score"]
+
+    side1 = pd.DataFrame({
+        "match_id": frame["match_id"],
+        "event_id": frame["event_id"],
+        "player_id": frame["player1_id"],
+        "opponent_id": frame["player2_id"],
+        "sets_won": frame["player1_score"],
+        "sets_lost": frame["player2_score"],
+        "win": p1_won
+    })
+    side2 = pd.DataFrame({
+        "match_id": frame["match_id"],
+        "event_id": frame["event_id"],
+        "player_id": frame["player2_id"],
+        "opponent_id": frame["player1_id"],
+        "sets_won": frame["player2_score"],
+        "sets_lost": frame["player1_score"],
+        "win": ~p1_won
+    })
+    results = pd.concat([side1, side2], ignore_index=True)
+    results["win"] = results["win"].astype("int64")
+
+    players_df = pd.DataFrame(players, columns=["id", "name", "club_id"]).set_index("id")
+    clubs_df = pd.DataFrame(clubs, columns=["id", "name"]).set_index("id")
+    results["club_id"] = results["player_id"].map(players_df["club_id"])
+
+    return SeasonStats(results, players_df, clubs_df)
+
+
+def _summarize(results: pd.DataFrame, key: str) -> pd.DataFrame:
+    summary = results.groupby(key).agg(
+        matches=("match_id", "size"),
+        wins=("win", "sum"),
+        sets_won=("sets_won", "sum"),
+        sets_lost=("sets_lost", "sum"),
+        events=("event_id", "nunique")
+    )
+    summary["losses"] = summary["matches"] - summary["wins"]
+    summary["set_differential"] = summary["sets_won"] - summary["sets_lost"]
+    summary["points"] = summary["wins"] * 3 + summary["sets_won"]
+    summary["win_rate"] = (summary["wins"] / summary["matches"]).round(3)
+    return summary
+
+
+def player_records(stats: SeasonStats, limit: Optional[int] = None) -> List[dict]:
+    if stats.results.empty:
+        return []
+    summary = _summarize(stats.results, "player_id")
+    summary["player_name"] = summary.index.map(stats.players["name"]).fillna("Unknown")
+    summary["club_id"] = summary.index.map(stats.players["club_id"])
+    summary = summary.sort_values(["wins", "set_differential", "points"], ascending=False)
+    if limit:
+        summary = summary.head(limit)
+    return _records(summary, "player_id")
+
+
+def club_records(stats: SeasonStats) -> List[dict]:
+    results = stats.results.dropna(subset=["club_id"])
+    if results.empty:
+        return []
+    summary = _summarize(results, "club_id")
+    summary["players"] = results.groupby("club_id")["player_id"].nunique()
+    summary["club_name"] = summary.index.map(stats.clubs["name"]).fillna("Unknown")
+    summary = summary.sort_values(["wins", "set_differential"], ascending=False)
+    return _records(summary, "club_id")
+
+
+def head_to_head(stats: SeasonStats, player_id: str, opponent_id: Optional[str] = None) -> List[dict]:
+    results = stats.results[stats.results["player_id"] == player_id]
+    if opponent_id:
+        results = results[results["opponent_id"] == opponent_id]
+    if results.empty:
+        return []
+    summary = _summarize(results, "opponent_id")
+    summary["opponent_name"] = summary.index.map(stats.players["name"]).fillna("Unknown")
+    summary = summary.sort_values(["matches", "wins"], ascending=False)
+    return _records(summary, "opponent_id")
+
+
+def _records(summary: pd.DataFrame, key: str) -> List[dict]:
+    summary = summary.reset_index().rename(columns={"index": key})
+    summary = summary.astype(object).where(summary.notna(), None)
+    return summary.to_dict(orient="records")
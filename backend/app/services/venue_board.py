@@ -0,0 +1,127 @@
+"""
+Time-indexed view of every court's scheduled matches for venue signage.
+
+The index holds the unfinished matches scheduled inside a window around
+now, one start-time-sorted timeline per court. A board lookup is then a
+bisect per court instead of a round of queries per court. Routes that
+change schedules or results call invalidate() so the next lookup reloads.
+"""
+import re
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from app.utils.invalidation import invalidation_bus
+
+
+def parse_timestamp(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        ts = value
+    else:
+        ts = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if ts is not None and ts.tzinfo is None:
+        # Naive times are written by the scheduler in UTC
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts
+
+
+def _court_sort_key(court_id: str):
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', court_id)]
+
+
+class VenueBoardIndex:
+    def __init__(
+        self,
+        lookback: timedelta = timedelta(hours=12),
+        lookahead: timedelta = timedelta(hours=24),
+        max_age_seconds: float = 300
+    ):
+        self.lookback = lookback
+        self.lookahead = lookahead
+        # Safety net for writes that bypass invalidate()
+        self.max_age_seconds = max_age_seconds
+        self._timelines: Dict[str, tuple] = {}
+        self._window = None
+        self._built_at = 0.0
+        self._dirty = True
+        # Bumped by every invalidate(); a rebuild only clears _dirty if no
+        # invalidation landed after its query started
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._dirty = True
+
+    def generation(self) -> int:
+        """Read before querying matches and pass to rebuild()."""
+        with self._lock:
+            return self._generation
+
+    def window_for(self, at: datetime):
+        return at - self.lookback, at + self.lookahead
+
+    def covers(self, at: datetime) -> bool:
+        if self._dirty or self._window is None:
+            return False
+        if time.monotonic() - self._built_at > self.max_age_seconds:
+            return False
+        window_start, window_end = self._window
+        return window_start <= at - self.lookback / 2 and at + self.lookahead / 2 <= window_end
+
+    def rebuild(self, matches: List[dict], window_start: datetime, window_end: datetime, generation: int):
+        """
+        `matches` are unfinished matches with a court and start time inside
+        the window, queried after generation() returned `generation`.
+        """
+        by_court: Dict[str, List[tuple]] = {}
+        for m in matches:
+            start = parse_timestamp(m.get('start_time'))
+            if start is None or not m.get('court_id'):
+                continue
+            by_court.setdefault(m['court_id'], []).append((start, m))
+
+        timelines = {}
+        for court_id, entries in by_court.items():
+            entries.sort(key=lambda e: e[0])
+            timelines[court_id] = ([e[0] for e in entries], [e[1] for e in entries])
+
+        with self._lock:
+            self._timelines = timelines
+            self._window = (window_start, window_end)
+            self._built_at = time.monotonic()
+            self._dirty = self._generation != generation
+
+    def lookup(self, at: datetime, upcoming: int = 1, event_id: Optional[str] = None) -> List[dict]:
+        """
+        Now playing and the next `upcoming` matches for every court. The
+        current match is the latest one started at `at` that has not been
+        completed yet.
+        """
+        with self._lock:
+            timelines = self._timelines
+
+        board = []
+        for court_id in sorted(timelines, key=_court_sort_key):
+            starts, matches = timelines[court_id]
+            if event_id:
+                keep = [i for i, m in enumerate(matches) if m['event_id'] == event_id]
+                if not keep:
+                    continue
+                starts = [starts[i] for i in keep]
+                matches = [matches[i] for i in keep]
+
+            i = bisect_right(starts, at)
+            board.append({
+                "court_id": court_id,
+                "now_playing": matches[i - 1] if i > 0 else None,
+                "up_next": matches[i:i + upcoming]
+            })
+        return board
+
+
+venue_board = VenueBoardIndex()
+invalidation_bus.subscribe("venue_board", lambda key: venue_board.invalidate())
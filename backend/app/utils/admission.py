@@ -0,0 +1,195 @@
+"""
+Priority-aware admission control for the API.
+
+Polled read routes are grouped into lanes with their own concurrency
+limit and token bucket, and together they may only use the shared part
+of the capacity. Score and match-code routes get a lane of their own, so
+a spectator flood queues (and is shed) behind its own limits instead of
+starving umpire writes. Reads that would wait longer than the lane's
+latency budget are answered 503 with Retry-After straight away.
+"""
+import asyncio
+import math
+import os
+import time
+from fnmatch import fnmatchcase
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> Optional[float]:
+        """Returns None if a token was taken, else the seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return None
+        return (1 - self.tokens) / self.rate
+
+
+class Lane:
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        rate: float = 0,
+        burst: int = 0,
+        latency_budget: float = 2.0,
+        shared: bool = True
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.latency_budget = latency_budget
+        # Shared lanes also hold a slot of the common read capacity
+        self.shared = shared
+        self.bucket = TokenBucket(rate, burst or max(1, int(rate))) if rate else None
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed_rate_limited = 0
+        self.shed_overloaded = 0
+        self.service_time = 0.05  # EWMA, seconds
+
+    def expected_wait(self) -> float:
+        return (self.queued + 1) * self.service_time / self.max_concurrency
+
+    def observe(self, elapsed: float):
+        self.service_time = 0.8 * self.service_time + 0.2 * elapsed
+
+    def metrics(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "admitted": self.admitted,
+            "shed_rate_limited": self.shed_rate_limited,
+            "shed_overloaded": self.shed_overloaded,
+            "service_time_ms": round(self.service_time * 1000, 2)
+        }
+
+
+# (method, path prefix or fnmatch pattern with *, lane); first match wins
+ROUTES: List[Tuple[str, str, str]] = [
+    ("POST", "/api/update-score", "scoring"),
+    ("POST", "/api/results/import", "scoring"),
+    ("POST", "/api/match-code/", "scoring"),
+    ("GET", "/api/leaderboard", "leaderboard"),
+    ("GET", "/api/fixtures/", "fixtures"),
+    ("GET", "/api/schedule/", "schedule"),
+    ("GET", "/api/venue-board", "venue_board"),
+    ("GET", "/api/events/*/changes", "changes"),
+    ("GET", "/api/stats", "stats"),
+]
+
+
+def default_lanes(reserved: int) -> Dict[str, Lane]:
+    return {
+        "scoring": Lane("scoring", reserved, shared=False),
+        "leaderboard": Lane("leaderboard", 8, rate=50, burst=100),
+        "fixtures": Lane("fixtures", 8, rate=50, burst=100),
+        "schedule": Lane("schedule", 6, rate=40, burst=80),
+        "venue_board": Lane("venue_board", 4, rate=20, burst=40),
+        "changes": Lane("changes", 8, rate=50, burst=100),
+        "stats": Lane("stats", 2, rate=5, burst=10, latency_budget=5.0),
+    }
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app, capacity: int = None, reserved: int = None):
+        self.app = app
+        capacity = capacity or int(os.getenv("ADMISSION_CAPACITY", "32"))
+        reserved = reserved or int(os.getenv("ADMISSION_RESERVED", "8"))
+        self.lanes = default_lanes(reserved)
+        self.shared_capacity = capacity - reserved
+        self.shared = asyncio.Semaphore(self.shared_capacity)
+        admission_controllers.append(self)
+
+    def classify(self, method: str, path: str) -> Optional[Lane]:
+        for route_method, pattern, lane in ROUTES:
+            if method != route_method:
+                continue
+            if fnmatchcase(path, pattern) if "*" in pattern else path.startswith(pattern):
+                return self.lanes[lane]
+        return None
+
+    async def __call__(self, scope, receive, send):
+        lane = self.classify(scope.get("method"), scope.get("path", "")) if scope["type"] == "http" else None
+        if lane is None:
+            await self.app(scope, receive, send)
+            return
+
+        if lane.bucket is not None:
+            wait = lane.bucket.take()
+            if wait is not None:
+                lane.shed_rate_limited += 1
+                await _shed(scope, receive, send, "Rate limit exceeded", wait)
+                return
+
+        if lane.shared and lane.expected_wait() > lane.latency_budget:
+            lane.shed_overloaded += 1
+            await _shed(scope, receive, send, "Server busy", lane.expected_wait())
+            return
+
+        lane.queued += 1
+        deadline = time.monotonic() + lane.latency_budget
+        acquired_lane = acquired_shared = False
+        try:
+            if lane.shared:
+                # Own lane first, so a saturated lane never sits on shared slots
+                await asyncio.wait_for(lane.semaphore.acquire(), lane.latency_budget)
+                acquired_lane = True
+                await asyncio.wait_for(self.shared.acquire(), max(deadline - time.monotonic(), 0.001))
+                acquired_shared = True
+            else:
+                # Scoring waits as long as it must; it never competes with reads
+                await lane.semaphore.acquire()
+                acquired_lane = True
+        except asyncio.TimeoutError:
+            lane.queued -= 1
+            if acquired_lane:
+                lane.semaphore.release()
+            lane.shed_overloaded += 1
+            await _shed(scope, receive, send, "Server busy", lane.expected_wait())
+            return
+
+        lane.queued -= 1
+        lane.active += 1
+        lane.admitted += 1
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lane.observe(time.monotonic() - started)
+            lane.active -= 1
+            lane.semaphore.release()
+            if acquired_shared:
+                self.shared.release()
+
+    def metrics(self) -> dict:
+        return {
+            "shared_capacity": self.shared_capacity,
+            "lanes": {name: lane.metrics() for name, lane in self.lanes.items()}
+        }
+
+
+# Middleware instances are built by Starlette; keep them reachable for metrics
+admission_controllers: List[AdmissionControlMiddleware] = []
+
+
+async def _shed(scope, receive, send, detail: str, retry_after: float):
+    response = JSONResponse(
+        status_code=503,
+        content={"detail": detail},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+    await response(scope, receive, send)
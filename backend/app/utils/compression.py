@@ -0,0 +1,163 @@
+"""
+Response compression negotiated through Accept-Encoding.
+
+Brotli is preferred over gzip when the client accepts both at the same
+weight. Whole responses below COMPRESSION_MIN_SIZE bytes go out as they
+are; streamed responses (exports) are compressed chunk by chunk and
+flushed after each chunk so rows still arrive as they are produced.
+"""
+import gzip
+import os
+import zlib
+from typing import Optional
+
+import brotli
+
+MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+# 4 compresses JSON better than gzip -6 at a similar CPU cost; 11 is far slower
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/msgpack",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """'br', 'gzip' or None for an Accept-Encoding header value."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if token:
+            weights[token] = q
+
+    br = weights.get("br", weights.get("*", 0.0))
+    gz = weights.get("gzip", weights.get("*", 0.0))
+    if br > 0 and br >= gz:
+        return "br"
+    if gz > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY, mode=brotli.MODE_TEXT)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY, mode=brotli.MODE_TEXT)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def _is_compressible(headers) -> bool:
+    content_type = ""
+    for name, value in headers:
+        lowered = name.lower()
+        if lowered in (b"content-encoding", b"content-range"):
+            return False
+        if lowered == b"content-type":
+            content_type = value.decode("latin-1").lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _with_encoding(headers, encoding: str, length: Optional[int]) -> list:
+    out = [(n, v) for n, v in headers if n.lower() not in (b"content-length", b"vary")]
+    vary = [v.decode("latin-1") for n, v in headers if n.lower() == b"vary"]
+    vary.append("Accept-Encoding")
+    out.append((b"vary", ", ".join(vary).encode("latin-1")))
+    out.append((b"content-encoding", encoding.encode("latin-1")))
+    if length is not None:
+        out.append((b"content-length", str(length).encode("latin-1")))
+    return out
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+        passthrough = False
+
+        async def compressing_send(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is not None:
+                data = compressor.chunk(body) if body else b""
+                if not more_body:
+                    data += compressor.finish()
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            headers = start.get("headers", [])
+            if start["status"] in (204, 304) or not _is_compressible(headers) or (not more_body and len(body) < self.minimum_size):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            if not more_body:
+                data = compress(body, encoding)
+                await send({**start, "headers": _with_encoding(headers, encoding, len(data))})
+                await send({"type": "http.response.body", "body": data})
+                return
+
+            compressor = _StreamCompressor(encoding)
+            await send({**start, "headers": _with_encoding(headers, encoding, None)})
+            await send({"type": "http.response.body", "body": compressor.chunk(body), "more_body": True})
+
+        await self.app(scope, receive, compressing_send)
@@ -1,8 +1,9 @@
 import os
 import logging
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 from dotenv import load_dotenv
 from fastapi import HTTPException
+from app.utils.http_pool import build_http_client
 
 load_dotenv()
 
@@ -10,9 +11,11 @@ logger = logging.getLogger(__name__)
 
 supabase: Client = None
 _supabase_configured = False
+# Keep-alive pool shared by every Supabase call
+_http_client = None
 
 def init_supabase():
-    global supabase, _supabase_configured
+    global supabase, _supabase_configured, _http_client
     url = os.getenv("SUPABASE_URL")
     key = os.getenv("SUPABASE_SERVICE_KEY")
     
@@ -23,7 +26,9 @@ def init_supabase():
         return None
     
     try:
-        supabase = create_client(url, key)
+        if _http_client is None:
+            _http_client = build_http_client()
+        supabase = create_client(url, key, options=ClientOptions(httpx_client=_http_client))
         _supabase_configured = True
         logger.info("Supabase client initialized successfully")
         return supabase
@@ -45,3 +50,57 @@ def get_supabase() -> Client:
 
 def is_supabase_configured() -> bool:
     return _supabase_configured
+
+def get_pool_metrics() -> dict:
+    if _http_client is None:
+        return {}
+    return _http_client._transport.metrics()
+
+def get_breaker_state() -> dict:
+    """Circuit breaker of the database transport; None without the resilience layer."""
+    breaker = getattr(getattr(_http_client, "_transport", None), "breaker", None)
+    return breaker.snapshot() if breaker else None
+
+def close_supabase():
+    global supabase, _http_client
+    if _http_client is not None:
+        _http_client.close()
+    supabase = None
+    _http_client = None
+
+PAGE_SIZE = 1000  # PostgREST's default max-rows
+
+def insert_in_batches(supabase, table: str, rows: list, batch_size: int = PAGE_SIZE) -> list:
+    """Bulk insert in request-sized chunks; returns the inserted rows."""
+    inserted = []
+    for start in range(0, len(rows), batch_size):
+        inserted.extend(supabase.table(table).insert(rows[start:start + batch_size]).execute().data)
+    return inserted
+
+def upsert_in_batches(supabase, table: str, rows: list, batch_size: int = PAGE_SIZE) -> list:
+    """Bulk upsert on the primary key in request-sized chunks; returns the written rows."""
+    written = []
+    for start in range(0, len(rows), batch_size):
+        written.extend(supabase.table(table).upsert(rows[start:start + batch_size]).execute().data)
+    return written
+
+def iter_pages(query_factory, key: str = "id", page_size: int = PAGE_SIZE):
+    """
+    Yields the rows of a query one keyset page at a time, ordered by `key`.
+    `query_factory` returns a fresh filtered select each call.
+    """
+    last = None
+    while True:
+        query = query_factory()
+        if last is not None:
+            query = query.gt(key, last)
+        page = query.order(key).limit(page_size).execute().data
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        last = page[-1][key]
+
+def fetch_all(query_factory, key: str = "id", page_size: int = PAGE_SIZE) -> list:
+    """Reads every row of a query in keyset pages ordered by `key`."""
+    return [row for page in iter_pages(query_factory, key, page_size) for row in page]
@@ -0,0 +1,106 @@
+"""
+Shared HTTP transport for the database client.
+
+One keep-alive connection pool (HTTP/2 when the h2 package is installed)
+serves every Supabase call, with limits and timeouts taken from the
+environment:
+
+    DB_POOL_MAX_CONNECTIONS   (50)   open connections, busy or idle
+    DB_POOL_MAX_KEEPALIVE     (20)   idle connections kept for reuse
+    DB_POOL_KEEPALIVE_EXPIRY  (30)   seconds an idle connection is kept
+    DB_CONNECT_TIMEOUT        (5)    seconds
+    DB_READ_TIMEOUT           (15)   seconds
+    DB_WRITE_TIMEOUT          (15)   seconds
+    DB_POOL_TIMEOUT           (5)    seconds to wait for a free connection
+    DB_HTTP2                  (true) set to false to force HTTP/1.1
+    DB_RESILIENCE             (true) deadlines, retries, hedging and the
+                                     circuit breaker of app.utils.resilience
+"""
+import os
+import threading
+import time
+
+import httpx
+
+from app.utils.resilience import ResilientTransport
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def http2_available() -> bool:
+    if os.getenv("DB_HTTP2", "true").lower() in ("0", "false", "no"):
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class PooledTransport(httpx.HTTPTransport):
+    """HTTPTransport that keeps request and pool counters for metrics."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.in_flight += 1
+            self.requests += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        started = time.perf_counter()
+        try:
+            return super().handle_request(request)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.total_seconds += time.perf_counter() - started
+
+    def metrics(self) -> dict:
+        connections = list(getattr(self._pool, "connections", []))
+        idle = sum(1 for c in connections if c.is_idle())
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "avg_latency_ms": round(self.total_seconds / self.requests * 1000, 2) if self.requests else None,
+                "connections_open": len(connections),
+                "connections_idle": idle,
+                "connections_busy": len(connections) - idle
+            }
+
+
+def build_http_client(**overrides) -> httpx.Client:
+    """httpx client backed by a PooledTransport configured from the environment."""
+    limits = httpx.Limits(
+        max_connections=int(overrides.get("max_connections", _env_float("DB_POOL_MAX_CONNECTIONS", 50))),
+        max_keepalive_connections=int(overrides.get("max_keepalive_connections", _env_float("DB_POOL_MAX_KEEPALIVE", 20))),
+        keepalive_expiry=overrides.get("keepalive_expiry", _env_float("DB_POOL_KEEPALIVE_EXPIRY", 30))
+    )
+    timeout = httpx.Timeout(
+        connect=_env_float("DB_CONNECT_TIMEOUT", 5),
+        read=_env_float("DB_READ_TIMEOUT", 15),
+        write=_env_float("DB_WRITE_TIMEOUT", 15),
+        pool=_env_float("DB_POOL_TIMEOUT", 5)
+    )
+    transport = PooledTransport(
+        limits=limits,
+        http2=overrides.get("http2", http2_available())
+    )
+    if overrides.get("resilience", os.getenv("DB_RESILIENCE", "true").lower() not in ("0", "false", "no")):
+        transport = ResilientTransport(transport)
+    return httpx.Client(transport=transport, timeout=timeout, follow_redirects=True)
@@ -0,0 +1,127 @@
+"""
+Cache invalidation shared by the worker processes on one host.
+
+Each worker binds a Unix datagram socket in CACHE_BUS_DIR. publish() runs
+the local handlers for the given keys and sends the keys to every other
+socket in the directory, whose receiver thread runs the same handlers.
+With a single worker there are no peers and publish() stays in-process.
+
+Keys are strings such as "venue_board" or "scores"; handlers subscribe to
+a key prefix.
+
+The default directory is private to the user and the app checkout, so two
+deployments on one host do not hear each other, and it is created 0700 so
+other local users cannot send invalidations.
+"""
+import hashlib
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_BYTES = 8192
+
+
+def _default_bus_dir() -> str:
+    app_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    deployment = hashlib.sha1(app_root.encode()).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"tournament-cache-bus-{os.getuid()}-{deployment}")
+
+
+class InvalidationBus:
+    def __init__(self, directory: Optional[str] = None):
+        # Resolved in start(); CACHE_BUS_DIR or a per-user default
+        self.directory = directory
+        self._handlers: Dict[str, List[Callable[[str], None]]] = {}
+        self._socket = None
+        self._path = None
+        self._thread = None
+
+    def subscribe(self, prefix: str, handler: Callable[[str], None]):
+        self._handlers.setdefault(prefix, []).append(handler)
+
+    def start(self):
+        """Binds this worker's socket; without AF_UNIX the bus stays in-process."""
+        if self._socket is not None or not hasattr(socket, "AF_UNIX") or not hasattr(os, "getuid"):
+            return
+        self.directory = self.directory or os.getenv("CACHE_BUS_DIR") or _default_bus_dir()
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        info = os.stat(self.directory)
+        if info.st_uid != os.getuid():
+            logger.warning(f"{self.directory} belongs to another user; cache invalidation stays in-process")
+            return
+        os.chmod(self.directory, 0o700)
+        self._path = os.path.join(self.directory, f"{os.getpid()}.sock")
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.bind(self._path)
+        self._thread = threading.Thread(target=self._listen, name="cache-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._socket is None:
+            return
+        sock, self._socket = self._socket, None
+        sock.close()
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+
+    def publish(self, *keys: str, local: bool = True):
+        """With local=False only peers are told, for a change this worker already applied."""
+        if local:
+            self._dispatch(keys)
+        if self._socket is None:
+            return
+
+        message = json.dumps(keys).encode()
+        if len(message) > MAX_MESSAGE_BYTES:
+            logger.warning(f"Invalidation message too large, dropping {len(keys)} keys")
+            return
+        for name in os.listdir(self.directory):
+            peer = os.path.join(self.directory, name)
+            if peer == self._path or not name.endswith(".sock"):
+                continue
+            try:
+                self._socket.sendto(message, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker is gone; clean up after it
+                try:
+                    os.unlink(peer)
+                except FileNotFoundError:
+                    pass
+            except OSError as e:
+                logger.warning(f"Could not send invalidation to {peer}: {e}")
+
+    def _listen(self):
+        while self._socket is not None:
+            try:
+                data = self._socket.recv(MAX_MESSAGE_BYTES)
+            except OSError:
+                return
+            try:
+                self._dispatch(json.loads(data))
+            except Exception as e:
+                logger.warning(f"Bad invalidation message: {e}")
+
+    def _dispatch(self, keys):
+        for key in keys:
+            for prefix, handlers in self._handlers.items():
+                if key.startswith(prefix):
+                    for handler in handlers:
+                        try:
+                            handler(key)
+                        except Exception as e:
+                            logger.warning(f"Invalidation handler for {key} failed: {e}")
+
+
+invalidation_bus = InvalidationBus()
+
+
+def publish_invalidation(*keys: str, local: bool = True):
+    invalidation_bus.publish(*keys, local=local)
@@ -0,0 +1,144 @@
+"""
+Optional MessagePack encoding for large read payloads.
+
+Clients that send `Accept: application/msgpack` get the payload as
+MessagePack with every UUID (id, event_id, player ids, ...) replaced by a
+reference into a table of 16-byte UUIDs sent once:
+
+    {"v": 1, "uuids": <bin, 16 bytes per UUID>, "data": <payload>}
+
+A reference is ext type 1 holding the table index as a big-endian
+unsigned int of 1, 2 or 4 bytes. decode_msgpack() is the reference
+decoder. Everyone else gets JSON as before.
+"""
+import re
+import uuid
+from datetime import date, datetime
+
+import msgpack
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+UUID_EXT = 1
+FORMAT_VERSION = 1
+
+_UUID_RE = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\Z")
+
+
+def prefers_msgpack(accept: str) -> bool:
+    """True if Accept lists MessagePack at least as high as JSON."""
+    weights = {}
+    for part in (accept or "").split(","):
+        media, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[media.strip().lower()] = q
+
+    msgpack_q = max(weights.get(t, 0.0) for t in MSGPACK_TYPES)
+    return msgpack_q > 0 and msgpack_q >= weights.get("application/json", 0.0)
+
+
+def _ext_index(index: int) -> msgpack.ExtType:
+    if index < 0x100:
+        return msgpack.ExtType(UUID_EXT, index.to_bytes(1, "big"))
+    if index < 0x10000:
+        return msgpack.ExtType(UUID_EXT, index.to_bytes(2, "big"))
+    return msgpack.ExtType(UUID_EXT, index.to_bytes(4, "big"))
+
+
+def encode_msgpack(payload) -> bytes:
+    # Canonical lowercase UUID string -> its ext reference, in table order
+    refs = {}
+    # Any string seen so far -> its reference, or None if it is no UUID
+    seen = {}
+
+    def ref(text: str):
+        key = text.lower()
+        ext = refs.get(key)
+        if ext is None:
+            ext = refs[key] = _ext_index(len(refs))
+        return ext
+
+    def maybe_ref(text: str):
+        if text in seen:
+            return seen[text]
+        ext = seen[text] = ref(text) if _UUID_RE.match(text) else None
+        return ext
+
+    def walk(value):
+        kind = type(value)
+        if kind is str:
+            if len(value) == 36:
+                return maybe_ref(value) or value
+            return value
+        if kind is dict:
+            # Rows are mostly flat, so scalars are handled inline
+            out = {}
+            for k, v in value.items():
+                vkind = type(v)
+                if vkind is str:
+                    if len(v) == 36:
+                        v = maybe_ref(v) or v
+                elif v is not None and vkind not in (int, float, bool):
+                    v = walk(v)
+                out[k] = v
+            return out
+        if kind is list or kind is tuple:
+            return [walk(v) for v in value]
+        if isinstance(value, uuid.UUID):
+            return ref(str(value))
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if hasattr(value, "model_dump"):
+            return walk(value.model_dump(mode="json"))
+        return value
+
+    data = walk(payload)
+    uuids = bytes.fromhex("".join(refs).replace("-", ""))
+    return msgpack.packb({"v": FORMAT_VERSION, "uuids": uuids, "data": data})
+
+
+class _UuidRef(int):
+    pass
+
+
+def decode_msgpack(body: bytes):
+    """Inverse of encode_msgpack, with UUIDs back as strings."""
+    def ext_hook(code, data):
+        if code != UUID_EXT:
+            return msgpack.ExtType(code, data)
+        return _UuidRef(int.from_bytes(data, "big"))
+
+    envelope = msgpack.unpackb(body, raw=False, strict_map_key=False, ext_hook=ext_hook)
+    table = envelope["uuids"]
+    uuids = [str(uuid.UUID(bytes=table[i:i + 16])) for i in range(0, len(table), 16)]
+
+    def resolve(value):
+        if isinstance(value, _UuidRef):
+            return uuids[value]
+        if isinstance(value, dict):
+            return {k: resolve(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [resolve(v) for v in value]
+        return value
+
+    return resolve(envelope["data"])
+
+
+def negotiated_response(payload, accept: str, status_code: int = 200) -> Response:
+    """MessagePack when the Accept header asks for it, JSON otherwise."""
+    if prefers_msgpack(accept):
+        return Response(
+            content=encode_msgpack(payload),
+            status_code=status_code,
+            media_type="application/msgpack",
+            headers={"Vary": "Accept"}
+        )
+    return JSONResponse(content=jsonable_encoder(payload), status_code=status_code, headers={"Vary": "Accept"})
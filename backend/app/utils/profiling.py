@@ -0,0 +1,190 @@
+"""
+Opt-in sampling profiler for individual API requests.
+
+Enabled only when PROFILE_TOKEN or PROFILE_SAMPLE_RATE is set; otherwise
+main.py never installs the middleware. A profiled request gets a sampler
+thread that snapshots the stacks of the threads serving it every
+PROFILE_INTERVAL_MS and writes them in folded-stack format
+(flamegraph.pl / speedscope) to PROFILE_DIR. Outgoing database calls show
+up as "[db] METHOD /path" frames.
+"""
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "api-profiles"))
+# Oldest profiles are deleted beyond this many
+MAX_PROFILES = 200
+
+PROFILE_HEADER = "x-profile-token"
+
+
+def profiling_enabled() -> bool:
+    return bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+
+def token_matches(value: Optional[str]) -> bool:
+    return bool(PROFILE_TOKEN) and value is not None and hmac.compare_digest(value, PROFILE_TOKEN)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _db_call_label(frame) -> Optional[str]:
+    """Annotates httpx sends, which every Supabase call goes through."""
+    if frame.f_code.co_name != "send" or "httpx" not in frame.f_code.co_filename:
+        return None
+    request = frame.f_locals.get("request")
+    url = getattr(request, "url", None)
+    if url is None:
+        return None
+    return f"[db] {request.method} {url.path}"
+
+
+class StackSampler(threading.Thread):
+    def __init__(self, scope: dict, loop_thread: int, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.scope = scope
+        self.loop_thread = loop_thread
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        # Set by the router once the request is matched to a route
+        endpoint = self.scope.get("endpoint")
+        endpoint_code = getattr(endpoint, "__code__", None)
+        names = {t.ident: t.name for t in threading.enumerate()}
+
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == self.ident:
+                continue
+
+            stack = []
+            in_endpoint = False
+            while frame is not None:
+                stack.append(frame)
+                in_endpoint = in_endpoint or frame.f_code is endpoint_code
+                frame = frame.f_back
+
+            if thread_id == self.loop_thread:
+                # The event loop waiting in select() is idle, not this request
+                if stack[0].f_code.co_filename.endswith("selectors.py"):
+                    continue
+            elif not in_endpoint:
+                # Worker threads count only while running this endpoint
+                continue
+
+            labels = [f"thread:{names.get(thread_id, thread_id)}"]
+            for f in reversed(stack):
+                labels.append(_frame_label(f).replace(";", ","))
+                db_call = _db_call_label(f)
+                if db_call:
+                    labels.append(db_call)
+            self.samples[";".join(labels)] += 1
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+
+    def _should_profile(self, scope) -> bool:
+        if scope["type"] != "http" or scope["path"].startswith("/api/debug"):
+            return False
+        headers = dict(scope.get("headers") or [])
+        token = headers.get(PROFILE_HEADER.encode())
+        if token is not None and token_matches(token.decode("latin-1")):
+            return True
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = _profile_id(scope["method"], scope["path"])
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        sampler = StackSampler(scope, threading.get_ident(), PROFILE_INTERVAL)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.stop()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            try:
+                _write_profile(profile_id, sampler.samples)
+                logger.info(f"Profiled {scope['method']} {scope['path']} in {elapsed_ms:.1f} ms: {profile_id}")
+            except OSError as e:
+                logger.warning(f"Could not save profile {profile_id}: {e}")
+
+
+def _profile_id(method: str, path: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", path).strip("-")[:60]
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    return f"{stamp}-{method.lower()}-{slug}-{uuid.uuid4().hex[:8]}"
+
+
+def _write_profile(profile_id: str, samples: Counter):
+    path = profile_path(profile_id)
+    with open(path, "w") as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+
+    profiles = list_profiles()
+    for old in profiles[MAX_PROFILES:]:
+        os.remove(profile_path(old["id"]))
+
+
+def profile_path(profile_id: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{profile_id}.folded")
+
+
+def list_profiles() -> List[dict]:
+    """Saved profiles, newest first."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in os.listdir(PROFILE_DIR):
+        if name.endswith(".folded"):
+            stat = os.stat(os.path.join(PROFILE_DIR, name))
+            profiles.append({
+                "id": name[:-len(".folded")],
+                "size_bytes": stat.st_size,
+                "created_at": datetime.utcfromtimestamp(stat.st_mtime).isoformat()
+            })
+    profiles.sort(key=lambda p: p["created_at"], reverse=True)
+    return profiles
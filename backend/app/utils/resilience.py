@@ -0,0 +1,497 @@
+"""
+Tail-latency protection for database calls.
+
+ResilientTransport wraps the pooled transport of the Supabase client, so
+every PostgREST call goes through it:
+
+- Deadlines: each call gets DB_READ_DEADLINE / DB_WRITE_DEADLINE seconds
+  in total, retries and hedges included.
+- Retries: reads (GET/HEAD) are retried on connection errors, timeouts
+  and 502/503/504 with full-jitter exponential backoff. Writes are only
+  retried when the connection was never made, so nothing is applied twice.
+- Hedging: once a query shape (table, filters, columns, page size) has a
+  p95, its reads run on a small pool while the caller waits. A read still
+  running after the p95 gets a duplicate (the hedge), and whichever answers
+  first wins. Hedges are capped at DB_HEDGE_BUDGET of reads so a slow
+  backend does not get twice the load; reads run inline when the pool
+  (DB_HEDGE_WORKERS) is busy.
+- Circuit breaker: after DB_BREAKER_FAILURES consecutive failures, or half
+  of the recent calls failing, calls fail fast for DB_BREAKER_RESET seconds,
+  then one probe decides whether to close it again. While it is open, GET
+  API requests are answered from the last good response for the same read
+  URL; StaleReadMiddleware marks such responses with `X-Served-From-Cache`.
+  Other requests (writes that read first, background jobs) never get
+  cached reads and fail fast instead.
+
+Routers turn the errors raised here into 503 / 504 with http_error().
+"""
+import math
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+import httpx
+from fastapi import HTTPException
+
+READ_DEADLINE = float(os.getenv("DB_READ_DEADLINE", "5"))
+WRITE_DEADLINE = float(os.getenv("DB_WRITE_DEADLINE", "10"))
+READ_RETRIES = int(os.getenv("DB_READ_RETRIES", "2"))
+RETRY_BASE_DELAY = float(os.getenv("DB_RETRY_BASE_DELAY", "0.05"))
+RETRY_MAX_DELAY = float(os.getenv("DB_RETRY_MAX_DELAY", "1"))
+HEDGE_ENABLED = os.getenv("DB_HEDGE_ENABLED", "true").lower() not in ("0", "false", "no")
+HEDGE_BUDGET = float(os.getenv("DB_HEDGE_BUDGET", "0.1"))
+HEDGE_WORKERS = int(os.getenv("DB_HEDGE_WORKERS", "32"))
+# Hedging waits for this many samples of a query shape before trusting its p95
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY = 0.01
+BREAKER_FAILURES = int(os.getenv("DB_BREAKER_FAILURES", "5"))
+BREAKER_RESET = float(os.getenv("DB_BREAKER_RESET", "10"))
+READ_CACHE_SIZE = int(os.getenv("DB_READ_CACHE_SIZE", "1000"))
+READ_CACHE_MAX_BYTES = int(os.getenv("DB_READ_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Larger bodies (big pages) are not cached; one would evict dozens of others
+READ_CACHE_MAX_ITEM_BYTES = int(os.getenv("DB_READ_CACHE_MAX_ITEM_BYTES", str(256 * 1024)))
+READ_CACHE_MAX_AGE = float(os.getenv("DB_READ_CACHE_MAX_AGE", "600"))
+
+RETRY_STATUSES = (502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+
+# Per API request, set by StaleReadMiddleware: whether reads may be served
+# from the cache, and the age of the oldest one that was
+_request_reads: ContextVar[Optional[dict]] = ContextVar("db_request_reads", default=None)
+
+
+def reads_were_stale() -> bool:
+    """True once a read of the current request was served from the cache."""
+    context = _request_reads.get()
+    return bool(context and context["stale_age"] is not None)
+
+
+class StaleReadMiddleware:
+    """Allows cached reads for GET requests and flags responses that used them."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        context = {"allow_stale": scope["method"] in IDEMPOTENT_METHODS, "stale_age": None}
+        token = _request_reads.set(context)
+
+        async def flagging_send(message):
+            if message["type"] == "http.response.start" and context["stale_age"] is not None:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-served-from-cache", f"{context['stale_age']:.0f}s".encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, flagging_send)
+        finally:
+            _request_reads.reset(token)
+
+
+class DatabaseUnavailable(Exception):
+    def __init__(self, message: str, retry_after: float = BREAKER_RESET):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def http_error(e: Exception) -> HTTPException:
+    """The HTTPException a router should raise for an unexpected error."""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, DatabaseUnavailable):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+    if isinstance(e, DeadlineExceeded):
+        return HTTPException(status_code=504, detail=str(e))
+    return HTTPException(status_code=500, detail=str(e))
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = BREAKER_FAILURES, reset_timeout: float = BREAKER_RESET, window: int = 20):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self.times_opened = 0
+        self._recent = deque(maxlen=window)
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            # Half-open: one probe at a time
+            if self._probing:
+                return False
+            self.state = "half_open"
+            self._probing = True
+            return True
+
+    def retry_after(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record(self, success: bool):
+        with self._lock:
+            self._recent.append(success)
+            if success:
+                self.consecutive_failures = 0
+                if self.state != "closed":
+                    self.state = "closed"
+                    self._recent.clear()
+                self._probing = False
+                return
+
+            self.consecutive_failures += 1
+            failures = self._recent.count(False)
+            window_full = len(self._recent) == self._recent.maxlen
+            if (
+                self.state == "half_open"
+                or self.consecutive_failures >= self.failure_threshold
+                or (window_full and failures * 2 >= len(self._recent))
+            ):
+                if self.state != "open":
+                    self.times_opened += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "recent_failure_rate": round(self._recent.count(False) / len(self._recent), 3) if self._recent else 0.0,
+                "times_opened": self.times_opened,
+                "retry_after_seconds": round(self.retry_after(), 1) if self.state == "open" else None
+            }
+
+    def is_open(self) -> bool:
+        """Open or probing; calls are not getting through normally."""
+        return self.state != "closed"
+
+
+class LatencyTracker:
+    """Recent successful call durations per query shape, for hedging thresholds."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._p95: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, key: str, seconds: float):
+        with self._lock:
+            samples = self._samples.setdefault(key, deque(maxlen=self.window))
+            samples.append(seconds)
+            # Re-sorting every sample is wasted work; p95 moves slowly
+            if len(samples) >= HEDGE_MIN_SAMPLES and len(samples) % 10 == 0:
+                ordered = sorted(samples)
+                self._p95[key] = ordered[int(len(ordered) * 0.95) - 1]
+
+    def p95(self, key: str) -> Optional[float]:
+        return self._p95.get(key)
+
+
+class ReadCache:
+    """
+    Last good response per read URL, served while the database is unhealthy.
+    Bounded by entry count and by total body bytes.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = READ_CACHE_SIZE,
+        max_age: float = READ_CACHE_MAX_AGE,
+        max_bytes: int = READ_CACHE_MAX_BYTES,
+        max_item_bytes: int = READ_CACHE_MAX_ITEM_BYTES
+    ):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, url: str, response: httpx.Response):
+        content = response.content
+        with self._lock:
+            previous = self._entries.pop(url, None)
+            if previous is not None:
+                self._bytes -= len(previous[3])
+            if len(content) > self.max_item_bytes:
+                return
+            self._entries[url] = (time.monotonic(), response.status_code, response.headers, content)
+            self._bytes += len(content)
+            while len(self._entries) > self.maxsize or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[3])
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._bytes
+
+    def get(self, request: httpx.Request) -> Optional[tuple]:
+        """(response, age in seconds) or None."""
+        with self._lock:
+            entry = self._entries.get(str(request.url))
+        if entry is None or time.monotonic() - entry[0] > self.max_age:
+            return None
+        stored_at, status, headers, content = entry
+        return httpx.Response(status, headers=headers, content=content, request=request), time.monotonic() - stored_at
+
+
+def _route_key(request: httpx.Request) -> str:
+    return f"{request.method} {request.url.path}"
+
+
+def _query_key(request: httpx.Request) -> str:
+    """
+    The route plus the query's shape: selected columns, order, page size
+    and each filter's operator, without filter values. A 1000-row page and
+    a single-row lookup on the same table get separate thresholds.
+    """
+    shape = []
+    for name, value in sorted(request.url.params.multi_items()):
+        if name in ("select", "order", "limit"):
+            shape.append(f"{name}={value}")
+        elif name != "offset":
+            shape.append(f"{name}={value.split('.', 1)[0]}")
+    return f"{_route_key(request)}?{'&'.join(shape)}"
+
+
+class ResilientTransport(httpx.BaseTransport):
+    def __init__(self, inner: httpx.BaseTransport):
+        self.inner = inner
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyTracker()
+        self.cache = ReadCache()
+        self._race_pool = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="db-hedge")
+        self._race_slots = threading.BoundedSemaphore(HEDGE_WORKERS)
+        self._lock = threading.Lock()
+        self._hedge_tokens = 10.0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.cache_hits = 0
+        self.deadline_exceeded = 0
+        self.fast_failures = 0
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        idempotent = request.method in IDEMPOTENT_METHODS
+        if not self.breaker.allow():
+            return self._unavailable(request, idempotent, "Database circuit is open; failing fast")
+
+        deadline = time.monotonic() + (READ_DEADLINE if idempotent else WRITE_DEADLINE)
+        attempts = 1 + (READ_RETRIES if idempotent else 0)
+        content = request.read()
+        last_error: Optional[Exception] = None
+        attempt = 0
+        while True:
+            try:
+                if idempotent:
+                    response = self._read(request, content, deadline)
+                else:
+                    response = self._attempt(request, content, deadline)
+            except httpx.ConnectError as e:
+                # Never reached the server, so even a write is safe to resend
+                last_error = e
+                attempts = max(attempts, 1 + READ_RETRIES)
+            except (httpx.TransportError, DeadlineExceeded) as e:
+                last_error = e
+            except Exception:
+                # Also ends a half-open probe, which would otherwise stay taken
+                self.breaker.record(False)
+                raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    self.breaker.record(True)
+                    if idempotent and response.is_success:
+                        self.cache.put(str(request.url), response)
+                    return response
+                last_error = None
+                if not idempotent:
+                    self.breaker.record(False)
+                    return response
+
+            attempt += 1
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+            # A probe gets one attempt; other calls stop once the circuit opens
+            if attempt >= attempts or time.monotonic() + delay >= deadline or self.breaker.is_open():
+                break
+            with self._lock:
+                self.retries += 1
+            time.sleep(delay)
+
+        # One outcome per call, however many attempts it took
+        self.breaker.record(False)
+        if last_error is None:
+            # Retries used up on 5xx answers; let the client report them
+            cached = self._stale(request, idempotent)
+            return cached if cached is not None else response
+        if isinstance(last_error, DeadlineExceeded):
+            with self._lock:
+                self.deadline_exceeded += 1
+            cached = self._stale(request, idempotent)
+            if cached is not None:
+                return cached
+            raise last_error
+        return self._unavailable(request, idempotent, f"Database unavailable: {last_error}")
+
+    def _unavailable(self, request: httpx.Request, idempotent: bool, message: str) -> httpx.Response:
+        cached = self._stale(request, idempotent)
+        if cached is not None:
+            return cached
+        with self._lock:
+            self.fast_failures += 1
+        raise DatabaseUnavailable(message, retry_after=self.breaker.retry_after() or 1)
+
+    def _stale(self, request: httpx.Request, idempotent: bool) -> Optional[httpx.Response]:
+        """
+        The last good response, only while the circuit is open and only
+        for an API request that allows it; the request is marked stale.
+        """
+        context = _request_reads.get()
+        if not idempotent or context is None or not context["allow_stale"] or not self.breaker.is_open():
+            return None
+        hit = self.cache.get(request)
+        if hit is None:
+            return None
+        response, age = hit
+        context["stale_age"] = max(context["stale_age"] or 0.0, age)
+        with self._lock:
+            self.cache_hits += 1
+        return response
+
+    def _attempt(self, request: httpx.Request, content: bytes, deadline: float) -> httpx.Response:
+        """One call with every timeout capped at the time left; the body is read here."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Database call exceeded its deadline: {_route_key(request)}")
+        timeout = dict(request.extensions.get("timeout") or {})
+        for phase in ("connect", "read", "write", "pool"):
+            timeout[phase] = min(timeout.get(phase) or remaining, remaining)
+        attempt_request = httpx.Request(
+            request.method,
+            request.url,
+            headers=request.headers,
+            content=content or None,
+            extensions={**request.extensions, "timeout": timeout}
+        )
+
+        started = time.monotonic()
+        try:
+            response = self.inner.handle_request(attempt_request)
+        except httpx.TimeoutException as e:
+            if time.monotonic() >= deadline:
+                raise DeadlineExceeded(f"Database call exceeded its deadline: {_route_key(request)}") from e
+            raise
+        try:
+            body = b"".join(response.iter_raw())
+        except httpx.StreamConsumed:
+            # In-memory responses (e.g. httpx.MockTransport) come pre-read
+            body = response.content
+        except httpx.TimeoutException as e:
+            raise DeadlineExceeded(f"Database call exceeded its deadline: {_route_key(request)}") from e
+        finally:
+            response.close()
+        self.latency.observe(_query_key(request), time.monotonic() - started)
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            content=body,
+            request=request,
+            extensions={k: v for k, v in response.extensions.items() if k in ("http_version", "reason_phrase")}
+        )
+
+    def _hedge_budget_left(self) -> bool:
+        with self._lock:
+            # Hedges spend a token, refilled by HEDGE_BUDGET per read
+            self._hedge_tokens = min(10.0, self._hedge_tokens + HEDGE_BUDGET)
+            return self._hedge_tokens >= 1
+
+    def _spend_hedge_token(self) -> bool:
+        with self._lock:
+            if self._hedge_tokens < 1:
+                return False
+            self._hedge_tokens -= 1
+            self.hedges += 1
+            return True
+
+    def _submit(self, request: httpx.Request, content: bytes, deadline: float):
+        """The attempt running on the race pool, or None when the pool is full."""
+        if not self._race_slots.acquire(blocking=False):
+            return None
+        try:
+            future = self._race_pool.submit(self._attempt, request, content, deadline)
+        except RuntimeError:
+            # Pool shut down
+            self._race_slots.release()
+            return None
+        future.add_done_callback(lambda _: self._race_slots.release())
+        return future
+
+    def _read(self, request: httpx.Request, content: bytes, deadline: float) -> httpx.Response:
+        p95 = self.latency.p95(_query_key(request)) if HEDGE_ENABLED else None
+        primary = self._submit(request, content, deadline) if p95 is not None and self._hedge_budget_left() else None
+        if primary is None:
+            return self._attempt(request, content, deadline)
+
+        try:
+            return primary.result(timeout=max(p95, HEDGE_MIN_DELAY))
+        except FutureTimeout:
+            pass
+        hedge = self._submit(request, content, deadline) if self._spend_hedge_token() else None
+        if hedge is None:
+            # Both attempts cap their timeouts at the deadline
+            return primary.result()
+
+        done, _ = wait((primary, hedge), return_when=FIRST_COMPLETED)
+        winner = primary if primary in done else hedge
+        loser = hedge if winner is primary else primary
+        if winner.exception() is not None:
+            # A failed attempt does not win while the other can still answer
+            winner, loser = loser, winner
+        response = winner.result()
+        # A loser already sending cannot be stopped; its answer is dropped
+        loser.cancel()
+        if winner is hedge:
+            with self._lock:
+                self.hedge_wins += 1
+        return response
+
+    def metrics(self) -> dict:
+        metrics = self.inner.metrics() if hasattr(self.inner, "metrics") else {}
+        with self._lock:
+            metrics.update({
+                "retries": self.retries,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "served_from_cache": self.cache_hits,
+                "read_cache_bytes": self.cache.size_bytes(),
+                "deadline_exceeded": self.deadline_exceeded,
+                "fast_failures": self.fast_failures
+            })
+        return metrics
+
+    def close(self):
+        self._race_pool.shutdown(wait=False)
+        self.inner.close()
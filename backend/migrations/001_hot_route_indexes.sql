@@ -0,0 +1,28 @@
+-- Composite and partial indexes matching the filters of the hot routes.
+-- Run in the Supabase SQL Editor on databases created from an earlier
+-- supabase_schema.sql (new databases already include these).
+
+-- update_score progression / create_schedule: event_id + round + status
+CREATE INDEX IF NOT EXISTS idx_matches_event_round_status ON matches(event_id, round, status);
+
+-- get_fixtures: unplayed matches of an event in round order
+CREATE INDEX IF NOT EXISTS idx_matches_event_open_round ON matches(event_id, round)
+    WHERE status IN ('pending', 'bye');
+
+-- get_court_schedule: court (+ event) ordered by start_time
+CREATE INDEX IF NOT EXISTS idx_matches_court_event_start ON matches(court_id, event_id, start_time);
+CREATE INDEX IF NOT EXISTS idx_matches_court_start ON matches(court_id, start_time)
+    WHERE status <> 'bye';
+
+-- venue board: scheduled, unfinished matches by start time
+CREATE INDEX IF NOT EXISTS idx_matches_pending_start ON matches(start_time)
+    WHERE status = 'pending' AND court_id IS NOT NULL;
+
+-- verify_match_code: (match_id, code) answered from the index alone
+CREATE INDEX IF NOT EXISTS idx_match_codes_match_code ON match_codes(match_id, code);
+
+-- Covered by the composites above (leading column) or too unselective to use
+DROP INDEX IF EXISTS idx_matches_event;
+DROP INDEX IF EXISTS idx_matches_round;
+DROP INDEX IF EXISTS idx_matches_status;
+DROP INDEX IF EXISTS idx_matches_court;
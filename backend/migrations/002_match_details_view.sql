@@ -0,0 +1,14 @@
+-- Matches with player names and match code embedded, so read routes need
+-- one query instead of matches + players + match_codes.
+-- security_invoker keeps the RLS policies of the underlying tables.
+
+CREATE OR REPLACE VIEW match_details WITH (security_invoker = on) AS
+SELECT
+    m.*,
+    p1.name AS player1_name,
+    p2.name AS player2_name,
+    mc.code AS match_code
+FROM matches m
+LEFT JOIN players p1 ON p1.id = m.player1_id
+LEFT JOIN players p2 ON p2.id = m.player2_id
+LEFT JOIN match_codes mc ON mc.match_id = m.id;
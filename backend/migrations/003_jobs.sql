@@ -0,0 +1,17 @@
+-- Background jobs started with ?async=true on CSV import, fixture
+-- generation and scheduling.
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id UUID PRIMARY KEY,
+    type TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    progress REAL NOT NULL DEFAULT 0,
+    result JSONB,
+    error JSONB,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+ALTER TABLE jobs ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow all operations on jobs" ON jobs FOR ALL USING (true);
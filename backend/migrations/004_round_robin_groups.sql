@@ -0,0 +1,37 @@
+-- Round-robin and group-stage events.
+
+ALTER TABLE events ADD COLUMN IF NOT EXISTS num_groups INT;
+ALTER TABLE events ADD COLUMN IF NOT EXISTS advance_per_group INT DEFAULT 2;
+ALTER TABLE matches ADD COLUMN IF NOT EXISTS group_number INT;
+
+CREATE TABLE IF NOT EXISTS group_standings (
+    event_id UUID REFERENCES events(id) ON DELETE CASCADE,
+    group_number INT NOT NULL,
+    player_id UUID REFERENCES players(id) ON DELETE CASCADE,
+    played INT NOT NULL DEFAULT 0,
+    wins INT NOT NULL DEFAULT 0,
+    losses INT NOT NULL DEFAULT 0,
+    sets_won INT NOT NULL DEFAULT 0,
+    sets_lost INT NOT NULL DEFAULT 0,
+    points INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (event_id, player_id)
+);
+
+ALTER TABLE group_standings ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow all operations on group_standings" ON group_standings FOR ALL USING (true);
+
+-- "Are all group matches done?" check in update_score
+CREATE INDEX IF NOT EXISTS idx_matches_event_group_status ON matches(event_id, status) WHERE group_number IS NOT NULL;
+
+-- m.* was expanded when the view was created; rebuild it to pick up group_number
+DROP VIEW IF EXISTS match_details;
+CREATE VIEW match_details WITH (security_invoker = on) AS
+SELECT
+    m.*,
+    p1.name AS player1_name,
+    p2.name AS player2_name,
+    mc.code AS match_code
+FROM matches m
+LEFT JOIN players p1 ON p1.id = m.player1_id
+LEFT JOIN players p2 ON p2.id = m.player2_id
+LEFT JOIN match_codes mc ON mc.match_id = m.id;
@@ -0,0 +1,35 @@
+-- Append-only change log behind GET /api/events/{event_id}/changes.
+-- version is the sync cursor clients send back as ?since=.
+
+CREATE TABLE IF NOT EXISTS event_changes (
+    version BIGSERIAL PRIMARY KEY,
+    event_id UUID REFERENCES events(id) ON DELETE CASCADE,
+    entity TEXT NOT NULL,
+    entity_id UUID NOT NULL,
+    op TEXT NOT NULL DEFAULT 'upsert',
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE event_changes ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow all operations on event_changes" ON event_changes FOR ALL USING (true);
+
+-- Feed reads: entries of one event above a version
+CREATE INDEX IF NOT EXISTS idx_event_changes_event_version ON event_changes(event_id, version);
+-- Compaction: newest entry per entity
+CREATE INDEX IF NOT EXISTS idx_event_changes_entity ON event_changes(event_id, entity, entity_id, version);
+
+-- Keeps only the newest entry per (entity, entity_id) of an event
+CREATE OR REPLACE FUNCTION compact_event_changes(p_event_id UUID) RETURNS INT
+LANGUAGE sql AS $$
+    WITH removed AS (
+        DELETE FROM event_changes old
+        USING event_changes newer
+        WHERE old.event_id = p_event_id
+          AND newer.event_id = old.event_id
+          AND newer.entity = old.entity
+          AND newer.entity_id = old.entity_id
+          AND newer.version > old.version
+        RETURNING 1
+    )
+    SELECT count(*)::INT FROM removed;
+$$;
@@ -0,0 +1,3 @@
+-- Player search refreshes its in-memory index with players created since
+-- its last load.
+CREATE INDEX IF NOT EXISTS idx_players_created ON players(created_at);
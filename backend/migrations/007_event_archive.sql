@@ -0,0 +1,124 @@
+-- Archive of finished events. archive_event() moves an event's matches,
+-- scores, match codes and registrations out of the hot tables in one
+-- transaction, so the hot tables only hold events still being played.
+
+ALTER TABLE events ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP WITH TIME ZONE;
+
+CREATE TABLE IF NOT EXISTS matches_archive (
+    id UUID PRIMARY KEY,
+    event_id UUID REFERENCES events(id) ON DELETE CASCADE,
+    round INT NOT NULL,
+    group_number INT,
+    bracket_position INT,
+    player1_id UUID REFERENCES players(id) ON DELETE CASCADE,
+    player2_id UUID REFERENCES players(id) ON DELETE CASCADE,
+    court_id TEXT,
+    start_time TIMESTAMP WITH TIME ZONE,
+    end_time TIMESTAMP WITH TIME ZONE,
+    status TEXT,
+    created_at TIMESTAMP WITH TIME ZONE
+);
+
+-- match_id references matches_archive so PostgREST can embed it like scores -> matches
+CREATE TABLE IF NOT EXISTS scores_archive (
+    match_id UUID PRIMARY KEY REFERENCES matches_archive(id) ON DELETE CASCADE,
+    player1_score INT NOT NULL,
+    player2_score INT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE TABLE IF NOT EXISTS match_codes_archive (
+    match_id UUID PRIMARY KEY REFERENCES matches_archive(id) ON DELETE CASCADE,
+    code TEXT NOT NULL,
+    assigned_umpire TEXT NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE TABLE IF NOT EXISTS player_events_archive (
+    player_id UUID REFERENCES players(id) ON DELETE CASCADE,
+    event_id UUID REFERENCES events(id) ON DELETE CASCADE,
+    PRIMARY KEY (player_id, event_id)
+);
+
+ALTER TABLE matches_archive ENABLE ROW LEVEL SECURITY;
+ALTER TABLE scores_archive ENABLE ROW LEVEL SECURITY;
+ALTER TABLE match_codes_archive ENABLE ROW LEVEL SECURITY;
+ALTER TABLE player_events_archive ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow all operations on matches_archive" ON matches_archive FOR ALL USING (true);
+CREATE POLICY "Allow all operations on scores_archive" ON scores_archive FOR ALL USING (true);
+CREATE POLICY "Allow all operations on match_codes_archive" ON match_codes_archive FOR ALL USING (true);
+CREATE POLICY "Allow all operations on player_events_archive" ON player_events_archive FOR ALL USING (true);
+
+-- Archived reads are by event (exports, leaderboards) or by court history
+CREATE INDEX IF NOT EXISTS idx_matches_archive_event_round ON matches_archive(event_id, round);
+CREATE INDEX IF NOT EXISTS idx_matches_archive_court_start ON matches_archive(court_id, start_time);
+CREATE INDEX IF NOT EXISTS idx_player_events_archive_event ON player_events_archive(event_id);
+-- Latest active event for the leaderboard
+CREATE INDEX IF NOT EXISTS idx_events_active_created ON events(created_at) WHERE archived_at IS NULL;
+
+CREATE OR REPLACE VIEW match_details_archive WITH (security_invoker = on) AS
+SELECT
+    m.*,
+    p1.name AS player1_name,
+    p2.name AS player2_name,
+    mc.code AS match_code
+FROM matches_archive m
+LEFT JOIN players p1 ON p1.id = m.player1_id
+LEFT JOIN players p2 ON p2.id = m.player2_id
+LEFT JOIN match_codes_archive mc ON mc.match_id = m.id;
+
+CREATE OR REPLACE FUNCTION archive_event(p_event_id UUID) RETURNS JSON
+LANGUAGE plpgsql AS $$
+DECLARE
+    moved_matches INT;
+    moved_scores INT;
+    moved_codes INT;
+    moved_registrations INT;
+BEGIN
+    -- Lock the event so two archive calls cannot interleave
+    PERFORM 1 FROM events WHERE id = p_event_id AND archived_at IS NULL FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Event % not found or already archived', p_event_id USING ERRCODE = 'no_data_found';
+    END IF;
+    IF EXISTS (SELECT 1 FROM matches WHERE event_id = p_event_id AND status = 'pending') THEN
+        RAISE EXCEPTION 'Event % still has pending matches', p_event_id USING ERRCODE = 'check_violation';
+    END IF;
+
+    INSERT INTO matches_archive (id, event_id, round, group_number, bracket_position, player1_id, player2_id,
+                                 court_id, start_time, end_time, status, created_at)
+    SELECT id, event_id, round, group_number, bracket_position, player1_id, player2_id,
+           court_id, start_time, end_time, status, created_at
+    FROM matches WHERE event_id = p_event_id;
+    GET DIAGNOSTICS moved_matches = ROW_COUNT;
+
+    INSERT INTO scores_archive (match_id, player1_score, player2_score, created_at, updated_at)
+    SELECT s.match_id, s.player1_score, s.player2_score, s.created_at, s.updated_at
+    FROM scores s JOIN matches m ON m.id = s.match_id WHERE m.event_id = p_event_id;
+    GET DIAGNOSTICS moved_scores = ROW_COUNT;
+
+    INSERT INTO match_codes_archive (match_id, code, assigned_umpire, expires_at, created_at)
+    SELECT c.match_id, c.code, c.assigned_umpire, c.expires_at, c.created_at
+    FROM match_codes c JOIN matches m ON m.id = c.match_id WHERE m.event_id = p_event_id;
+    GET DIAGNOSTICS moved_codes = ROW_COUNT;
+
+    INSERT INTO player_events_archive (player_id, event_id)
+    SELECT player_id, event_id FROM player_events WHERE event_id = p_event_id;
+    GET DIAGNOSTICS moved_registrations = ROW_COUNT;
+
+    -- scores and match_codes go with their matches (ON DELETE CASCADE)
+    DELETE FROM matches WHERE event_id = p_event_id;
+    DELETE FROM player_events WHERE event_id = p_event_id;
+    -- Nothing left to sync for an archived event
+    DELETE FROM event_changes WHERE event_id = p_event_id;
+    UPDATE events SET archived_at = now() WHERE id = p_event_id;
+
+    RETURN json_build_object(
+        'matches', moved_matches,
+        'scores', moved_scores,
+        'match_codes', moved_codes,
+        'player_events', moved_registrations
+    );
+END;
+$$;
@@ -0,0 +1,26 @@
+-- Concurrent results in a group stage: standings are changed by deltas in
+-- the database instead of read-modify-write, and a knockout round slot can
+-- only be created once, so two "last group match" submissions (or two
+-- results completing the same knockout round) cannot insert it twice.
+
+-- Fails if a race already duplicated a knockout round; delete the extra
+-- matches before applying.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_matches_knockout_slot
+    ON matches(event_id, round, bracket_position) WHERE group_number IS NULL;
+
+-- p_rows: [{player_id, group_number, played, wins, losses, sets_won, sets_lost}] deltas
+CREATE OR REPLACE FUNCTION apply_group_results(p_event_id UUID, p_rows JSON) RETURNS VOID
+LANGUAGE sql AS $$
+    INSERT INTO group_standings AS g (event_id, group_number, player_id, played, wins, losses, sets_won, sets_lost, points)
+    SELECT p_event_id, r.group_number, r.player_id, r.played, r.wins, r.losses, r.sets_won, r.sets_lost, r.wins * 3 + r.sets_won
+    FROM json_to_recordset(p_rows)
+        AS r(player_id UUID, group_number INT, played INT, wins INT, losses INT, sets_won INT, sets_lost INT)
+    ON CONFLICT (event_id, player_id) DO UPDATE SET
+        played = g.played + EXCLUDED.played,
+        wins = g.wins + EXCLUDED.wins,
+        losses = g.losses + EXCLUDED.losses,
+        sets_won = g.sets_won + EXCLUDED.sets_won,
+        sets_lost = g.sets_lost + EXCLUDED.sets_lost,
+        -- Same formula as the leaderboard
+        points = (g.wins + EXCLUDED.wins) * 3 + g.sets_won + EXCLUDED.sets_won;
+$$;
@@ -0,0 +1,35 @@
+"""
+Moves finished events to the archive tables.
+
+An event is archived once it is older than --days (ARCHIVE_AFTER_DAYS,
+default 14), has at least one match and none pending. Meant to run from
+cron; each event is archived in its own transaction.
+
+Run from the backend directory:
+    python -m scripts.archive_events [--days 14] [--dry-run]
+"""
+import argparse
+
+from app.services.archive import ARCHIVE_AFTER_DAYS, archivable_event_ids, archive_event
+from app.utils.database import get_supabase
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    supabase = get_supabase()
+    event_ids = archivable_event_ids(supabase, args.days)
+    print(f"{len(event_ids)} event(s) to archive")
+    for event_id in event_ids:
+        if args.dry_run:
+            print(f"would archive {event_id}")
+            continue
+        moved = archive_event(supabase, event_id)
+        print(f"archived {event_id}: {moved}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+-- Active-event query times with several seasons in the hot tables, then
+-- again after archiving every finished event. Runs in one transaction that
+-- is rolled back; point it at a scratch copy of the database with the
+-- schema and migrations applied:
+--
+--     psql "$DATABASE_URL" -f scripts/benchmark_archive.sql > archive_plans.txt
+
+\set ON_ERROR_STOP on
+\pset pager off
+\timing on
+
+BEGIN;
+
+-- 3 seasons x 40 finished events x 512-player draws, plus 2 live events
+INSERT INTO events (id, name, created_at)
+SELECT gen_random_uuid(), 'archive-bench-' || g, now() - (g || ' days')::interval
+FROM generate_series(0, 121) g;
+
+INSERT INTO players (id, name, age, phone)
+SELECT gen_random_uuid(), 'Archive Player ' || g, 18 + g % 30, '556' || g
+FROM generate_series(1, 20000) g;
+
+CREATE TEMP TABLE seed_players AS
+SELECT id, row_number() OVER () AS n FROM players WHERE name LIKE 'Archive Player %';
+CREATE INDEX ON seed_players(n);
+ANALYZE seed_players;
+
+CREATE TEMP TABLE seed_events AS
+SELECT id, row_number() OVER (ORDER BY created_at DESC) AS n FROM events WHERE name LIKE 'archive-bench-%';
+
+-- Events 1-2 are live: rounds past the first still pending
+INSERT INTO matches (id, event_id, round, bracket_position, player1_id, player2_id, court_id, start_time, end_time, status)
+SELECT gen_random_uuid(), e.id, r.round, pos,
+       (SELECT id FROM seed_players WHERE n = 1 + (e.n * 256 + pos * 2) % 20000),
+       (SELECT id FROM seed_players WHERE n = 1 + (e.n * 256 + pos * 2 + 1) % 20000),
+       'Court-' || (1 + pos % 12),
+       now() - ((e.n - 1) || ' days')::interval + ((r.round * 60 + pos % 40 * 30) || ' minutes')::interval,
+       now() - ((e.n - 1) || ' days')::interval + ((r.round * 60 + pos % 40 * 30 + 30) || ' minutes')::interval,
+       CASE WHEN e.n > 2 OR r.round = 1 THEN 'completed' ELSE 'pending' END
+FROM seed_events e
+CROSS JOIN LATERAL (SELECT g AS round, 256 >> (g - 1) AS width FROM generate_series(1, 9) g) r
+CROSS JOIN LATERAL generate_series(0, r.width - 1) pos;
+
+INSERT INTO scores (match_id, player1_score, player2_score)
+SELECT id, 2, bracket_position % 2 FROM matches
+WHERE status = 'completed' AND event_id IN (SELECT id FROM seed_events);
+
+INSERT INTO match_codes (match_id, code, assigned_umpire, expires_at)
+SELECT id, upper(substr(md5(id::text), 1, 6)), 'Not Assigned', now() + interval '1 day'
+FROM matches WHERE event_id IN (SELECT id FROM seed_events);
+
+ANALYZE events, players, matches, scores, match_codes;
+
+SELECT id AS event_id FROM seed_events WHERE n = 1 \gset
+
+\echo '######## before archiving'
+\i scripts/benchmark_archive_queries.sql
+
+\echo '######## archiving finished events'
+SELECT count(*) AS archived
+FROM (SELECT archive_event(id) FROM seed_events WHERE n > 2 ORDER BY n) a;
+
+ANALYZE events, matches, scores, match_codes, matches_archive, scores_archive, match_codes_archive;
+
+\echo '######## after archiving'
+\i scripts/benchmark_archive_queries.sql
+
+\echo '== archived export: matches of one finished event'
+SELECT id AS old_event_id FROM seed_events WHERE n = 100 \gset
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM match_details_archive WHERE event_id = :'old_event_id';
+
+ROLLBACK;
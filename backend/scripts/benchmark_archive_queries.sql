@@ -0,0 +1,25 @@
+-- Active-event queries timed by benchmark_archive.sql; expects :event_id.
+
+\echo '== get_fixtures: open matches of the live event'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM match_details
+WHERE event_id = :'event_id' AND status IN ('pending', 'bye')
+ORDER BY round, bracket_position;
+
+\echo '== get_court_schedule: court across active events'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM match_details WHERE court_id = 'Court-3' AND status <> 'bye' ORDER BY start_time;
+
+\echo '== venue board refresh'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM match_details
+WHERE status = 'pending' AND court_id IS NOT NULL
+  AND start_time >= now() - interval '12 hours' AND start_time < now() + interval '24 hours';
+
+\echo '== stats cache version'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT updated_at FROM scores ORDER BY updated_at DESC LIMIT 1;
+
+\echo '== leaderboard: latest active event'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM events WHERE archived_at IS NULL ORDER BY created_at DESC LIMIT 1;
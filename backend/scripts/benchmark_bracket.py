@@ -0,0 +1,79 @@
+"""
+Bracket placement benchmark.
+
+Compares the previous neighbour-pairing fixture generator with the seeded
+placement in app.services.bracket on time and same-club conflicts.
+
+Run from the backend directory:
+    python -m scripts.benchmark_bracket
+"""
+import random
+import time
+import uuid
+
+from app.services.bracket import generate_knockout_fixtures
+from app.services.bracket import club_conflicts, next_power_of_two
+
+
+def legacy_generate_knockout_fixtures(players, event_id):
+    """The generator before bracket placement, kept for comparison."""
+    n = len(players)
+    byes_needed = next_power_of_two(n) - n
+    random.shuffle(players)
+
+    club_groups = {}
+    for player in players:
+        club_groups.setdefault(player['club_id'], []).append(player)
+
+    arranged_players = [g[0] for g in club_groups.values() if len(g) == 1]
+    for club_players in club_groups.values():
+        if len(club_players) > 1:
+            arranged_players.extend(club_players)
+
+    matches = []
+    for player in arranged_players[:byes_needed]:
+        matches.append({"round": 1, "player1_id": player['id'], "player2_id": None, "status": "bye"})
+    rest = arranged_players[byes_needed:]
+    for i in range(0, len(rest) - 1, 2):
+        matches.append({"round": 1, "player1_id": rest[i]['id'], "player2_id": rest[i + 1]['id'], "status": "pending"})
+    return matches
+
+
+def make_players(n, num_clubs):
+    # Skewed club sizes: a few big clubs and a long tail of small ones
+    weights = [1 / (rank + 1) for rank in range(num_clubs)]
+    clubs = random.choices(range(num_clubs), weights=weights, k=n)
+    return [{"id": str(uuid.uuid4()), "club_id": f"club-{c}"} for c in clubs]
+
+
+def slots_from_matches(matches, players):
+    """Rounds pair match winners in list order, so the list is the draw."""
+    by_id = {p['id']: p for p in players}
+    slots = []
+    for m in matches:
+        slots.append(by_id[m['player1_id']])
+        slots.append(by_id.get(m['player2_id']))
+    return slots
+
+
+def run(generator, players):
+    start = time.perf_counter()
+    matches = generator(list(players), "event")
+    elapsed = time.perf_counter() - start
+    return elapsed, club_conflicts(slots_from_matches(matches, players))
+
+
+def main():
+    random.seed(42)
+    print(f"{'players':>8} {'clubs':>6} {'impl':>8} {'ms':>9} {'r1 clash':>9} {'early clash':>12}")
+    for n, num_clubs in [(64, 8), (256, 20), (1000, 40), (4096, 120)]:
+        players = make_players(n, num_clubs)
+        for name, generator in [("legacy", legacy_generate_knockout_fixtures), ("seeded", generate_knockout_fixtures)]:
+            elapsed, conflicts = run(generator, players)
+            # Clashes before the final two rounds are the ones organisers notice
+            early = sum(conflicts[:-2])
+            print(f"{n:>8} {num_clubs:>6} {name:>8} {elapsed * 1000:>9.2f} {conflicts[0]:>9} {early:>12}")
+
+
+if __name__ == "__main__":
+    main()
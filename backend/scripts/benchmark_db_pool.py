@@ -0,0 +1,78 @@
+"""
+Connection reuse benchmark for the database client.
+
+Starts the local stand-in PostgREST (scripts/standin_postgrest.py) in its
+own process, charging a fixed delay per new connection in place of a
+TCP + TLS handshake, then drives it with the Supabase client through:
+  - the pooled keep-alive transport from app.utils.http_pool
+  - the same transport with keep-alive disabled (a new connection per call)
+
+Client-side encoding/parsing caps one process at a few hundred calls per
+second, so high --threads values measure queueing on the GIL rather than
+the network.
+
+Run from the backend directory:
+    python -m scripts.benchmark_db_pool [--handshake-ms 20] [--threads 4] [--requests 2000]
+"""
+import argparse
+import multiprocessing
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from supabase import create_client, ClientOptions
+
+from app.utils.http_pool import build_http_client
+from scripts.standin_postgrest import FAKE_KEY, serve
+
+
+def run(url: str, http_client, threads: int, requests: int):
+    client = create_client(url, FAKE_KEY, options=ClientOptions(httpx_client=http_client))
+
+    def call(_):
+        started = time.perf_counter()
+        client.table("players").select("*").execute()
+        return (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(call, range(threads)))  # warm up
+        started = time.perf_counter()
+        latencies = sorted(pool.map(call, range(requests)))
+        elapsed = time.perf_counter() - started
+
+    metrics = http_client._transport.metrics()
+    http_client.close()
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "p50": quantiles[49],
+        "p99": quantiles[98],
+        "rps": requests / elapsed,
+        "peak_in_flight": metrics["peak_in_flight"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--handshake-ms", type=float, default=20)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port_queue, args.handshake_ms / 1000), daemon=True)
+    server.start()
+    url = f"http://127.0.0.1:{port_queue.get()}"
+
+    print(f"{'transport':>12} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    for name, overrides in [
+        ("pooled", {"http2": False}),
+        ("no-reuse", {"http2": False, "max_keepalive_connections": 0, "keepalive_expiry": 0}),
+    ]:
+        result = run(url, build_http_client(**overrides), args.threads, args.requests)
+        print(f"{name:>12} {result['p50']:>8.2f} {result['p99']:>8.2f} {result['rps']:>8.0f}")
+
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
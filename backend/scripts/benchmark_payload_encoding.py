@@ -0,0 +1,88 @@
+"""
+Payload encoding benchmark.
+
+Encodes a 512-match /fixtures payload as JSON and as MessagePack with
+UUID references, each raw, gzip and brotli compressed, and reports the
+bytes on the wire and the encode CPU time per response.
+
+Run from the backend directory:
+    python -m scripts.benchmark_payload_encoding
+"""
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from app.utils.compression import compress
+from app.utils.negotiation import decode_msgpack, encode_msgpack
+
+SYLLABLES = ["an", "ar", "ba", "de", "el", "ha", "ik", "ja", "ka", "li", "ma", "na", "or", "pa", "ra", "sh", "ti", "va"]
+
+
+def make_fixtures(num_matches=512, num_players=600, num_courts=16):
+    event_id = str(uuid.uuid4())
+    players = [
+        (str(uuid.uuid4()), " ".join("".join(random.choices(SYLLABLES, k=3)).capitalize() for _ in range(2)))
+        for _ in range(num_players)
+    ]
+    start = datetime(2026, 5, 1, 9, 0)
+    fixtures = {}
+    for i in range(num_matches):
+        (p1_id, p1_name), (p2_id, p2_name) = random.sample(players, 2)
+        round_num = 1 + i // 128
+        begins = start + timedelta(minutes=30 * (i // num_courts))
+        fixtures.setdefault(round_num, []).append({
+            "id": str(uuid.uuid4()),
+            "event_id": event_id,
+            "round": round_num,
+            "group_number": None,
+            "bracket_position": i % 128,
+            "player1_id": p1_id,
+            "player2_id": p2_id,
+            "court_id": f"Court-{i % num_courts + 1}",
+            "start_time": begins.isoformat(),
+            "end_time": (begins + timedelta(minutes=30)).isoformat(),
+            "status": "pending",
+            "created_at": start.isoformat(),
+            "player1_name": p1_name,
+            "player2_name": p2_name
+        })
+    return {"event_id": event_id, "event_name": "Benchmark Open", "fixtures": fixtures}
+
+
+def encode_json(payload):
+    # Same settings as FastAPI's JSONResponse
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def timed(fn, repeat=30):
+    times = []
+    for _ in range(repeat):
+        start = time.process_time()
+        result = fn()
+        times.append(time.process_time() - start)
+    times.sort()
+    return result, times[len(times) // 2] * 1000
+
+
+def main():
+    random.seed(42)
+    payload = make_fixtures()
+    assert decode_msgpack(encode_msgpack(payload))["fixtures"][1] == payload["fixtures"][1]
+
+    print(f"{'format':>10} {'compression':>12} {'bytes':>9} {'vs json':>8} {'encode ms':>10}")
+    baseline = None
+    for label, encoder in [("json", encode_json), ("msgpack", encode_msgpack)]:
+        body, encode_ms = timed(lambda: encoder(payload))
+        baseline = baseline or len(body)
+        for encoding in [None, "gzip", "br"]:
+            if encoding:
+                wire, compress_ms = timed(lambda: compress(body, encoding))
+            else:
+                wire, compress_ms = body, 0.0
+            print(f"{label:>10} {encoding or 'none':>12} {len(wire):>9} {len(wire) / baseline:>8.2f} {encode_ms + compress_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
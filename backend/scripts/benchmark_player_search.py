@@ -0,0 +1,71 @@
+"""
+Player search benchmark.
+
+Builds the trigram index over synthetic players and times name prefixes,
+misspelled full names, phone fragments and duplicate checks.
+
+Run from the backend directory:
+    python -m scripts.benchmark_player_search
+"""
+import random
+import string
+import time
+import uuid
+
+from app.services.player_search import PlayerSearchIndex
+
+SYLLABLES = ["an", "ar", "ba", "de", "el", "ha", "ik", "ja", "ka", "li", "ma", "na", "or", "pa", "ra", "sh", "ti", "va", "ya", "zu"]
+
+
+def make_name():
+    def word():
+        return "".join(random.choices(SYLLABLES, k=random.randint(2, 4))).capitalize()
+    return f"{word()} {word()}"
+
+
+def make_players(n):
+    return [
+        {"id": str(uuid.uuid4()), "name": make_name(), "phone": "+91" + "".join(random.choices(string.digits, k=10))}
+        for _ in range(n)
+    ]
+
+
+def misspell(name):
+    i = random.randrange(len(name))
+    return name[:i] + random.choice(string.ascii_lowercase) + name[i + 1:]
+
+
+def timed(fn, inputs):
+    times = []
+    for value in inputs:
+        start = time.perf_counter()
+        fn(value)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return times[len(times) // 2], times[int(len(times) * 0.99)], times[-1]
+
+
+def main():
+    random.seed(42)
+    print(f"{'players':>8} {'build s':>8} {'query':>12} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for n in [1_000, 10_000, 100_000]:
+        players = make_players(n)
+        index = PlayerSearchIndex()
+        start = time.perf_counter()
+        index.rebuild(players)
+        build = time.perf_counter() - start
+
+        sample = random.sample(players, 300)
+        workloads = [
+            ("prefix", index.search, [p["name"][:random.randint(2, 8)] for p in sample]),
+            ("misspelled", index.search, [misspell(p["name"]) for p in sample]),
+            ("phone", index.search, [p["phone"][-6:] for p in sample]),
+            ("duplicates", lambda p: index.find_duplicates(p["name"], p["phone"]), sample),
+        ]
+        for label, fn, inputs in workloads:
+            p50, p99, worst = timed(fn, inputs)
+            print(f"{n:>8} {build:>8.2f} {label:>12} {p50:>8.2f} {p99:>8.2f} {worst:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
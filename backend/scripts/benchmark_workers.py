@@ -0,0 +1,120 @@
+"""
+Read throughput of the API with 1..N uvicorn workers.
+
+Starts the stand-in PostgREST (scripts/standin_postgrest.py), then for each
+worker count launches `uvicorn app.main:app --workers N` against it and
+drives GET /api/fixtures/{event_id} from several load-generator processes.
+Admission control is disabled so the numbers show raw worker scaling
+rather than shedding. The stand-in and load generators share the machine,
+so leave cores for them when reading the results.
+
+Run from the backend directory:
+    python -m scripts.benchmark_workers [--workers 1 2 4] [--clients 8] [--seconds 10]
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from scripts.standin_postgrest import EVENT_ID, FAKE_KEY, serve
+
+READ_PATH = f"/api/fixtures/{EVENT_ID}"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def load(url: str, seconds: float, results):
+    ok = failed = 0
+    deadline = time.monotonic() + seconds
+    with httpx.Client(base_url=url, timeout=10) as client:
+        while time.monotonic() < deadline:
+            try:
+                ok += client.get(READ_PATH).status_code == 200
+            except httpx.HTTPError:
+                failed += 1
+    results.put((ok, failed))
+
+
+def wait_until_up(url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("API did not start")
+
+
+def measure(standin_url: str, workers: int, clients: int, seconds: float) -> float:
+    port = free_port()
+    env = dict(
+        os.environ,
+        SUPABASE_URL=standin_url,
+        SUPABASE_SERVICE_KEY=FAKE_KEY,
+        ADMISSION_ENABLED="false",
+        CACHE_BUS_DIR=os.path.join("/tmp", f"bench-bus-{port}")
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        url = f"http://127.0.0.1:{port}"
+        wait_until_up(url)
+        # Let the remaining workers finish booting
+        time.sleep(2)
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=load, args=(url, seconds, results)) for _ in range(clients)]
+        for p in procs:
+            p.start()
+        totals = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+        ok = sum(t[0] for t in totals)
+        return ok / seconds
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(env["CACHE_BUS_DIR"], ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    port_queue = multiprocessing.Queue()
+    standin = multiprocessing.Process(target=serve, args=(port_queue,), daemon=True)
+    standin.start()
+    standin_url = f"http://127.0.0.1:{port_queue.get()}"
+
+    print(f"cores: {os.cpu_count()}")
+    print(f"{'workers':>8} {'req/s':>8} {'speedup':>8}")
+    baseline = None
+    for workers in args.workers:
+        rps = measure(standin_url, workers, args.clients, args.seconds)
+        baseline = baseline or rps
+        print(f"{workers:>8} {rps:>8.0f} {rps / baseline:>7.2f}x")
+
+    standin.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+-- Captures EXPLAIN ANALYZE plans for the hot API queries on a seeded dataset.
+-- Everything runs in one transaction that is rolled back, so it is safe to
+-- point at a scratch copy of the database with the schema and migrations
+-- applied:
+--
+--     psql "$DATABASE_URL" -f scripts/explain_hot_queries.sql > query_plans.txt
+
+\set ON_ERROR_STOP on
+\pset pager off
+
+BEGIN;
+
+-- 40 events x 1,024-player draws, 20k players, 100 clubs
+INSERT INTO clubs (id, name)
+SELECT gen_random_uuid(), 'explain-club-' || g FROM generate_series(1, 100) g;
+
+INSERT INTO events (id, name, created_at)
+SELECT gen_random_uuid(), 'explain-event-' || g, now() - (g || ' days')::interval
+FROM generate_series(1, 40) g;
+
+INSERT INTO players (id, name, age, phone, club_id)
+SELECT gen_random_uuid(), 'Explain Player ' || g, 18 + g % 30, '555' || g,
+       (SELECT id FROM clubs WHERE name = 'explain-club-' || (1 + g % 100))
+FROM generate_series(1, 20000) g;
+
+CREATE TEMP TABLE seed_players AS
+SELECT id, row_number() OVER () AS n FROM players WHERE name LIKE 'Explain Player %';
+CREATE INDEX ON seed_players(n);
+ANALYZE seed_players;
+
+CREATE TEMP TABLE seed_events AS
+SELECT id, row_number() OVER (ORDER BY name) AS n FROM events WHERE name LIKE 'explain-event-%';
+
+-- Rounds 1-10 of each draw; earlier rounds completed, the rest pending
+INSERT INTO matches (id, event_id, round, bracket_position, player1_id, player2_id, court_id, start_time, end_time, status)
+SELECT gen_random_uuid(), e.id, r.round, pos,
+       (SELECT id FROM seed_players WHERE n = 1 + (e.n * 512 + pos * 2) % 20000),
+       (SELECT id FROM seed_players WHERE n = 1 + (e.n * 512 + pos * 2 + 1) % 20000),
+       'Court-' || (1 + pos % 12),
+       now() - ((40 - e.n) || ' days')::interval + ((r.round * 60 + pos % 40 * 30) || ' minutes')::interval,
+       now() - ((40 - e.n) || ' days')::interval + ((r.round * 60 + pos % 40 * 30 + 30) || ' minutes')::interval,
+       CASE WHEN r.round < 3 OR e.n < 38 THEN 'completed' WHEN r.round = 3 AND pos % 7 = 0 THEN 'bye' ELSE 'pending' END
+FROM seed_events e
+CROSS JOIN LATERAL (SELECT g AS round, 512 >> (g - 1) AS width FROM generate_series(1, 10) g) r
+CROSS JOIN LATERAL generate_series(0, r.width - 1) pos;
+
+INSERT INTO scores (match_id, player1_score, player2_score)
+SELECT id, 2, bracket_position % 2 FROM matches
+WHERE status = 'completed' AND event_id IN (SELECT id FROM seed_events);
+
+INSERT INTO match_codes (match_id, code, assigned_umpire, expires_at)
+SELECT id, upper(substr(md5(id::text), 1, 6)), 'Not Assigned', now() + interval '1 day'
+FROM matches WHERE status = 'pending' AND event_id IN (SELECT id FROM seed_events);
+
+ANALYZE clubs, events, players, player_events, matches, scores, match_codes;
+
+SELECT id AS event_id FROM seed_events WHERE n = 39 \gset
+SELECT m.id AS match_id, mc.code AS match_code
+FROM matches m JOIN match_codes mc ON mc.match_id = m.id
+WHERE m.event_id = :'event_id' LIMIT 1 \gset
+
+\echo '== get_fixtures: open matches of an event by round'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM match_details
+WHERE event_id = :'event_id' AND status IN ('pending', 'bye')
+ORDER BY round, bracket_position;
+
+\echo '== create_schedule: pending matches of an event'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM match_details WHERE event_id = :'event_id' AND status = 'pending';
+
+\echo '== update_score: completed matches of a round'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM matches WHERE event_id = :'event_id' AND round = 3 AND status = 'completed';
+
+\echo '== get_court_schedule: court within an event'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM match_details
+WHERE court_id = 'Court-3' AND event_id = :'event_id' AND status <> 'bye'
+ORDER BY start_time;
+
+\echo '== get_court_schedule: court across all events'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM match_details WHERE court_id = 'Court-3' AND status <> 'bye' ORDER BY start_time;
+
+\echo '== verify_match_code'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM match_codes WHERE match_id = :'match_id' AND code = :'match_code';
+
+\echo '== venue board refresh'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM match_details
+WHERE status = 'pending' AND court_id IS NOT NULL
+  AND start_time >= now() - interval '12 hours' AND start_time < now() + interval '24 hours';
+
+\echo '== stats cache version'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT updated_at FROM scores ORDER BY updated_at DESC LIMIT 1;
+
+ROLLBACK;
@@ -17,6 +17,9 @@ CREATE TABLE IF NOT EXISTS events (
     name TEXT NOT NULL,
     type TEXT DEFAULT 'knockout',
     min_rest INT DEFAULT 10,
+    num_groups INT,
+    advance_per_group INT DEFAULT 2,
+    archived_at TIMESTAMP WITH TIME ZONE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -42,6 +45,8 @@ CREATE TABLE IF NOT EXISTS matches (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     event_id UUID REFERENCES events(id) ON DELETE CASCADE,
     round INT NOT NULL,
+    group_number INT,
+    bracket_position INT,
     player1_id UUID REFERENCES players(id) ON DELETE CASCADE,
     player2_id UUID REFERENCES players(id) ON DELETE CASCADE,
     court_id TEXT,
@@ -51,14 +56,24 @@ CREATE TABLE IF NOT EXISTS matches (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Slot of the match within its round (round 1 slots 2k/2k+1 feed round 2 slot k)
+ALTER TABLE matches ADD COLUMN IF NOT EXISTS bracket_position INT;
+
+-- Group of a round-robin / group-stage match (NULL for knockout matches)
+ALTER TABLE matches ADD COLUMN IF NOT EXISTS group_number INT;
+
 -- Create scores table
 CREATE TABLE IF NOT EXISTS scores (
     match_id UUID PRIMARY KEY REFERENCES matches(id) ON DELETE CASCADE,
     player1_score INT NOT NULL,
     player2_score INT NOT NULL,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Last edit of a score; versions the cached season stats
+ALTER TABLE scores ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+
 -- Create match_codes table
 CREATE TABLE IF NOT EXISTS match_codes (
     match_id UUID PRIMARY KEY REFERENCES matches(id) ON DELETE CASCADE,
@@ -68,14 +83,217 @@ CREATE TABLE IF NOT EXISTS match_codes (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Create group_standings table (kept up to date by update_score)
+CREATE TABLE IF NOT EXISTS group_standings (
+    event_id UUID REFERENCES events(id) ON DELETE CASCADE,
+    group_number INT NOT NULL,
+    player_id UUID REFERENCES players(id) ON DELETE CASCADE,
+    played INT NOT NULL DEFAULT 0,
+    wins INT NOT NULL DEFAULT 0,
+    losses INT NOT NULL DEFAULT 0,
+    sets_won INT NOT NULL DEFAULT 0,
+    sets_lost INT NOT NULL DEFAULT 0,
+    points INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (event_id, player_id)
+);
+
+-- Create event_changes table (change log for delta sync, see migrations/005)
+CREATE TABLE IF NOT EXISTS event_changes (
+    version BIGSERIAL PRIMARY KEY,
+    event_id UUID REFERENCES events(id) ON DELETE CASCADE,
+    entity TEXT NOT NULL,
+    entity_id UUID NOT NULL,
+    op TEXT NOT NULL DEFAULT 'upsert',
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Archive tables for finished events (filled by archive_event, see migrations/007)
+CREATE TABLE IF NOT EXISTS matches_archive (
+    id UUID PRIMARY KEY,
+    event_id UUID REFERENCES events(id) ON DELETE CASCADE,
+    round INT NOT NULL,
+    group_number INT,
+    bracket_position INT,
+    player1_id UUID REFERENCES players(id) ON DELETE CASCADE,
+    player2_id UUID REFERENCES players(id) ON DELETE CASCADE,
+    court_id TEXT,
+    start_time TIMESTAMP WITH TIME ZONE,
+    end_time TIMESTAMP WITH TIME ZONE,
+    status TEXT,
+    created_at TIMESTAMP WITH TIME ZONE
+);
+
+-- match_id references matches_archive so PostgREST can embed it like scores -> matches
+CREATE TABLE IF NOT EXISTS scores_archive (
+    match_id UUID PRIMARY KEY REFERENCES matches_archive(id) ON DELETE CASCADE,
+    player1_score INT NOT NULL,
+    player2_score INT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE TABLE IF NOT EXISTS match_codes_archive (
+    match_id UUID PRIMARY KEY REFERENCES matches_archive(id) ON DELETE CASCADE,
+    code TEXT NOT NULL,
+    assigned_umpire TEXT NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE TABLE IF NOT EXISTS player_events_archive (
+    player_id UUID REFERENCES players(id) ON DELETE CASCADE,
+    event_id UUID REFERENCES events(id) ON DELETE CASCADE,
+    PRIMARY KEY (player_id, event_id)
+);
+
+-- Create jobs table (background operations started with ?async=true)
+CREATE TABLE IF NOT EXISTS jobs (
+    id UUID PRIMARY KEY,
+    type TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    progress REAL NOT NULL DEFAULT 0,
+    result JSONB,
+    error JSONB,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_players_club ON players(club_id);
+CREATE INDEX IF NOT EXISTS idx_players_created ON players(created_at);
 CREATE INDEX IF NOT EXISTS idx_player_events_player ON player_events(player_id);
 CREATE INDEX IF NOT EXISTS idx_player_events_event ON player_events(event_id);
-CREATE INDEX IF NOT EXISTS idx_matches_event ON matches(event_id);
-CREATE INDEX IF NOT EXISTS idx_matches_round ON matches(round);
-CREATE INDEX IF NOT EXISTS idx_matches_status ON matches(status);
-CREATE INDEX IF NOT EXISTS idx_matches_court ON matches(court_id);
+CREATE INDEX IF NOT EXISTS idx_matches_event_round_status ON matches(event_id, round, status);
+CREATE INDEX IF NOT EXISTS idx_matches_event_open_round ON matches(event_id, round) WHERE status IN ('pending', 'bye');
+CREATE INDEX IF NOT EXISTS idx_matches_court_event_start ON matches(court_id, event_id, start_time);
+CREATE INDEX IF NOT EXISTS idx_matches_court_start ON matches(court_id, start_time) WHERE status <> 'bye';
+CREATE INDEX IF NOT EXISTS idx_matches_pending_start ON matches(start_time) WHERE status = 'pending' AND court_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_match_codes_match_code ON match_codes(match_id, code);
+CREATE INDEX IF NOT EXISTS idx_matches_event_group_status ON matches(event_id, status) WHERE group_number IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_scores_updated ON scores(updated_at);
+CREATE INDEX IF NOT EXISTS idx_events_created ON events(created_at);
+CREATE INDEX IF NOT EXISTS idx_matches_archive_event_round ON matches_archive(event_id, round);
+CREATE INDEX IF NOT EXISTS idx_matches_archive_court_start ON matches_archive(court_id, start_time);
+CREATE INDEX IF NOT EXISTS idx_player_events_archive_event ON player_events_archive(event_id);
+CREATE INDEX IF NOT EXISTS idx_events_active_created ON events(created_at) WHERE archived_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_event_changes_event_version ON event_changes(event_id, version);
+CREATE INDEX IF NOT EXISTS idx_event_changes_entity ON event_changes(event_id, entity, entity_id, version);
+-- A knockout round slot is created once, however many results race to create it
+CREATE UNIQUE INDEX IF NOT EXISTS idx_matches_knockout_slot ON matches(event_id, round, bracket_position) WHERE group_number IS NULL;
+
+-- Keeps only the newest change log entry per entity of an event
+CREATE OR REPLACE FUNCTION compact_event_changes(p_event_id UUID) RETURNS INT
+LANGUAGE sql AS $$
+    WITH removed AS (
+        DELETE FROM event_changes old
+        USING event_changes newer
+        WHERE old.event_id = p_event_id
+          AND newer.event_id = old.event_id
+          AND newer.entity = old.entity
+          AND newer.entity_id = old.entity_id
+          AND newer.version > old.version
+        RETURNING 1
+    )
+    SELECT count(*)::INT FROM removed;
+$$;
+
+-- Adds group result deltas to the standings (see migrations/008)
+CREATE OR REPLACE FUNCTION apply_group_results(p_event_id UUID, p_rows JSON) RETURNS VOID
+LANGUAGE sql AS $$
+    INSERT INTO group_standings AS g (event_id, group_number, player_id, played, wins, losses, sets_won, sets_lost, points)
+    SELECT p_event_id, r.group_number, r.player_id, r.played, r.wins, r.losses, r.sets_won, r.sets_lost, r.wins * 3 + r.sets_won
+    FROM json_to_recordset(p_rows)
+        AS r(player_id UUID, group_number INT, played INT, wins INT, losses INT, sets_won INT, sets_lost INT)
+    ON CONFLICT (event_id, player_id) DO UPDATE SET
+        played = g.played + EXCLUDED.played,
+        wins = g.wins + EXCLUDED.wins,
+        losses = g.losses + EXCLUDED.losses,
+        sets_won = g.sets_won + EXCLUDED.sets_won,
+        sets_lost = g.sets_lost + EXCLUDED.sets_lost,
+        points = (g.wins + EXCLUDED.wins) * 3 + g.sets_won + EXCLUDED.sets_won;
+$$;
+
+-- Matches with player names and match code embedded (see migrations/002).
+-- m.* is expanded at creation time, so the view is rebuilt, not replaced.
+DROP VIEW IF EXISTS match_details;
+CREATE VIEW match_details WITH (security_invoker = on) AS
+SELECT
+    m.*,
+    p1.name AS player1_name,
+    p2.name AS player2_name,
+    mc.code AS match_code
+FROM matches m
+LEFT JOIN players p1 ON p1.id = m.player1_id
+LEFT JOIN players p2 ON p2.id = m.player2_id
+LEFT JOIN match_codes mc ON mc.match_id = m.id;
+
+-- Moves a finished event out of the hot tables
+CREATE OR REPLACE FUNCTION archive_event(p_event_id UUID) RETURNS JSON
+LANGUAGE plpgsql AS $$
+DECLARE
+    moved_matches INT;
+    moved_scores INT;
+    moved_codes INT;
+    moved_registrations INT;
+BEGIN
+    -- Lock the event so two archive calls cannot interleave
+    PERFORM 1 FROM events WHERE id = p_event_id AND archived_at IS NULL FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Event % not found or already archived', p_event_id USING ERRCODE = 'no_data_found';
+    END IF;
+    IF EXISTS (SELECT 1 FROM matches WHERE event_id = p_event_id AND status = 'pending') THEN
+        RAISE EXCEPTION 'Event % still has pending matches', p_event_id USING ERRCODE = 'check_violation';
+    END IF;
+
+    INSERT INTO matches_archive (id, event_id, round, group_number, bracket_position, player1_id, player2_id,
+                                 court_id, start_time, end_time, status, created_at)
+    SELECT id, event_id, round, group_number, bracket_position, player1_id, player2_id,
+           court_id, start_time, end_time, status, created_at
+    FROM matches WHERE event_id = p_event_id;
+    GET DIAGNOSTICS moved_matches = ROW_COUNT;
+
+    INSERT INTO scores_archive (match_id, player1_score, player2_score, created_at, updated_at)
+    SELECT s.match_id, s.player1_score, s.player2_score, s.created_at, s.updated_at
+    FROM scores s JOIN matches m ON m.id = s.match_id WHERE m.event_id = p_event_id;
+    GET DIAGNOSTICS moved_scores = ROW_COUNT;
+
+    INSERT INTO match_codes_archive (match_id, code, assigned_umpire, expires_at, created_at)
+    SELECT c.match_id, c.code, c.assigned_umpire, c.expires_at, c.created_at
+    FROM match_codes c JOIN matches m ON m.id = c.match_id WHERE m.event_id = p_event_id;
+    GET DIAGNOSTICS moved_codes = ROW_COUNT;
+
+    INSERT INTO player_events_archive (player_id, event_id)
+    SELECT player_id, event_id FROM player_events WHERE event_id = p_event_id;
+    GET DIAGNOSTICS moved_registrations = ROW_COUNT;
+
+    -- scores and match_codes go with their matches (ON DELETE CASCADE)
+    DELETE FROM matches WHERE event_id = p_event_id;
+    DELETE FROM player_events WHERE event_id = p_event_id;
+    -- Nothing left to sync for an archived event
+    DELETE FROM event_changes WHERE event_id = p_event_id;
+    UPDATE events SET archived_at = now() WHERE id = p_event_id;
+
+    RETURN json_build_object(
+        'matches', moved_matches,
+        'scores', moved_scores,
+        'match_codes', moved_codes,
+        'player_events', moved_registrations
+    );
+END;
+$$;
+
+-- Archived matches with player names and match code embedded
+CREATE OR REPLACE VIEW match_details_archive WITH (security_invoker = on) AS
+SELECT
+    m.*,
+    p1.name AS player1_name,
+    p2.name AS player2_name,
+    mc.code AS match_code
+FROM matches_archive m
+LEFT JOIN players p1 ON p1.id = m.player1_id
+LEFT JOIN players p2 ON p2.id = m.player2_id
+LEFT JOIN match_codes_archive mc ON mc.match_id = m.id;
 
 -- Enable Row Level Security (RLS) - Optional but recommended
 ALTER TABLE clubs ENABLE ROW LEVEL SECURITY;
@@ -85,6 +303,13 @@ ALTER TABLE player_events ENABLE ROW LEVEL SECURITY;
 ALTER TABLE matches ENABLE ROW LEVEL SECURITY;
 ALTER TABLE scores ENABLE ROW LEVEL SECURITY;
 ALTER TABLE match_codes ENABLE ROW LEVEL SECURITY;
+ALTER TABLE jobs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE group_standings ENABLE ROW LEVEL SECURITY;
+ALTER TABLE event_changes ENABLE ROW LEVEL SECURITY;
+ALTER TABLE matches_archive ENABLE ROW LEVEL SECURITY;
+ALTER TABLE scores_archive ENABLE ROW LEVEL SECURITY;
+ALTER TABLE match_codes_archive ENABLE ROW LEVEL SECURITY;
+ALTER TABLE player_events_archive ENABLE ROW LEVEL SECURITY;
 
 -- Create policies (modify based on your authentication requirements)
 -- For now, allow all operations (you can restrict later)
@@ -95,3 +320,10 @@ CREATE POLICY "Allow all operations on player_events" ON player_events FOR ALL U
 CREATE POLICY "Allow all operations on matches" ON matches FOR ALL USING (true);
 CREATE POLICY "Allow all operations on scores" ON scores FOR ALL USING (true);
 CREATE POLICY "Allow all operations on match_codes" ON match_codes FOR ALL USING (true);
+CREATE POLICY "Allow all operations on jobs" ON jobs FOR ALL USING (true);
+CREATE POLICY "Allow all operations on group_standings" ON group_standings FOR ALL USING (true);
+CREATE POLICY "Allow all operations on event_changes" ON event_changes FOR ALL USING (true);
+CREATE POLICY "Allow all operations on matches_archive" ON matches_archive FOR ALL USING (true);
+CREATE POLICY "Allow all operations on scores_archive" ON scores_archive FOR ALL USING (true);
+CREATE POLICY "Allow all operations on match_codes_archive" ON match_codes_archive FOR ALL USING (true);
+CREATE POLICY "Allow all operations on player_events_archive" ON player_events_archive FOR ALL USING (true);
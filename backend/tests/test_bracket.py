@@ -0,0 +1,38 @@
+from app.services.bracket import club_conflicts, next_power_of_two, place_players, seed_order
+
+
+def _players(clubs):
+    """One player per entry of `clubs`, with that club id."""
+    return [{"id": f"p{i}", "club_id": club} for i, club in enumerate(clubs)]
+
+
+def test_seed_order():
+    assert seed_order(8) == [1, 8, 4, 5, 2, 7, 3, 6]
+    assert next_power_of_two(6) == 8
+    assert next_power_of_two(8) == 8
+
+
+def test_every_player_placed_once_with_byes_at_top_seeds():
+    players = _players([None] * 6)
+    slots = place_players(players)
+
+    assert len(slots) == 8
+    assert sorted(p["id"] for p in slots if p) == sorted(p["id"] for p in players)
+    # Seeds 7 and 8 do not exist: their slots face seeds 2 and 1
+    assert [i for i, p in enumerate(slots) if p is None] == [1, 5]
+
+
+def test_byes_never_meet_each_other():
+    for n in range(2, 40):
+        slots = place_players(_players([None] * n))
+        for k in range(0, len(slots), 2):
+            assert slots[k] is not None or slots[k + 1] is not None
+
+
+def test_club_mates_meet_as_late_as_possible():
+    slots = place_players(_players(["a"] * 4 + ["b", "c", "d", "e"]))
+    # One "a" per quarter: two clashes in the semis, four in the final
+    assert club_conflicts(slots) == [0, 2, 4]
+
+    slots = place_players(_players([club for club in "abcdefgh" for _ in range(8)]))
+    assert club_conflicts(slots)[:3] == [0, 0, 0]
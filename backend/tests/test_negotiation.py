@@ -0,0 +1,67 @@
+import json
+import uuid
+from datetime import datetime
+
+from app.utils.negotiation import decode_msgpack, encode_msgpack, prefers_msgpack
+
+
+def _payload(n):
+    event_id = str(uuid.uuid4())
+    players = [str(uuid.uuid4()) for _ in range(n)]
+    return {
+        "event_id": event_id,
+        "matches": [
+            {
+                "id": str(uuid.uuid4()),
+                "event_id": event_id,
+                "round": 1,
+                "player1_id": players[i],
+                "player2_id": players[(i + 1) % n],
+                "player1_name": f"Player {i}",
+                "court_id": None,
+                "score": 2.5,
+                "completed": False,
+            }
+            for i in range(n)
+        ],
+    }
+
+
+def test_round_trip():
+    payload = _payload(8)
+    assert decode_msgpack(encode_msgpack(payload)) == payload
+
+
+def test_round_trip_with_wide_references():
+    # Over 256 distinct UUIDs need 2-byte table indexes
+    payload = _payload(300)
+    encoded = encode_msgpack(payload)
+
+    assert decode_msgpack(encoded) == payload
+    assert len(encoded) < len(json.dumps(payload)) / 2
+
+
+def test_uuid_objects_dates_and_lookalikes():
+    player_id = uuid.uuid4()
+    not_a_uuid = "x" * 36
+    decoded = decode_msgpack(encode_msgpack({
+        "player_id": player_id,
+        "ids": (str(player_id).upper(), str(player_id)),
+        "at": datetime(2026, 5, 1, 9, 30),
+        "note": not_a_uuid,
+    }))
+
+    assert decoded == {
+        "player_id": str(player_id),
+        "ids": [str(player_id), str(player_id)],
+        "at": "2026-05-01T09:30:00",
+        "note": not_a_uuid,
+    }
+
+
+def test_prefers_msgpack():
+    assert prefers_msgpack("application/msgpack")
+    assert prefers_msgpack("application/json;q=0.5, application/x-msgpack")
+    assert not prefers_msgpack("application/json, application/msgpack;q=0.9")
+    assert not prefers_msgpack("*/*")
+    assert not prefers_msgpack("")
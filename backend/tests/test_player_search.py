@@ -0,0 +1,62 @@
+from app.services.player_search import PlayerSearchIndex, name_trigrams, normalize_name, normalize_phone
+
+PLAYERS = [
+    {"id": "1", "name": "José Álvarez", "phone": "+34 600 123 456", "club_id": "c1"},
+    {"id": "2", "name": "Jose Alvarado", "phone": "600 999 888", "club_id": "c2"},
+    {"id": "3", "name": "Maria Lopez", "phone": "611 222 333", "club_id": "c1"},
+    {"id": "4", "name": "John Smith", "phone": "0044 7700 900123", "club_id": "c3"},
+]
+
+
+def _index():
+    index = PlayerSearchIndex()
+    index.rebuild(PLAYERS)
+    return index
+
+
+def test_normalization():
+    assert normalize_name("  José  ÁLVAREZ-Ruiz ") == "jose alvarez ruiz"
+    assert normalize_phone("+34 (600) 123-456") == "34600123456"[-10:]
+    assert "  j" in name_trigrams("Jo", prefix=True)
+    assert "jo " not in name_trigrams("Jo", prefix=True)
+
+
+def test_name_search_ignores_accents_and_ranks_closest_first():
+    results = _index().search("jose alvarez")
+
+    assert [r["id"] for r in results][:2] == ["1", "2"]
+    assert results[0]["score"] == 1.0
+
+
+def test_prefix_matches_while_typing():
+    assert [r["id"] for r in _index().search("mari")] == ["3"]
+
+
+def test_digit_queries_search_phones():
+    results = _index().search("600 123")
+    assert (results[0]["id"], results[0]["score"]) == ("1", 1.0)
+    assert all(r["score"] < 1.0 for r in results[1:])
+
+
+def test_added_players_are_searchable():
+    index = _index()
+    index.add([{"id": "5", "name": "Mariana Lopes", "phone": "622 000 111"}])
+    index.add([{"id": "5", "name": "Mariana Lopes", "phone": "622 000 111"}])
+
+    assert len(index) == 5
+    assert "5" in [r["id"] for r in index.search("mariana")]
+
+
+def test_find_duplicates():
+    index = _index()
+
+    same_name = index.find_duplicates("JOSE ALVAREZ", "123")
+    assert (same_name[0]["id"], same_name[0]["reason"]) == ("1", "same_name")
+
+    same_phone = index.find_duplicates("Someone Else", "611-222-333")
+    assert [(d["id"], d["reason"]) for d in same_phone] == [("3", "same_phone")]
+
+    similar = index.find_duplicates("Jon Smith", None)
+    assert [(d["id"], d["reason"]) for d in similar] == [("4", "similar_name")]
+
+    assert index.find_duplicates("John Smith", None, among={"1"}) == []
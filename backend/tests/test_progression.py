@@ -0,0 +1,134 @@
+from app.services.progression import advance_bracket, pair_winners, winner_of
+
+EVENT_ID = "event-1"
+
+
+def _match(match_id, round_num, position, player1, player2, status):
+    return {
+        "id": match_id,
+        "event_id": EVENT_ID,
+        "round": round_num,
+        "bracket_position": position,
+        "player1_id": player1,
+        "player2_id": player2,
+        "status": status,
+    }
+
+
+def _six_in_eight_draw():
+    """Six players in an 8-slot draw: round 1 positions 0 and 2 are byes."""
+    return [
+        _match("m0", 1, 0, "p1", None, "bye"),
+        _match("m1", 1, 1, "p2", "p3", "pending"),
+        _match("m2", 1, 2, "p4", None, "bye"),
+        _match("m3", 1, 3, "p5", "p6", "pending"),
+    ]
+
+
+def test_winner_of():
+    match = _match("m", 1, 0, "a", "b", "completed")
+    assert winner_of(match, {"player1_score": 2, "player2_score": 0}) == "a"
+    assert winner_of(match, {"player1_score": 1, "player2_score": 2}) == "b"
+    assert winner_of(_match("m", 1, 0, "a", None, "bye"), None) == "a"
+    assert winner_of(_match("m", 1, 0, "a", "b", "pending"), None) is None
+
+
+def test_pair_winners_pairs_sibling_slots():
+    winners = [(3, "d"), (0, "a"), (2, "c"), (1, "b")]
+    next_matches = pair_winners(winners, EVENT_ID, 2)
+
+    assert [(m["player1_id"], m["player2_id"]) for m in next_matches] == [("a", "b"), ("c", "d")]
+    assert [m["bracket_position"] for m in next_matches] == [0, 1]
+    assert all(m["round"] == 2 and m["status"] == "pending" for m in next_matches)
+
+
+def test_pair_winners_waits_for_the_sibling():
+    # Positions 0 and 2 are decided, but they are not siblings
+    assert pair_winners([(0, "a"), (1, "b"), (2, "c")], EVENT_ID, 2)[0]["bracket_position"] == 0
+    assert pair_winners([(0, "a"), (2, "c")], EVENT_ID, 2) == []
+    assert pair_winners([(0, "a"), (1, "b")], EVENT_ID, 2, taken={0}) == []
+
+
+def test_results_one_at_a_time_follow_the_draw():
+    matches = _six_in_eight_draw()
+    scores = {}
+
+    created = []
+    for match_id, score in [("m1", (0, 2)), ("m3", (2, 0))]:
+        next(m for m in matches if m["id"] == match_id)["status"] = "completed"
+        scores[match_id] = {"player1_score": score[0], "player2_score": score[1]}
+        new = advance_bracket(EVENT_ID, matches, scores, from_round=1)
+        assert len(new) == 1
+        matches.extend(new)
+        created.extend(new)
+
+    assert [(m["bracket_position"], m["player1_id"], m["player2_id"]) for m in created] == [
+        (0, "p1", "p3"),
+        (1, "p4", "p5"),
+    ]
+
+
+def _eight_slot_draw_with_byes():
+    """Six players in an 8-slot draw, round 1 all decided."""
+    matches = _six_in_eight_draw()
+    for m in matches:
+        if m["status"] == "pending":
+            m["status"] = "completed"
+    scores = {
+        "m1": {"player1_score": 2, "player2_score": 1},
+        "m3": {"player1_score": 0, "player2_score": 2},
+    }
+    return matches, scores
+
+
+def test_bracket_with_byes_advances_exactly_one_round():
+    matches, scores = _eight_slot_draw_with_byes()
+
+    created = advance_bracket(EVENT_ID, matches, scores, from_round=1)
+
+    assert {m["round"] for m in created} == {2}
+    assert [(m["player1_id"], m["player2_id"]) for m in created] == [("p1", "p2"), ("p4", "p6")]
+
+
+def test_partial_round_creates_only_decided_slots():
+    matches, scores = _eight_slot_draw_with_byes()
+    matches[3]["status"] = "pending"
+    del scores["m3"]
+
+    created = advance_bracket(EVENT_ID, matches, scores, from_round=1)
+    assert [m["bracket_position"] for m in created] == [0]
+
+    matches[1]["status"] = "pending"
+    del scores["m1"]
+    assert advance_bracket(EVENT_ID, matches, scores, from_round=1) == []
+
+
+def test_existing_slots_are_left_alone():
+    matches, scores = _eight_slot_draw_with_byes()
+    matches.append(_match("r2", 2, 0, "p1", "p2", "pending"))
+
+    created = advance_bracket(EVENT_ID, matches, scores, from_round=1)
+    assert [(m["bracket_position"], m["player1_id"], m["player2_id"]) for m in created] == [(1, "p4", "p6")]
+
+
+def test_matches_without_positions_wait_for_the_whole_round():
+    matches, scores = _eight_slot_draw_with_byes()
+    for m in matches:
+        m["bracket_position"] = None
+    matches[3]["status"] = "pending"
+
+    assert advance_bracket(EVENT_ID, matches, scores, from_round=1) == []
+
+    matches[3]["status"] = "completed"
+    assert len(advance_bracket(EVENT_ID, matches, scores, from_round=1)) == 2
+
+
+def test_final_creates_no_further_round():
+    assert pair_winners([(0, "a")], EVENT_ID, 4) == []
+    final = [_match("f", 3, 0, "a", "b", "completed")]
+    assert advance_bracket(EVENT_ID, final, {"f": {"player1_score": 2, "player2_score": 0}}, from_round=3) == []
+
+
+def test_matches_without_positions_pair_in_order():
+    next_matches = pair_winners([(None, "a"), (None, "b"), (None, "c")], EVENT_ID, 2)
+    assert [(m["player1_id"], m["player2_id"], m["bracket_position"]) for m in next_matches] == [("a", "b", None)]
@@ -0,0 +1,116 @@
+import time
+
+import httpx
+
+from app.utils import resilience
+from app.utils.resilience import CircuitBreaker, ReadCache, ResilientTransport, _query_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _breaker(monkeypatch, threshold=3, reset=10.0):
+    clock = FakeClock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return CircuitBreaker(failure_threshold=threshold, reset_timeout=reset), clock
+
+
+def test_opens_after_consecutive_failures(monkeypatch):
+    breaker, _ = _breaker(monkeypatch)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record(False)
+    assert breaker.state == "closed"
+
+    breaker.record(False)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_success_resets_the_failure_count(monkeypatch):
+    breaker, _ = _breaker(monkeypatch)
+    breaker.record(False)
+    breaker.record(False)
+    breaker.record(True)
+    breaker.record(False)
+    assert breaker.state == "closed"
+
+
+def test_half_open_probe_closes_on_success(monkeypatch):
+    breaker, clock = _breaker(monkeypatch)
+    for _ in range(3):
+        breaker.record(False)
+
+    clock.now += 10.5
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    # One probe at a time
+    assert not breaker.allow()
+
+    breaker.record(True)
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_half_open_probe_failure_reopens(monkeypatch):
+    breaker, clock = _breaker(monkeypatch)
+    for _ in range(3):
+        breaker.record(False)
+
+    clock.now += 10.5
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.times_opened == 2
+
+
+def test_query_key_drops_filter_values():
+    page = httpx.Request("GET", "http://db/rest/v1/matches?select=*&event_id=eq.1&order=id.asc&limit=1000")
+    other_event = httpx.Request("GET", "http://db/rest/v1/matches?select=*&event_id=eq.2&order=id.asc&limit=1000")
+    lookup = httpx.Request("GET", "http://db/rest/v1/matches?select=*&id=eq.7")
+
+    assert _query_key(page) == _query_key(other_event)
+    assert _query_key(page) != _query_key(lookup)
+
+
+def test_slow_read_is_raced_by_a_hedge():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            time.sleep(0.5)
+            return httpx.Response(200, json={"attempt": "primary"})
+        return httpx.Response(200, json={"attempt": "hedge"})
+
+    transport = ResilientTransport(httpx.MockTransport(handler))
+    request = httpx.Request("GET", "http://db/rest/v1/matches?id=eq.1")
+    for _ in range(20):
+        transport.latency.observe(_query_key(request), 0.02)
+
+    started = time.monotonic()
+    response = transport.handle_request(request)
+
+    assert time.monotonic() - started < 0.4
+    assert response.json() == {"attempt": "hedge"}
+    assert transport.metrics()["hedges"] == 1
+    assert transport.metrics()["hedge_wins"] == 1
+    transport.close()
+
+
+def test_read_cache_is_bounded_by_bytes():
+    cache = ReadCache(maxsize=100, max_bytes=1000, max_item_bytes=400)
+    for i in range(5):
+        cache.put(f"http://db/rest/v1/t?id=eq.{i}", httpx.Response(200, content=b"x" * 300))
+    cache.put("http://db/rest/v1/t?limit=1000", httpx.Response(200, content=b"x" * 500))
+
+    assert cache.size_bytes() == 900
+    assert cache.get(httpx.Request("GET", "http://db/rest/v1/t?id=eq.0")) is None
+    assert cache.get(httpx.Request("GET", "http://db/rest/v1/t?id=eq.4")) is not None
+    assert cache.get(httpx.Request("GET", "http://db/rest/v1/t?limit=1000")) is None
@@ -0,0 +1,44 @@
+from itertools import combinations
+
+from app.services.round_robin import apply_result, circle_pairings, empty_standing
+
+
+def _check_schedule(player_ids):
+    rounds = circle_pairings(player_ids)
+    seen = set()
+    for pairs in rounds:
+        in_round = [p for pair in pairs for p in pair]
+        assert len(in_round) == len(set(in_round)), "someone plays twice in a round"
+        for pair in pairs:
+            key = frozenset(pair)
+            assert key not in seen, "pair meets twice"
+            seen.add(key)
+    assert seen == {frozenset(pair) for pair in combinations(player_ids, 2)}
+    return rounds
+
+
+def test_even_group_plays_everyone_once():
+    rounds = _check_schedule([f"p{i}" for i in range(6)])
+    assert len(rounds) == 5
+    assert all(len(pairs) == 3 for pairs in rounds)
+
+
+def test_odd_group_sits_one_player_out_per_round():
+    rounds = _check_schedule([f"p{i}" for i in range(5)])
+    assert len(rounds) == 5
+    assert all(len(pairs) == 2 for pairs in rounds)
+
+
+def test_apply_result_and_correction():
+    row1 = empty_standing("e", 1, "a")
+    row2 = empty_standing("e", 1, "b")
+
+    apply_result(row1, row2, 2, 1)
+    assert (row1["wins"], row1["losses"], row1["sets_won"], row1["points"]) == (1, 0, 2, 5)
+    assert (row2["wins"], row2["losses"], row2["sets_won"], row2["points"]) == (0, 1, 1, 1)
+
+    # A corrected score removes the old result before adding the new one
+    apply_result(row1, row2, 2, 1, sign=-1)
+    apply_result(row1, row2, 0, 2)
+    assert (row1["played"], row1["wins"], row1["losses"], row1["points"]) == (1, 0, 1, 0)
+    assert (row2["played"], row2["wins"], row2["losses"], row2["points"]) == (1, 1, 0, 5)